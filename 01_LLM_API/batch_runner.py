@@ -0,0 +1,224 @@
+"""
+JSONL 배치 추론 실행기
+
+JSONL 파일의 채팅 요청을 동시에 실행하고 결과를 JSONL로 저장합니다.
+  - 입력은 한 줄씩 읽어서 처리하므로 파일 크기와 관계없이 메모리를 적게 사용
+  - 동시 요청 수를 --concurrency로 제한 (AsyncOpenAI, 제공자별 커넥션 풀 공유)
+  - 결과는 끝나는 대로 한 줄씩 기록하므로 중간에 죽어도 완료된 결과는 남음
+  - 다시 실행하면 출력 파일에서 이미 성공한 id는 건너뜀 (재개)
+  - 처리량(요청/s, 토큰/s)과 오류 수를 주기적으로 출력
+
+입력 형식 (한 줄에 하나):
+  {"id": "q1", "messages": [{"role": "user", "content": "안녕"}]}
+  {"id": "q2", "prompt": "한국의 수도는?", "model": "qwen-3-32b", "max_tokens": 200}
+  - id 대신 request_id, prompt 대신 body도 사용할 수 있습니다. (id가 없으면 줄 번호)
+  - provider, model, temperature, max_tokens는 줄마다 바꿀 수 있습니다.
+
+출력 형식:
+  {"id": "q1", "provider": ..., "model": ..., "content": ..., "usage": {...}, "latency": 1.23}
+  실패한 요청은 "error" 필드가 들어가고, 다음 실행 때 다시 시도합니다.
+
+실행:
+  uv run python 01_LLM_API/batch_runner.py prompts.jsonl results.jsonl --provider cerebras --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from chat_engine import (PROVIDERS, build_request, close_async_clients, estimate_tokens,
+                         get_async_client, get_provider)
+from rate_limit import configure_limits, get_limiter
+
+
+def load_done_ids(output_path):
+    """출력 파일에서 이미 성공한 요청 id 집합"""
+    done = set()
+    if not output_path.exists():
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 죽으면서 잘린 마지막 줄
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+def parse_request(line_number, line, system_prompt=None):
+    """입력 한 줄을 (id, request dict)로 변환"""
+    item = json.loads(line)
+    request_id = str(item.get("id") or item.get("request_id") or line_number)
+    messages = item.get("messages")
+    if messages is None:
+        prompt = item.get("prompt") or item.get("body")
+        if prompt is None:
+            raise ValueError("messages, prompt, body 중 하나가 필요합니다.")
+        messages = [{"role": "user", "content": prompt}]
+    if system_prompt and not any(m.get("role") == "system" for m in messages):
+        messages = [{"role": "system", "content": system_prompt}] + messages
+    return request_id, {**item, "messages": messages}
+
+
+class BatchStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.done = 0
+        self.errors = 0
+        self.skipped = 0
+        self.completion_tokens = 0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return (f"완료 {self.done}, 오류 {self.errors}, 건너뜀 {self.skipped} | "
+                f"{self.done / elapsed:.2f} 요청/s, {self.completion_tokens / elapsed:.1f} 토큰/s "
+                f"({elapsed:.1f}s)")
+
+
+class BatchRunner:
+    """
+    JSONL 요청을 제한된 동시성으로 실행하는 배치 실행기
+
+    Args:
+        provider: 기본 제공자 이름
+        model: 기본 모델 (None이면 제공자 기본 모델)
+        concurrency: 동시에 실행할 요청 수
+        temperature, max_tokens: 요청에 값이 없을 때 사용할 기본값
+        system_prompt: system 메시지가 없는 요청에 붙일 시스템 프롬프트
+        report_interval: 진행 상황 출력 간격(초)
+    """
+
+    def __init__(self, provider="openai", model=None, concurrency=16, temperature=0.7,
+                 max_tokens=1000, system_prompt=None, report_interval=10.0):
+        get_provider(provider)
+        self.provider = provider
+        self.model = model
+        self.concurrency = concurrency
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self.report_interval = report_interval
+        self.stats = BatchStats()
+
+    async def _complete(self, request_id, item):
+        provider = item.get("provider", self.provider)
+        record = {"id": request_id, "provider": provider, "model": item.get("model") or self.model}
+        started = time.perf_counter()
+        try:
+            # 알 수 없는 제공자나 잘못된 요청도 오류 행으로 남겨야 작업자가 죽지 않습니다
+            config = get_provider(provider)
+            model = record["model"] = record["model"] or config.default_model
+            max_tokens = item.get("max_tokens", self.max_tokens)
+            request = build_request(config, item["messages"], model,
+                                    item.get("temperature", self.temperature), max_tokens)
+            client = get_async_client(provider).with_options(max_retries=0)
+            # 429/5xx는 공유 리미터가 동시성을 줄이고 Retry-After만큼 기다린 뒤 재시도합니다
+            async with get_limiter(provider, model).arequest(
+                    lambda: client.chat.completions.create(**request),
+                    estimate_tokens(item["messages"], max_tokens)) as response:
+                record["content"] = response.choices[0].message.content
+                if response.usage is not None:
+                    record["usage"] = {
+                        "prompt_tokens": response.usage.prompt_tokens,
+                        "completion_tokens": response.usage.completion_tokens,
+                    }
+                    self.stats.completion_tokens += response.usage.completion_tokens or 0
+            self.stats.done += 1
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            self.stats.errors += 1
+        record["latency"] = round(time.perf_counter() - started, 3)
+        return record
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            print(f"[진행] {self.stats.summary()}", flush=True)
+
+    async def run(self, input_path, output_path):
+        input_path, output_path = Path(input_path), Path(output_path)
+        done_ids = load_done_ids(output_path)
+        if done_ids:
+            print(f"이미 완료된 {len(done_ids)}개 요청은 건너뜁니다.")
+
+        # 큐 크기를 제한해서 입력 파일 전체를 메모리에 올리지 않습니다
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        reporter = asyncio.create_task(self._report())
+
+        with open(output_path, 'a', encoding='utf-8') as out:
+            async def worker():
+                while True:
+                    job = await queue.get()
+                    if job is None:
+                        return
+                    record = await self._complete(*job)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        try:
+                            request_id, item = parse_request(line_number, line, self.system_prompt)
+                        except (ValueError, json.JSONDecodeError) as e:
+                            print(f"{line_number}번째 줄 건너뜀: {e}")
+                            self.stats.errors += 1
+                            continue
+                        if request_id in done_ids:
+                            self.stats.skipped += 1
+                            continue
+                        await queue.put((request_id, item))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                reporter.cancel()
+                for task in workers:
+                    task.cancel()
+                await close_async_clients()
+
+        print(f"[완료] {self.stats.summary()}")
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 배치 추론 실행기")
+    parser.add_argument("input", help="입력 JSONL 파일")
+    parser.add_argument("output", help="결과 JSONL 파일 (이미 있으면 이어서 실행)")
+    parser.add_argument("--provider", default="openai", choices=sorted(PROVIDERS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--max-tokens", type=int, default=1000)
+    parser.add_argument("--system-prompt", default=None)
+    parser.add_argument("--rpm", type=float, default=None, help="분당 요청 수 한도")
+    parser.add_argument("--tpm", type=float, default=None, help="분당 토큰 수 한도")
+    args = parser.parse_args()
+
+    # 동시성은 --concurrency에서 시작하고, 429/5xx를 받으면 리미터가 줄였다가 다시 올립니다
+    configure_limits(args.provider, rpm=args.rpm, tpm=args.tpm,
+                     initial_concurrency=args.concurrency, max_concurrency=args.concurrency)
+
+    runner = BatchRunner(
+        provider=args.provider,
+        model=args.model,
+        concurrency=args.concurrency,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        system_prompt=args.system_prompt,
+    )
+    stats = asyncio.run(runner.run(args.input, args.output))
+    if stats.errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+공통 스트리밍 채팅 엔진
+
+OpenAI, Ollama, Cerebras, OpenRouter는 모두 OpenAI 호환 API를 제공하므로
+base_url, API 키, 토큰 제한 파라미터 이름만 다릅니다.
+이 모듈은 제공자(provider) 레지스트리와 하나의 대화 루프를 제공하고,
+eg_*_chatbot.py 스크립트는 이 엔진 위의 얇은 실행 파일이 됩니다.
+
+연결 재사용:
+  - 제공자마다 OpenAI 클라이언트를 한 번만 만들고 프로세스가 끝날 때까지 재사용합니다.
+  - keep-alive 커넥션 풀을 길게 유지해서 매 턴마다 TCP/TLS 핸드셰이크를 하지 않습니다.
+  - h2 패키지가 설치되어 있으면 HTTPS 엔드포인트에 HTTP/2를 사용합니다.
+    (uv add "httpx[http2]")
+
+사용 예:
+  from chat_engine import run_chat_loop
+  run_chat_loop("cerebras", "역할:너는 공감을 잘해주는 친구.", model="qwen-3-32b")
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from dotenv import load_dotenv
+load_dotenv()
+
+from chat_history import ChatHistory, count_message_tokens
+from chat_metrics import METRICS
+from rate_limit import get_limiter
+from stream_sink import StreamBuffer, TerminalSink
+
+try:
+    import h2  # noqa: F401  (httpx의 HTTP/2 지원에 필요)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class Provider:
+    """OpenAI 호환 API 제공자 설정"""
+    name: str
+    base_url: str | None            # None이면 OpenAI 기본 엔드포인트
+    api_key_env: str | None         # API 키를 읽을 환경 변수 이름
+    default_model: str
+    max_tokens_param: str = "max_completion_tokens"  # Ollama/OpenRouter는 max_tokens
+    http2: bool = True              # 엔드포인트가 HTTP/2를 지원하는지
+    api_key: str | None = None      # 키가 필요 없는 제공자용 고정 값
+    max_connections: int = 1000      # 스트림 하나가 커넥션 하나를 점유하므로 넉넉하게
+    max_keepalive_connections: int = 100
+    keepalive_expiry: float = 300.0  # 유휴 커넥션 유지 시간(초)
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+    stream_usage: bool = True       # stream_options={"include_usage": True} 지원 여부
+
+    def resolve_api_key(self):
+        if self.api_key_env and os.getenv(self.api_key_env):
+            return os.getenv(self.api_key_env)
+        return self.api_key
+
+
+# 제공자 레지스트리
+PROVIDERS = {
+    "openai": Provider(
+        name="openai",
+        base_url=None,
+        api_key_env="OPENAI_API_KEY",
+        default_model="gpt-4.1",
+    ),
+    "cerebras": Provider(
+        name="cerebras",
+        base_url="https://api.cerebras.ai/v1",
+        api_key_env="CEREBRAS_API_KEY",
+        default_model="qwen-3-32b",
+    ),
+    "openrouter": Provider(
+        name="openrouter",
+        base_url="https://openrouter.ai/api/v1",
+        api_key_env="OPENROUTER_API_KEY",
+        default_model="deepseek/deepseek-chat-v3.1:free",
+        max_tokens_param="max_tokens",
+    ),
+    "ollama": Provider(
+        name="ollama",
+        base_url="http://localhost:11434/v1",
+        api_key_env=None,
+        default_model="gpt-oss:20b",
+        max_tokens_param="max_tokens",  # Ollama는 max_completion_tokens 대신 max_tokens 사용
+        http2=False,                    # 로컬 HTTP 서버는 HTTP/1.1만 지원
+        api_key="ollama",               # Ollama는 API 키가 필요 없지만, OpenAI 클라이언트는 필수
+    ),
+}
+
+_clients = {}
+_async_clients = {}
+_clients_lock = threading.Lock()
+
+
+def register_provider(provider):
+    """레지스트리에 제공자를 추가하거나 교체합니다. 캐시된 클라이언트는 닫습니다."""
+    with _clients_lock:
+        PROVIDERS[provider.name] = provider
+        client = _clients.pop(provider.name, None)
+        # 비동기 클라이언트는 이벤트 루프에서 닫아야 하므로 캐시에서만 제거합니다
+        _async_clients.pop(provider.name, None)
+    if client is not None:
+        client.close()
+
+
+def get_provider(name):
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 제공자: {name} (사용 가능: {', '.join(PROVIDERS)})") from None
+
+
+def _http_client_options(provider):
+    return dict(
+        http2=provider.http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=provider.max_connections,
+            max_keepalive_connections=provider.max_keepalive_connections,
+            keepalive_expiry=provider.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(provider.read_timeout, connect=provider.connect_timeout),
+    )
+
+
+def _build_http_client(provider):
+    """제공자 전용 keep-alive 커넥션 풀을 가진 httpx 클라이언트 생성"""
+    return DefaultHttpxClient(**_http_client_options(provider))
+
+
+def get_client(name):
+    """
+    제공자별 OpenAI 클라이언트를 반환합니다 (프로세스 내에서 한 번만 생성).
+
+    Args:
+        name: PROVIDERS에 등록된 제공자 이름
+
+    Returns:
+        커넥션 풀을 공유하는 OpenAI 클라이언트
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            provider = get_provider(name)
+            client = OpenAI(
+                base_url=provider.base_url,
+                api_key=provider.resolve_api_key(),
+                http_client=_build_http_client(provider),
+            )
+            _clients[name] = client
+        return client
+
+
+def get_async_client(name):
+    """
+    제공자별 AsyncOpenAI 클라이언트를 반환합니다 (chat_server.py 등 asyncio 코드용).
+
+    비동기 커넥션 풀은 처음 사용한 이벤트 루프에 묶이므로
+    하나의 이벤트 루프 안에서만 사용하고, 끝날 때 close_async_clients()를 호출합니다.
+    """
+    with _clients_lock:
+        client = _async_clients.get(name)
+        if client is None:
+            provider = get_provider(name)
+            client = AsyncOpenAI(
+                base_url=provider.base_url,
+                api_key=provider.resolve_api_key(),
+                http_client=DefaultAsyncHttpxClient(**_http_client_options(provider)),
+            )
+            _async_clients[name] = client
+        return client
+
+
+async def close_async_clients():
+    """캐시된 모든 비동기 클라이언트를 닫습니다."""
+    with _clients_lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        await client.close()
+
+
+def warmup(name, background=True):
+    """
+    첫 턴 전에 커넥션을 미리 열어 둡니다 (TCP/TLS 핸드셰이크를 미리 처리).
+
+    models.list()는 가벼운 요청이라 커넥션 풀에 연결을 하나 만들어 두는 용도로 사용합니다.
+    실패해도 대화에는 영향이 없으므로 오류는 무시합니다.
+    """
+    def _warmup():
+        try:
+            get_client(name).models.list()
+        except Exception:
+            pass
+
+    if background:
+        thread = threading.Thread(target=_warmup, name=f"warmup-{name}", daemon=True)
+        thread.start()
+        return thread
+    _warmup()
+    return None
+
+
+def close_clients():
+    """캐시된 모든 클라이언트와 커넥션 풀을 닫습니다."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def build_request(provider, messages, model=None, temperature=0.7, max_tokens=1000, **extra):
+    """제공자에 맞는 chat.completions.create 인자 생성"""
+    kwargs = {
+        "model": model or provider.default_model,
+        "messages": messages,
+        "temperature": temperature,
+        provider.max_tokens_param: max_tokens,
+    }
+    kwargs.update(extra)
+    return kwargs
+
+
+def estimate_tokens(messages, max_tokens):
+    """TPM 한도 계산용 요청 토큰 수 (프롬프트 + 최대 생성 토큰)"""
+    return sum(count_message_tokens(m) for m in messages) + (max_tokens or 0)
+
+
+def _stream_request(name, messages, model, temperature, max_tokens, **extra):
+    provider = get_provider(name)
+    request = build_request(provider, messages, model, temperature, max_tokens, **extra)
+    request["stream"] = True
+    if provider.stream_usage:
+        # 마지막 청크로 usage(프롬프트/생성 토큰 수)를 받습니다
+        request.setdefault("stream_options", {"include_usage": True})
+    return request
+
+
+def stream_chat(name, messages, model=None, temperature=0.7, max_tokens=1000, retries=4, **extra):
+    """
+    스트리밍 응답의 텍스트 조각(delta)을 순서대로 반환하는 제너레이터
+
+    Args:
+        name: 제공자 이름
+        messages: 대화 메시지 리스트
+        model: 사용할 모델 (None이면 제공자 기본 모델)
+        temperature: 샘플링 온도
+        max_tokens: 최대 생성 토큰 수
+        retries: 429/5xx/타임아웃 재시도 횟수 (대체 제공자가 있으면 0으로 바로 실패)
+        extra: chat.completions.create에 그대로 전달할 추가 인자
+
+    Yields:
+        응답 텍스트 조각
+    """
+    request = _stream_request(name, messages, model, temperature, max_tokens, **extra)
+    timer = METRICS.start(name, request["model"])
+    # 재시도와 429 처리는 제공자/모델별 공유 리미터가 담당합니다 (rate_limit.py)
+    client = get_client(name).with_options(max_retries=0)
+
+    def send():
+        timer.started = time.perf_counter()  # 리미터 대기 시간은 TTFT에서 제외
+        return client.chat.completions.create(**request)
+
+    error = None
+    try:
+        with get_limiter(name, request["model"]).request(
+                send, estimate_tokens(messages, max_tokens), max_retries=retries) as response:
+            try:
+                for chunk in response:
+                    if chunk.usage is not None:
+                        timer.on_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    # 첫 청크의 빈 content("", role만 있음)는 토큰이 아니므로 TTFT에 넣지 않음
+                    if content:
+                        timer.on_content()
+                        yield content
+            finally:
+                # 중간에 멈추면 HTTP 스트림을 닫아 커넥션을 풀에 돌려줍니다
+                response.close()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        timer.finish(error)
+
+
+async def astream_chat(name, messages, model=None, temperature=0.7, max_tokens=1000, retries=4,
+                       **extra):
+    """stream_chat()의 asyncio 버전 (AsyncOpenAI 사용)"""
+    request = _stream_request(name, messages, model, temperature, max_tokens, **extra)
+    timer = METRICS.start(name, request["model"])
+    client = get_async_client(name).with_options(max_retries=0)
+
+    def send():
+        timer.started = time.perf_counter()
+        return client.chat.completions.create(**request)
+
+    error = None
+    try:
+        async with get_limiter(name, request["model"]).arequest(
+                send, estimate_tokens(messages, max_tokens), max_retries=retries) as response:
+            try:
+                async for chunk in response:
+                    if chunk.usage is not None:
+                        timer.on_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    # 첫 청크의 빈 content("", role만 있음)는 토큰이 아니므로 TTFT에 넣지 않음
+                    if content:
+                        timer.on_content()
+                        yield content
+            finally:
+                await response.close()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        timer.finish(error)
+
+
+def run_chat_loop(name, system_prompt, model=None, temperature=0.7, max_tokens=1000,
+                  assistant_label="공감AI", history_budget=8000, sinks=None, hedge=None,
+                  cache=None, stream_fn=None, tier=None, session_id=None, session_dir="sessions",
+                  **extra):
+    """
+    콘솔 대화 루프 ('quit' 입력 시 종료)
+
+    Args:
+        name: 제공자 이름
+        system_prompt: 시스템 프롬프트
+        model: 사용할 모델 (None이면 제공자 기본 모델)
+        temperature: 샘플링 온도
+        max_tokens: 최대 생성 토큰 수
+        assistant_label: 응답 앞에 출력할 이름
+        history_budget: 매 턴 전송할 히스토리의 최대 토큰 수 (None이면 전체 전송)
+        sinks: 응답을 보낼 StreamSink 리스트 (None이면 터미널만)
+        hedge: HedgeTarget 리스트. 주면 name/model 대신 여러 제공자에 헤징 요청 (hedge.py 참고)
+        cache: ResponseCache. 주면 같은(또는 비슷한) 턴은 API 호출 없이 캐시된 답변을 재생
+        stream_fn: stream_chat 대신 사용할 함수 (messages, model, temperature, max_tokens, **extra)
+            반환값에 stats 속성이 있으면 턴이 끝날 때 출력 (예: ollama_local.OllamaRuntime.stream_chat)
+        tier: 품질 등급 ("small", "medium", "large"). 주면 model 대신 모델 카탈로그의 측정 결과에서
+            이 제공자의 해당 등급 이상 가장 빠른 모델을 사용 (model_catalog.py 참고)
+        session_id: 주면 대화를 session_dir에 기록하고, 같은 id로 다시 실행하면 이어서 대화
+            (session_store.py 참고)
+        session_dir: 세션 저장 디렉토리
+        extra: chat.completions.create에 그대로 전달할 추가 인자
+    """
+    # 사용자가 첫 입력을 하는 동안 커넥션을 미리 열어 둡니다
+    if tier is not None:
+        from model_catalog import ModelCatalog  # model_catalog.py가 이 모듈을 import 하므로 지연 import
+        choice = ModelCatalog().choose_model(tier, providers=[name])
+        if choice is not None:
+            model = choice[1]
+            print(f"[모델 카탈로그] {tier} 등급 이상 가장 빠른 모델: {model}")
+        else:
+            print(f"[모델 카탈로그] {tier} 등급 측정 결과가 없어 {model or get_provider(name).default_model} 사용")
+
+    if stream_fn is None:
+        for provider_name in {target.provider for target in hedge} if hedge else [name]:
+            warmup(provider_name)
+
+    # 전체 대화는 보관하고, API에는 토큰 예산 안의 최근 턴만 보냅니다
+    store = None
+    if session_id is not None:
+        from session_store import SessionStore
+        store = SessionStore(session_dir)
+    history = ChatHistory(system_prompt, budget=history_budget, store=store, session_id=session_id)
+    if history.resumed:
+        print(f"[세션] '{session_id}' 대화 {history.resumed}개 메시지를 이어갑니다. "
+              f"(최근 {len(history.messages) - 1}개 로드)")
+
+    # 응답 조각은 모아서 30ms 단위로 출력합니다
+    buffer = StreamBuffer(sinks or [TerminalSink()])
+
+    print("채팅을 시작합니다. 'quit'를 입력하면 종료됩니다.\n")
+
+    try:
+        while True:
+            # 사용자 입력 받기
+            user_input = input("사용자: ")
+
+            # 'quit' 입력 시 루프 종료
+            if user_input.lower() == 'quit':
+                print("대화를 종료합니다.")
+                break
+
+            # 사용자 메시지 추가
+            turn_start = len(history.messages)
+            history.add_user(user_input)
+            messages, report = history.window()
+            if report.trimmed_messages:
+                print(f"[히스토리] {report}")
+
+            # 응답 스트리밍 출력
+            buffer.broadcast(f"{assistant_label}: ")
+            if stream_fn is not None:
+                chunks = stream_fn(messages, model, temperature, max_tokens, **extra)
+            elif hedge:
+                from hedge import HedgedStream  # hedge.py가 이 모듈을 import 하므로 지연 import
+                chunks = HedgedStream(hedge, messages, temperature, max_tokens, **extra)
+            else:
+                chunks = stream_chat(name, messages, model, temperature, max_tokens, **extra)
+            source = chunks
+            if cache is not None:
+                cache_model = repr(hedge) if hedge else (model or get_provider(name).default_model)
+                chunks = cache.wrap(messages, cache_model, temperature, chunks)
+            try:
+                for content in chunks:
+                    buffer.write(content)
+            except Exception as e:
+                # 제공자 장애(라우터의 모든 엔드포인트 실패 등)로 대화를 끝내지 않고,
+                # 답을 못 받은 사용자 메시지는 히스토리에서 되돌린 뒤 다음 입력을 받습니다
+                buffer.broadcast("\n")
+                print(f"[오류] 응답을 받지 못했습니다: {type(e).__name__}: {e}\n")
+                history.truncate(turn_start)
+                buffer.reset()
+                continue
+
+            buffer.broadcast("\n\n")  # 줄바꿈
+            stats = getattr(source, "stats", None)
+            if stats is not None:
+                print(f"[{name}] {stats}\n")
+
+            # 어시스턴트 응답을 메시지 히스토리에 추가
+            history.add_assistant(buffer.text())
+            buffer.reset()
+    finally:
+        buffer.close()
+        if store is not None:
+            store.close()
+        close_clients()
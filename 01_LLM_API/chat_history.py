@@ -0,0 +1,151 @@
+"""
+토큰 예산 기반 대화 히스토리 관리
+
+매 턴마다 전체 messages를 다시 보내면 프롬프트 길이와 지연 시간이 대화 길이에 비례해 늘어납니다.
+ChatHistory는 전체 대화는 보관하되, API에는 다음 창(window)만 보냅니다.
+  - 시스템 프롬프트는 항상 포함
+  - 최근 턴부터 거꾸로 채워서 토큰 예산(budget) 안에 들어가는 만큼만 포함
+  - 메시지별 토큰 수는 한 번만 계산해서 캐시
+
+세션 저장소(session_store.SessionStore)를 넘기면 메시지를 디스크에 함께 기록하고,
+같은 session_id로 다시 만들 때 예산 안의 최근 메시지만 읽어서 대화를 이어갑니다.
+
+토큰 수 계산:
+  tiktoken(프로젝트 의존성)의 실제 토크나이저(o200k_base)를 사용하고,
+  tiktoken이 없거나 인코딩 파일을 받을 수 없으면 UTF-8 바이트 수 기반 근사치를 사용합니다.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # 미설치이거나, 오프라인이라 인코딩 파일을 내려받지 못한 경우 근사치 사용
+    _ENCODING = None
+
+# 메시지마다 붙는 role/구분자 토큰 (OpenAI chat 포맷 기준 근사치)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(text):
+    """텍스트의 토큰 수 (결과는 캐시됨)"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # 근사치: 영어는 약 4바이트, 한국어는 음절(3바이트)당 약 1토큰
+    return (len(text.encode("utf-8")) + 2) // 3
+
+
+def count_message_tokens(message):
+    """메시지 하나의 토큰 수 (role/구분자 오버헤드 포함)"""
+    return count_text_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class TrimReport:
+    """한 턴에서 창 밖으로 제외된 히스토리 정보"""
+    sent_messages: int
+    sent_tokens: int
+    trimmed_messages: int
+    trimmed_tokens: int
+
+    def __str__(self):
+        return (f"전송 {self.sent_messages}개 메시지/{self.sent_tokens}토큰, "
+                f"제외 {self.trimmed_messages}개 메시지/{self.trimmed_tokens}토큰")
+
+
+class ChatHistory:
+    """
+    시스템 프롬프트 + 최근 턴을 토큰 예산 안에서 유지하는 대화 히스토리
+
+    Args:
+        system_prompt: 시스템 프롬프트 (항상 전송)
+        budget: API에 보낼 최대 토큰 수 (None이면 제한 없음)
+        store: 메시지를 기록할 SessionStore (None이면 메모리에만 보관)
+        session_id: store에서 사용할 세션 id
+    """
+
+    def __init__(self, system_prompt, budget=None, store=None, session_id=None):
+        self.budget = budget
+        self.messages = []
+        self._token_counts = []
+        self.store = store
+        self.session_id = session_id
+        # 저장소에는 있지만 메모리로 읽지 않은 앞쪽 메시지 수 (시스템 프롬프트 제외)
+        self.skipped = 0
+        # 저장소에서 이어받은 메시지 수 (시스템 프롬프트 제외)
+        self.resumed = 0
+        system = {"role": "system", "content": system_prompt}
+        if store is not None and store.length(session_id):
+            messages, self.skipped = store.load_recent(session_id, budget, count_message_tokens)
+            # 시스템 프롬프트는 저장된 값 대신 현재 값을 사용합니다
+            for message in [system] + messages[1:]:
+                self._remember(message)
+            self.resumed = self.skipped + len(messages) - 1
+        else:
+            self.append(system)
+
+    def _remember(self, message):
+        self.messages.append(message)
+        self._token_counts.append(count_message_tokens(message))
+
+    def append(self, message):
+        self._remember(message)
+        if self.store is not None:
+            self.store.append(self.session_id, message)
+
+    def add_user(self, content):
+        self.append({"role": "user", "content": content})
+
+    def add_assistant(self, content):
+        self.append({"role": "assistant", "content": content})
+
+    def truncate(self, length):
+        """메시지를 앞에서부터 length개만 남깁니다 (실패한 턴 되돌리기용, 시스템 프롬프트는 유지)"""
+        length = max(1, length)
+        del self.messages[length:]
+        del self._token_counts[length:]
+        if self.store is not None:
+            self.store.truncate(self.session_id, self.skipped + length)
+
+    @property
+    def total_tokens(self):
+        return sum(self._token_counts)
+
+    def window(self):
+        """
+        API에 보낼 메시지 창을 계산합니다.
+
+        가장 최근 메시지는 예산을 넘더라도 항상 포함하고,
+        창이 assistant 메시지로 시작하지 않도록 턴 경계에서 자릅니다.
+
+        Returns:
+            (messages, TrimReport)
+        """
+        system, system_tokens = self.messages[0], self._token_counts[0]
+        history = self.messages[1:]
+        counts = self._token_counts[1:]
+
+        start = len(history)
+        used = system_tokens
+        while start > 0:
+            cost = counts[start - 1]
+            if self.budget is not None and used + cost > self.budget and start < len(history):
+                break
+            used += cost
+            start -= 1
+
+        # 잘린 턴의 assistant 응답만 남지 않도록 user 메시지부터 시작
+        while start < len(history) - 1 and history[start]["role"] == "assistant":
+            used -= counts[start]
+            start += 1
+
+        report = TrimReport(
+            sent_messages=len(history) - start + 1,
+            sent_tokens=used,
+            trimmed_messages=start,
+            trimmed_tokens=sum(counts[:start]),
+        )
+        return [system] + history[start:], report
@@ -0,0 +1,204 @@
+"""
+스트리밍 지연 시간 지표 (TTFT, 토큰 간 간격, tokens/s)
+
+chat_engine의 스트리밍 루프(`for chunk in response`)에서 턴마다 다음을 기록합니다.
+  - TTFT: 요청을 보낸 시점부터 첫 토큰까지 걸린 시간
+  - 토큰 간 간격: 연속한 응답 조각 사이의 시간
+  - tokens/s: 첫 토큰 이후 생성 속도 (usage의 completion_tokens 기준, 없으면 조각 수)
+  - 프롬프트/생성 토큰 수: stream_options={"include_usage": True}로 받은 usage
+
+값은 제공자/모델별 히스토그램으로 모아서
+Prometheus 텍스트 형식(prometheus_text)과 JSON 스냅샷(snapshot, p50/p95/p99 포함)으로 내보냅니다.
+chat_server.py는 /metrics, /metrics.json 엔드포인트로 제공합니다.
+
+사용 예:
+  from chat_metrics import METRICS
+  print(json.dumps(METRICS.snapshot(), indent=2))
+"""
+
+import bisect
+import threading
+import time
+
+TTFT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+GAP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+TPS_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """고정 구간 히스토그램 (메모리 사용량이 샘플 수와 무관)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """구간 안에서 선형 보간한 분위수 (Prometheus histogram_quantile과 같은 방식)"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # +Inf 구간은 마지막 경계값으로
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _ModelMetrics:
+    def __init__(self):
+        self.ttft = Histogram(TTFT_BUCKETS)
+        self.inter_token = Histogram(GAP_BUCKETS)
+        self.tokens_per_second = Histogram(TPS_BUCKETS)
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class StreamTimer:
+    """스트리밍 요청 하나의 시간 측정기 (ChatMetrics.start()로 생성)"""
+
+    def __init__(self, metrics, provider, model):
+        self.metrics = metrics
+        self.provider = provider
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.last_token = None
+        self.pieces = 0
+        self.usage = None
+        self._gaps = []
+        self._finished = False
+
+    def on_content(self):
+        """응답 텍스트 조각을 받을 때마다 호출"""
+        now = time.perf_counter()
+        if self.first_token is None:
+            self.first_token = now
+        else:
+            self._gaps.append(now - self.last_token)
+        self.last_token = now
+        self.pieces += 1
+
+    def on_usage(self, usage):
+        """마지막 usage 청크를 받으면 호출"""
+        self.usage = usage
+
+    def finish(self, error=None):
+        """스트림이 끝나면 (또는 실패하면) 한 번 호출"""
+        if self._finished:
+            return
+        self._finished = True
+        self.metrics._record(self, error)
+
+
+class ChatMetrics:
+    """제공자/모델별 스트리밍 지표 저장소"""
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def start(self, provider, model):
+        return StreamTimer(self, provider, model)
+
+    def _record(self, timer, error):
+        with self._lock:
+            m = self._models.setdefault((timer.provider, timer.model), _ModelMetrics())
+            m.requests += 1
+            if error is not None:
+                m.errors += 1
+            if timer.first_token is not None:
+                m.ttft.observe(timer.first_token - timer.started)
+                for gap in timer._gaps:
+                    m.inter_token.observe(gap)
+            completion_tokens = timer.pieces
+            if timer.usage is not None:
+                m.prompt_tokens += timer.usage.prompt_tokens or 0
+                completion_tokens = timer.usage.completion_tokens or timer.pieces
+            m.completion_tokens += completion_tokens
+            if timer.pieces > 1 and timer.last_token > timer.first_token:
+                m.tokens_per_second.observe(
+                    (completion_tokens - 1) / (timer.last_token - timer.first_token))
+
+    def reset(self):
+        with self._lock:
+            self._models.clear()
+
+    def snapshot(self):
+        """JSON으로 직렬화할 수 있는 제공자/모델별 요약"""
+        with self._lock:
+            return {
+                f"{provider}/{model}": {
+                    "requests": m.requests,
+                    "errors": m.errors,
+                    "prompt_tokens": m.prompt_tokens,
+                    "completion_tokens": m.completion_tokens,
+                    "ttft_seconds": m.ttft.summary(),
+                    "inter_token_seconds": m.inter_token.summary(),
+                    "tokens_per_second": m.tokens_per_second.summary(),
+                }
+                for (provider, model), m in sorted(self._models.items())
+            }
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self._lock:
+            items = sorted(self._models.items())
+
+            def counter(name, help_text, attr):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (provider, model), m in items:
+                    lines.append(f'{name}{{provider="{provider}",model="{model}"}} {getattr(m, attr)}')
+
+            def histogram(name, help_text, attr):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (provider, model), m in items:
+                    h = getattr(m, attr)
+                    labels = f'provider="{provider}",model="{model}"'
+                    cumulative = 0
+                    for bound, bucket_count in zip(h.buckets, h.counts):
+                        cumulative += bucket_count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {h.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+            counter("chat_requests_total", "Streaming chat requests.", "requests")
+            counter("chat_errors_total", "Streaming chat requests that failed.", "errors")
+            counter("chat_prompt_tokens_total", "Prompt tokens reported by usage.", "prompt_tokens")
+            counter("chat_completion_tokens_total", "Completion tokens (usage or chunk count).",
+                    "completion_tokens")
+            histogram("chat_ttft_seconds", "Time from request sent to first token.", "ttft")
+            histogram("chat_inter_token_seconds", "Gap between consecutive stream chunks.", "inter_token")
+            histogram("chat_tokens_per_second", "Generation speed after the first token.",
+                      "tokens_per_second")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체에서 공유하는 지표 저장소
+METRICS = ChatMetrics()
@@ -0,0 +1,394 @@
+"""
+asyncio 멀티 세션 채팅 서버 (OpenAI 호환 SSE 엔드포인트)
+
+input() 대화 루프는 프로세스 하나가 사용자 한 명만 처리합니다.
+이 서버는 하나의 이벤트 루프에서 여러 세션을 동시에 처리하고,
+응답 토큰을 Server-Sent Events(SSE)로 스트리밍합니다.
+
+  - 업스트림 호출은 chat_engine의 AsyncOpenAI 클라이언트(제공자별 커넥션 풀)를 사용
+  - X-Session-Id 헤더(또는 body의 session_id)로 세션별 messages를 서버에 보관
+    (ChatHistory로 토큰 예산 안의 최근 턴만 전송)
+  - --session-dir을 주면 세션을 SessionStore에 기록합니다. 메모리에서 만료된 세션이나
+    서버를 다시 시작한 뒤의 세션도 최근 턴만 디스크에서 읽어서 이어갑니다.
+  - 느린 클라이언트는 writer.drain()으로 역압(backpressure)을 걸고,
+    drain_timeout 동안 읽지 않으면 업스트림 스트림까지 끊습니다.
+  - 동시에 열 수 있는 업스트림 스트림 수는 max_streams로 제한
+  - --cache를 주면 같은 요청은 업스트림 호출 없이 ResponseCache의 답변을 재생합니다.
+    (--semantic-cache면 마지막 질문이 비슷한 경우도, response_cache.py 참고)
+
+엔드포인트:
+  POST   /v1/chat/completions   OpenAI 호환 (stream=true면 SSE)
+  GET    /v1/models             등록된 제공자의 기본 모델 목록
+  DELETE /v1/sessions/{id}      세션 삭제 (저장소의 기록도 삭제)
+  GET    /health                상태 확인
+  GET    /metrics               TTFT/토큰 간격/tokens/s 히스토그램 (Prometheus 텍스트)
+  GET    /metrics.json          같은 지표의 JSON 스냅샷 (p50/p95/p99)
+
+실행:
+  uv run python 01_LLM_API/chat_server.py --provider cerebras --port 8000
+
+  curl -N http://localhost:8000/v1/chat/completions \\
+    -H "Content-Type: application/json" -H "X-Session-Id: alice" \\
+    -d '{"messages": [{"role": "user", "content": "안녕"}], "stream": true}'
+
+로컬 스텁 서버에 붙여서 테스트하려면 --base-url로 제공자 주소를 바꿉니다.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import json
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+
+from chat_engine import PROVIDERS, astream_chat, close_async_clients, get_provider, register_provider
+from chat_history import ChatHistory
+from chat_metrics import METRICS
+from http_util import HTTPError, error_body, parse_json, read_request, response_head, send_json
+from rate_limit import configure_limits, get_limits
+from response_cache import ResponseCache, replay
+from session_store import SessionStore
+
+DEFAULT_SYSTEM_PROMPT = "역할:너는 공감을 잘해주는 친구. 사용자의 말을 잘 들어주고 기분 파악도 잘하고, 조언도 잘해줘. 대답은 한국어로 해."
+
+@dataclasses.dataclass
+class Session:
+    history: ChatHistory
+    lock: asyncio.Lock = dataclasses.field(default_factory=asyncio.Lock)
+    last_used: float = dataclasses.field(default_factory=time.monotonic)
+
+
+class ChatServer:
+    """
+    여러 채팅 세션을 처리하는 asyncio HTTP 서버
+
+    Args:
+        provider: 기본 제공자 이름 (요청 body의 provider로 바꿀 수 있음)
+        model: 기본 모델 (None이면 제공자 기본 모델)
+        system_prompt: 새 세션의 시스템 프롬프트
+        history_budget: 세션별로 전송할 히스토리 토큰 예산
+        max_streams: 동시에 열 수 있는 업스트림 스트림 수 (제공자별 리미터의 동시성 한도도 이 값으로 설정)
+        max_sessions: 보관할 최대 세션 수 (넘으면 가장 오래 안 쓴 세션부터 삭제)
+        session_ttl: 이 시간(초) 동안 사용하지 않은 세션은 삭제
+        drain_timeout: 클라이언트가 이 시간(초) 동안 읽지 않으면 스트림 중단
+        write_buffer_high: 소켓 쓰기 버퍼 상한 (넘으면 drain에서 대기)
+        store: 세션을 기록할 SessionStore (None이면 메모리에만 보관)
+        cache: ResponseCache (주면 같은/비슷한 요청은 업스트림 호출 없이 캐시된 답변으로 응답)
+    """
+
+    def __init__(self, provider="openai", model=None, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                 history_budget=8000, max_streams=256, max_sessions=10000,
+                 session_ttl=3600.0, drain_timeout=30.0, write_buffer_high=64 * 1024, store=None, cache=None):
+        get_provider(provider)  # 알 수 없는 제공자면 바로 오류
+        self.provider = provider
+        self.model = model
+        self.system_prompt = system_prompt
+        self.history_budget = history_budget
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.drain_timeout = drain_timeout
+        self.write_buffer_high = write_buffer_high
+        self.store = store
+        self.cache = cache
+        self.sessions = OrderedDict()
+        self.active_streams = 0
+        self._stream_slots = asyncio.Semaphore(max_streams)
+        # 업스트림 호출은 제공자별 RateLimiter를 거치므로 기본 동시성(8)이 max_streams를 막지 않게 맞춤
+        # (rpm/tpm 등 이미 설정한 한도는 유지, 429를 받으면 AIMD로 줄어듦)
+        for name in PROVIDERS:
+            limits = get_limits(name)
+            configure_limits(name, **dataclasses.asdict(dataclasses.replace(
+                limits, initial_concurrency=max_streams, max_concurrency=max_streams)))
+
+    # ------------------------------------------------------------
+    # 세션 관리
+    # ------------------------------------------------------------
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = Session(ChatHistory(self.system_prompt, budget=self.history_budget,
+                                          store=self.store, session_id=session_id))
+            self.sessions[session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl))
+            deadline = time.monotonic() - self.session_ttl
+            expired = [sid for sid, s in self.sessions.items()
+                       if s.last_used < deadline and not s.lock.locked()]
+            for sid in expired:
+                del self.sessions[sid]
+
+    # ------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_high)
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            await self.dispatch(writer, *request)
+        except HTTPError as e:
+            await send_json(writer, e.status, error_body(e.message, e.error_type), keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except Exception:
+            # 처리하지 못한 예외도 연결 태스크 밖으로 내보내지 않고 500으로 응답
+            traceback.print_exc()
+            with contextlib.suppress(Exception):
+                await send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                error_body("서버 내부 오류입니다.", "server_error"), keep_alive=False)
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def dispatch(self, writer, method, path, headers, body):
+        if path == "/health" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, {
+                "status": "ok",
+                "sessions": len(self.sessions),
+                "active_streams": self.active_streams,
+                "cache": dict(self.cache.stats, entries=len(self.cache)) if self.cache is not None else None,
+            }, keep_alive=False)
+        elif path == "/metrics" and method == "GET":
+            body = METRICS.prometheus_text().encode("utf-8")
+            writer.write(response_head(HTTPStatus.OK, "text/plain; version=0.0.4; charset=utf-8",
+                                       content_length=len(body), keep_alive=False))
+            writer.write(body)
+            await writer.drain()
+        elif path == "/metrics.json" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, METRICS.snapshot(), keep_alive=False)
+        elif path == "/v1/models" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, {
+                "object": "list",
+                "data": [{"id": p.default_model, "object": "model", "owned_by": p.name}
+                         for p in PROVIDERS.values()],
+            }, keep_alive=False)
+        elif path.startswith("/v1/sessions/") and method == "DELETE":
+            session_id = path[len("/v1/sessions/"):]
+            removed = self.sessions.pop(session_id, None) is not None
+            if self.store is not None and self.store.exists(session_id):
+                self.store.delete(session_id)
+                removed = True
+            await send_json(writer, HTTPStatus.OK, {"deleted": removed}, keep_alive=False)
+        elif path == "/v1/chat/completions" and method == "POST":
+            await self.chat_completions(writer, headers, body)
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"{method} {path} 경로가 없습니다.")
+
+    async def chat_completions(self, writer, headers, body):
+        request = parse_json(body)
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "요청 본문은 JSON 객체여야 합니다.")
+        new_messages = validate_messages(request.get("messages"))
+
+        provider = request.get("provider", self.provider)
+        if provider not in PROVIDERS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"알 수 없는 제공자: {provider}")
+        model = request.get("model") or self.model or PROVIDERS[provider].default_model
+        options = {
+            "temperature": request.get("temperature", 0.7),
+            "max_tokens": request.get("max_completion_tokens") or request.get("max_tokens") or 1000,
+        }
+        stream = bool(request.get("stream", False))
+
+        session_id = headers.get("x-session-id") or request.get("session_id")
+        if session_id is None:
+            # 세션이 없으면 OpenAI API처럼 받은 messages를 그대로 전달
+            await self._complete(writer, provider, model, new_messages, options, stream)
+            return
+
+        # 같은 세션의 턴은 순서대로 처리합니다
+        session = self.get_session(session_id)
+        async with session.lock:
+            checkpoint = len(session.history.messages)
+            for message in new_messages:
+                if message.get("role") != "system":
+                    session.history.append(message)
+            messages, _ = session.history.window()
+            answer = None
+            try:
+                answer = await self._complete(writer, provider, model, messages, options, stream)
+            finally:
+                if answer is None:
+                    # 실패하거나 클라이언트가 끊기면 이번 턴은 기록하지 않습니다
+                    session.history.truncate(checkpoint)
+                else:
+                    session.history.add_assistant(answer)
+                session.last_used = time.monotonic()
+
+    async def _complete(self, writer, provider, model, messages, options, stream):
+        """업스트림(또는 캐시) 응답을 클라이언트로 전달하고, 성공하면 전체 응답 텍스트를 반환"""
+        cache_args = (messages, f"{provider}/{model}", options["temperature"])
+        if self.cache is not None:
+            # 의미 유사도 조회는 임베딩 모델을 호출하므로 이벤트 루프를 막지 않도록 스레드에서
+            cached = await asyncio.to_thread(self.cache.get, *cache_args)
+            if cached is not None:
+                return await self._respond(writer, _replay(cached), model, stream)
+
+        async with self._stream_slots:
+            self.active_streams += 1
+            try:
+                chunks = astream_chat(provider, messages, model, **options)
+                async with contextlib.aclosing(chunks):
+                    answer = await self._respond(writer, chunks, model, stream)
+            finally:
+                self.active_streams -= 1
+
+        if answer and self.cache is not None:
+            await asyncio.to_thread(self.cache.put, *cache_args, answer)
+        return answer
+
+    async def _respond(self, writer, chunks, model, stream):
+        """응답 조각을 SSE 또는 JSON 한 번으로 보내고 전체 응답 텍스트를 반환 (끊기면 None)"""
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if stream:
+            return await self._relay_sse(writer, chunks, completion_id, created, model)
+        try:
+            parts = [content async for content in chunks]
+        except Exception as e:
+            raise HTTPError(HTTPStatus.BAD_GATEWAY, f"업스트림 오류: {e}", "upstream_error") from None
+
+        answer = "".join(parts)
+        await send_json(writer, HTTPStatus.OK, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+        }, keep_alive=False)
+        return answer
+
+    async def _relay_sse(self, writer, chunks, completion_id, created, model):
+        def event(delta, finish_reason=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return b"data: " + json.dumps(payload, ensure_ascii=False).encode() + b"\n\n"
+
+        # 첫 토큰(또는 오류)을 받은 뒤에 헤더를 보내야 업스트림 오류를 상태 코드로 알릴 수 있습니다
+        try:
+            first = await anext(chunks, None)
+        except Exception as e:
+            raise HTTPError(HTTPStatus.BAD_GATEWAY, f"업스트림 오류: {e}", "upstream_error") from None
+
+        writer.write(response_head(HTTPStatus.OK, "text/event-stream", {"Cache-Control": "no-cache"},
+                                   keep_alive=False))
+        writer.write(event({"role": "assistant", "content": ""}))
+        parts = []
+        try:
+            if first is not None:
+                parts.append(first)
+                writer.write(event({"content": first}))
+                await self._drain(writer)
+                async for content in chunks:
+                    parts.append(content)
+                    writer.write(event({"content": content}))
+                    # 클라이언트가 느리면 여기서 대기 → 업스트림 읽기도 멈춤
+                    await self._drain(writer)
+        except (ConnectionError, asyncio.TimeoutError):
+            return None
+        except Exception as e:
+            writer.write(b"data: " + json.dumps(error_body(f"업스트림 오류: {e}", "upstream_error"),
+                                                ensure_ascii=False).encode() + b"\n\n")
+            writer.write(b"data: [DONE]\n\n")
+            return None
+
+        writer.write(event({}, "stop"))
+        writer.write(b"data: [DONE]\n\n")
+        await self._drain(writer)
+        return "".join(parts)
+
+    async def _drain(self, writer):
+        await asyncio.wait_for(writer.drain(), self.drain_timeout)
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        expire_task = asyncio.create_task(self._expire_sessions())
+        print(f"채팅 서버 시작: http://{host}:{port} (제공자: {self.provider})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            expire_task.cancel()
+            await close_async_clients()
+            if self.store is not None:
+                self.store.close()
+
+
+async def _replay(text):
+    """캐시된 답변을 업스트림 스트림과 같은 비동기 조각으로"""
+    for piece in replay(text):
+        yield piece
+
+
+def validate_messages(messages):
+    """messages가 role/content 문자열을 가진 dict의 비어 있지 않은 리스트인지 확인 (세션을 건드리기 전에 호출)"""
+    if not isinstance(messages, list) or not messages:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "messages는 비어 있지 않은 리스트여야 합니다.")
+    for i, message in enumerate(messages):
+        if not isinstance(message, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"messages[{i}]는 객체여야 합니다.")
+        if not isinstance(message.get("role"), str) or not isinstance(message.get("content"), str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"messages[{i}]의 role과 content는 문자열이어야 합니다.")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 SSE 멀티 세션 채팅 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--provider", default="openai", choices=sorted(PROVIDERS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--base-url", default=None, help="제공자 주소 변경 (로컬 스텁 서버 테스트용)")
+    parser.add_argument("--system-prompt", default=DEFAULT_SYSTEM_PROMPT)
+    parser.add_argument("--history-budget", type=int, default=8000)
+    parser.add_argument("--max-streams", type=int, default=256)
+    parser.add_argument("--session-dir", default=None, help="세션을 기록할 디렉토리 (없으면 메모리에만 보관)")
+    parser.add_argument("--cache", action="store_true", help="같은 요청은 응답 캐시에서 답변 (response_cache.py)")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="--cache + 마지막 질문이 비슷하면(BGE-M3 코사인 유사도) 캐시에서 답변")
+    args = parser.parse_args()
+
+    if args.base_url:
+        register_provider(dataclasses.replace(get_provider(args.provider), base_url=args.base_url))
+
+    server = ChatServer(
+        provider=args.provider,
+        model=args.model,
+        system_prompt=args.system_prompt,
+        history_budget=args.history_budget,
+        max_streams=args.max_streams,
+        store=SessionStore(args.session_dir) if args.session_dir else None,
+        cache=ResponseCache(semantic=True) if args.semantic_cache else ResponseCache() if args.cache else None,
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n서버를 종료합니다.")
+
+
+if __name__ == "__main__":
+    main()
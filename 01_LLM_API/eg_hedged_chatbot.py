@@ -0,0 +1,25 @@
+from chat_engine import run_chat_loop
+from hedge import HedgeTarget
+
+# 헤징 챗봇 예제
+# 같은 턴을 여러 제공자에 보내고, 가장 먼저 첫 토큰을 보낸 응답을 사용합니다.
+# - Cerebras를 먼저 보내고
+# - 400ms 안에 첫 토큰이 없으면 로컬 Ollama도 시작
+# - 800ms 안에도 없으면 OpenRouter까지 시작
+# 진 요청의 HTTP 스트림은 바로 닫힙니다. (hedge.py 참고)
+HEDGE_TARGETS = [
+    HedgeTarget("cerebras", "qwen-3-32b"),
+    HedgeTarget("ollama", "gpt-oss:20b", delay=0.4),
+    HedgeTarget("openrouter", "deepseek/deepseek-chat-v3.1:free", delay=0.8),
+]
+
+SYSTEM_PROMPT = "역할:너는 공감을 잘해주는 친구. 사용자의 말을 잘 들어주고 기분 파악도 잘하고, 조언도 잘해줘. 대답은 한국어로 해."
+
+if __name__ == "__main__":
+    run_chat_loop(
+        "cerebras",
+        SYSTEM_PROMPT,
+        temperature=0.7,
+        max_tokens=1000,
+        hedge=HEDGE_TARGETS,
+    )
@@ -0,0 +1,39 @@
+from chat_engine import run_chat_loop
+from router import Endpoint, Router
+
+# 라우터 챗봇 예제 (LiteLLM Router처럼 여러 제공자를 하나로 묶어 사용)
+# - 최근 TTFT가 가장 짧은 엔드포인트부터 시도하고
+# - 첫 토큰 전에 실패하거나 10초 안에 응답이 없으면 다음 엔드포인트로 넘어갑니다.
+# - 연속 3번 실패했거나 TTFT가 5초를 넘는 엔드포인트는 30초 동안 건너뜁니다.
+# 한 제공자가 장애여도 대화가 멈추지 않습니다. (router.py 참고)
+ROUTER = Router(
+    [
+        Endpoint("cerebras", "qwen-3-32b"),
+        Endpoint("openai", "gpt-4.1-mini"),
+        Endpoint("openrouter", "deepseek/deepseek-chat-v3.1:free"),
+        Endpoint("ollama", "gpt-oss:20b"),
+    ],
+    strategy="latency",
+    timeout=10.0,
+    failure_threshold=3,
+    cooldown=30.0,
+    slow_ttft=5.0,
+)
+
+SYSTEM_PROMPT = "역할:너는 공감을 잘해주는 친구. 사용자의 말을 잘 들어주고 기분 파악도 잘하고, 조언도 잘해줘. 대답은 한국어로 해."
+
+if __name__ == "__main__":
+    ROUTER.warmup()
+    run_chat_loop(
+        "router",
+        SYSTEM_PROMPT,
+        temperature=0.7,
+        max_tokens=1000,
+        stream_fn=ROUTER.stream_chat,
+    )
+
+    print("\n엔드포인트 상태:")
+    for status in ROUTER.status():
+        ttft = f"{status['ttft'] * 1000:.0f}ms" if status["ttft"] is not None else "-"
+        print(f"  {status['endpoint']}: {status['state']}, TTFT {ttft}, "
+              f"요청 {status['requests']}회 / 실패 {status['failures']}회")
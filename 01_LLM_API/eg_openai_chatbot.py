@@ -1,45 +1,13 @@
-from openai import OpenAI
+from chat_engine import run_chat_loop
 
-client = OpenAI()
+# 대화 루프 예제 (스트리밍/연결 관리는 chat_engine.py 참고)
+SYSTEM_PROMPT = "역할:너는 공감을 잘해주는 친구. 너의 나이는 18세이고, 귀여운 소녀야. 이름은 성현이야. 사용자의 말을 잘 들어주고 기분 파악도 잘하고, 조언도 잘해줘."
 
-# 대화 루프 예제
-messages = [
-    {"role": "system", "content": "역할:너는 공감을 잘해주는 친구. 너의 나이는 18세이고, 귀여운 소녀야. 이름은 성현이야. 사용자의 말을 잘 들어주고 기분 파악도 잘하고, 조언도 잘해줘."}
-]
-
-print("채팅을 시작합니다. 'quit'를 입력하면 종료됩니다.\n")
-
-while True:
-    # 사용자 입력 받기
-    user_input = input("사용자: ")
-    
-    # 'quit' 입력 시 루프 종료
-    if user_input.lower() == 'quit':
-        print("대화를 종료합니다.")
-        break
-    
-    # 사용자 메시지 추가
-    messages.append({"role": "user", "content": user_input})
-    
-    # 스트리밍 응답 받기
-    response = client.chat.completions.create(
+if __name__ == "__main__":
+    run_chat_loop(
+        "openai",
+        SYSTEM_PROMPT,
         model="gpt-4.1",
-        messages=messages,
         temperature=0.7,
-        max_completion_tokens=1000,
-        stream=True
+        max_tokens=1000,
     )
-    
-    # 응답 스트리밍 출력
-    print("공감AI: ", end="", flush=True)
-    full_response = ""
-    for chunk in response:
-        if chunk.choices[0].delta.content is not None:
-            content = chunk.choices[0].delta.content
-            print(content, end="", flush=True)
-            full_response += content
-    
-    print("\n")  # 줄바꿈
-    
-    # 어시스턴트 응답을 메시지 히스토리에 추가
-    messages.append({"role": "assistant", "content": full_response})  
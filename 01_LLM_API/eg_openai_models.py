@@ -1,9 +1,12 @@
-from openai import OpenAI
+from model_catalog import ModelCatalog
 
-client = OpenAI()
+# 모델 목록은 output/model_catalog.json에 하루 동안 캐시됩니다
+# 다른 제공자 조회, 캐시 갱신, 속도 측정은 model_catalog.py 참고:
+#   uv run python 01_LLM_API/model_catalog.py --providers cerebras ollama --bench
+catalog = ModelCatalog()
 
-models = client.models.list()
+models = catalog.list_models("openai")
 
 # print the model names
-for model in models.data:
-    print(model.id)
+for model_id in models:
+    print(model_id)
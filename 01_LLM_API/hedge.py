@@ -0,0 +1,221 @@
+"""
+여러 제공자에 같은 요청을 보내는 헤징(hedged request)
+
+제공자 큐가 가끔 밀리면 첫 토큰 지연(TTFT)의 꼬리(p99)가 길어집니다.
+HedgedStream은 같은 턴을 두 개 이상의 제공자에 보내고,
+가장 먼저 첫 토큰을 보낸 응답만 사용하고 나머지 HTTP 스트림은 닫습니다.
+
+각 대상에는 지연(delay)을 줄 수 있습니다.
+  예: Cerebras를 먼저 보내고, 400ms 안에 토큰이 없을 때만 Ollama를 추가로 시작
+먼저 시작한 대상이 실패하면 대기 중인 다음 대상을 지연 없이 바로 시작합니다.
+
+사용 예:
+  targets = [
+      HedgeTarget("cerebras", "qwen-3-32b"),
+      HedgeTarget("ollama", "gpt-oss:20b", delay=0.4),
+  ]
+  stream = HedgedStream(targets, messages)
+  for content in stream:
+      print(content, end="", flush=True)
+  print(stream.winner)
+
+각 대상의 요청은 stream_chat()처럼 제공자/모델별 공유 리미터(rate_limit.py)를 거치고
+TTFT/토큰 속도를 METRICS(chat_metrics.py)에 기록합니다.
+(재시도는 다른 대상이 대신하므로 리미터 재시도는 하지 않음)
+
+참고: 요청 헤더를 받기 전(create() 호출 중)에 진 대상은
+응답이 도착하는 즉시 닫힙니다. 동기 httpx 요청은 다른 스레드에서 중단할 수 없습니다.
+리미터 슬롯을 기다리는 중에 진 대상은 요청을 보내지 않습니다.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+from chat_engine import _stream_request, estimate_tokens, get_client
+from chat_metrics import METRICS
+from rate_limit import get_limiter
+
+_TOKEN, _DONE, _ERROR = "token", "done", "error"
+
+
+class _Cancelled(Exception):
+    """리미터 슬롯을 기다리는 동안 다른 대상이 이김"""
+
+
+@dataclass(frozen=True)
+class HedgeTarget:
+    """헤징 대상 (delay초 안에 앞선 대상들이 첫 토큰을 못 보내면 시작)"""
+    provider: str
+    model: str | None = None
+    delay: float = 0.0
+
+
+class _Attempt:
+    """대상 하나에 대한 스트리밍 요청 (별도 스레드에서 실행)"""
+
+    def __init__(self, index, target, request, estimated_tokens, events):
+        self.index = index
+        self.target = target
+        self.request = request
+        self.estimated_tokens = estimated_tokens
+        self.events = events
+        self.cancelled = threading.Event()
+        self.response = None
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self._run, name=f"hedge-{target.provider}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        """스트림을 닫습니다. 아직 응답 전이면 응답을 받는 즉시 닫습니다."""
+        with self._lock:
+            self.cancelled.set()
+            response = self.response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        provider, model = self.target.provider, self.request["model"]
+        # 다른 대상이 재시도 역할을 하므로 SDK 자체 재시도와 리미터 재시도는 끕니다
+        client = get_client(provider).with_options(max_retries=0)
+        timer = None
+
+        def send():
+            nonlocal timer
+            if self.cancelled.is_set():
+                raise _Cancelled()
+            # 실제로 보낸 요청만 기록하고, 리미터 대기 시간은 TTFT에서 제외
+            timer = METRICS.start(provider, model)
+            return client.chat.completions.create(**self.request)
+
+        error = None
+        try:
+            with get_limiter(provider, model).request(send, self.estimated_tokens, max_retries=0) as response:
+                with self._lock:
+                    self.response = response
+                    cancelled = self.cancelled.is_set()
+                if cancelled:
+                    return
+                for chunk in response:
+                    if self.cancelled.is_set():
+                        break
+                    if chunk.usage is not None:
+                        timer.on_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    # 첫 청크의 빈 content("", role만 있음)는 토큰이 아니므로 승자 판정에 쓰지 않음
+                    if content:
+                        timer.on_content()
+                        self.events.put((self.index, _TOKEN, content))
+            self.events.put((self.index, _DONE, None))
+        except Exception as e:
+            # 취소로 인해 스트림이 닫히면서 생긴 오류는 무시
+            if not self.cancelled.is_set():
+                error = e
+                self.events.put((self.index, _ERROR, e))
+        finally:
+            if self.response is not None:
+                self.response.close()
+            if timer is not None:
+                timer.finish(error)
+
+
+class HedgedStream:
+    """
+    여러 대상 중 가장 먼저 첫 토큰을 보낸 응답을 스트리밍하는 이터레이터
+
+    Args:
+        targets: HedgeTarget 리스트 (delay 순서대로 시작)
+        messages: 대화 메시지 리스트
+        temperature, max_tokens, extra: chat.completions.create 인자
+
+    Attributes:
+        winner: 사용된 HedgeTarget (첫 토큰 이후에 설정)
+        ttft: 첫 토큰까지 걸린 시간(초)
+    """
+
+    def __init__(self, targets, messages, temperature=0.7, max_tokens=1000, **extra):
+        if not targets:
+            raise ValueError("헤징 대상이 최소 하나 필요합니다.")
+        self.targets = sorted(targets, key=lambda t: t.delay)
+        self.messages = messages
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.extra = extra
+        self.winner = None
+        self.ttft = None
+
+    def __iter__(self):
+        events = queue.Queue()
+        estimated = estimate_tokens(self.messages, self.max_tokens)
+        attempts = [
+            _Attempt(i, target, _stream_request(target.provider, self.messages, target.model,
+                                                self.temperature, self.max_tokens, **self.extra),
+                     estimated, events)
+            for i, target in enumerate(self.targets)
+        ]
+        started = time.perf_counter()
+        next_index = 0    # 아직 시작하지 않은 첫 대상
+        running = 0       # 실행 중인 대상 수
+        winner = None
+        last_error = None
+
+        try:
+            while True:
+                # 지연 시간이 지난 대상 시작 (승자가 정해지면 더 시작하지 않음)
+                if winner is None:
+                    elapsed = time.perf_counter() - started
+                    while next_index < len(attempts) and (
+                            attempts[next_index].target.delay <= elapsed or running == 0):
+                        attempts[next_index].start()
+                        next_index += 1
+                        running += 1
+
+                timeout = None
+                if winner is None and next_index < len(attempts):
+                    timeout = max(0.0, attempts[next_index].target.delay
+                                  - (time.perf_counter() - started))
+                try:
+                    index, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+
+                if winner is None:
+                    if kind == _TOKEN:
+                        winner = attempts[index]
+                        self.winner = winner.target
+                        self.ttft = time.perf_counter() - started
+                        for attempt in attempts:
+                            if attempt is not winner:
+                                attempt.cancel()
+                        yield payload
+                    else:
+                        # 첫 토큰 전에 끝나거나 실패한 대상은 제외하고 다음 대상으로
+                        running -= 1
+                        if kind == _ERROR:
+                            last_error = payload
+                        if running == 0 and next_index == len(attempts):
+                            if last_error is not None:
+                                raise last_error
+                            return  # 모든 대상이 빈 응답으로 끝남
+                    continue
+
+                if index != winner.index:
+                    continue
+                if kind == _TOKEN:
+                    yield payload
+                elif kind == _DONE:
+                    return
+                else:
+                    raise payload
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
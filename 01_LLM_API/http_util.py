@@ -0,0 +1,96 @@
+"""
+asyncio 서버용 최소한의 HTTP/1.1 유틸리티
+
+chat_server.py, mock_server.py, 02_embedding/model_server.py가 같이 씁니다.
+표준 라이브러리만 import하므로 어느 서버에서 가져와도 추가 패키지를 불러오지 않습니다.
+
+  - read_request(): 요청 라인, 헤더, Content-Length 본문 읽기
+  - response_head(): 응답 헤더 (keep_alive=False면 Connection: close, chunked 전송 지원)
+  - send_json(): JSON 응답 한 번에 보내기
+  - HTTPError / error_body(): OpenAI 형식 오류 응답
+"""
+
+import json
+from http import HTTPStatus
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class HTTPError(Exception):
+    """클라이언트에 OpenAI 형식 오류로 돌려줄 예외"""
+
+    def __init__(self, status, message, error_type="invalid_request_error"):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.error_type = error_type
+
+
+def error_body(message, error_type="invalid_request_error"):
+    return {"error": {"message": message, "type": error_type}}
+
+
+def parse_json(body):
+    try:
+        return json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"JSON 파싱 오류: {e}") from None
+
+
+async def read_request(reader, max_body_bytes=MAX_BODY_BYTES):
+    """요청을 읽어서 (method, path, headers, body)를 반환합니다. 연결이 닫혔으면 None."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "잘못된 요청 라인입니다.") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length가 올바르지 않습니다.") from None
+    if length < 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length가 올바르지 않습니다.")
+    if length > max_body_bytes:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "요청 본문이 너무 큽니다.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def response_head(status, content_type, extra_headers=None, content_length=None, chunked=False,
+                  keep_alive=True):
+    status = HTTPStatus(status)
+    lines = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {content_type}",
+        "Connection: keep-alive" if keep_alive else "Connection: close",
+    ]
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    elif content_length is not None:
+        lines.append(f"Content-Length: {content_length}")
+    for name, value in (extra_headers or {}).items():
+        lines.append(f"{name}: {value}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def chunk(data):
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+async def send_json(writer, status, payload, extra_headers=None, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(response_head(status, "application/json; charset=utf-8", extra_headers,
+                               content_length=len(body), keep_alive=keep_alive))
+    writer.write(body)
+    await writer.drain()
@@ -0,0 +1,210 @@
+"""
+채팅 엔진 부하 측정 (목 서버 대상)
+
+mock_server.py에 chat_engine의 스트리밍 경로(astream_chat / stream_chat)로 동시에 요청을 보내고
+  - 처리량: 요청/s, 토큰(스트림 조각)/s
+  - 꼬리 지연: 클라이언트에서 잰 TTFT와 전체 응답 시간의 p50/p95/p99
+  - 클라이언트 오버헤드: 클라이언트 평균 - 서버 평균 (TTFT, 전체 응답 시간)
+  - 요청당 클라이언트 CPU 시간
+을 출력합니다. 서버 지연은 프로필로 고정되어 있으므로 숫자가 나빠지면 클라이언트 코드의 회귀입니다.
+
+--max-overhead-ms를 주면 TTFT 오버헤드가 그 값을 넘을 때 종료 코드 1로 끝납니다 (CI용).
+
+실행:
+  # 목 서버를 직접 띄우고 측정 (서버 지연 없음 → 클라이언트 오버헤드만)
+  uv run python 01_LLM_API/load_bench.py --spawn --profile instant --requests 2000 --concurrency 64
+
+  # 이미 떠 있는 목 서버에 동기 경로(stream_chat, 스레드)로 측정
+  uv run python 01_LLM_API/load_bench.py --url http://127.0.0.1:8100/v1 --mode sync
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from chat_engine import (Provider, astream_chat, close_async_clients, close_clients, register_provider,
+                         stream_chat)
+from mock_server import PROFILES
+from rate_limit import configure_limits
+
+PROMPT = [
+    {"role": "system", "content": "역할:너는 공감을 잘해주는 친구."},
+    {"role": "user", "content": "오늘 하루 어땠는지 들어줄래?"},
+]
+
+
+def percentile(sorted_values, q):
+    """정렬된 값의 분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadResult:
+    def __init__(self):
+        self.ttft = []
+        self.latency = []
+        self.pieces = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, ttft, latency, pieces):
+        with self._lock:
+            if ttft is not None:
+                self.ttft.append(ttft)
+            self.latency.append(latency)
+            self.pieces += pieces
+
+    def add_error(self):
+        with self._lock:
+            self.errors += 1
+
+
+async def run_async(result, requests, concurrency, max_tokens):
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            first = None
+            pieces = 0
+            try:
+                async for _content in astream_chat("mock", PROMPT, max_tokens=max_tokens):
+                    if first is None:
+                        first = time.perf_counter() - started
+                    pieces += 1
+            except Exception:
+                result.add_error()
+                continue
+            result.add(first, time.perf_counter() - started, pieces)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await close_async_clients()
+
+
+def run_sync(result, requests, concurrency, max_tokens):
+    def one(_):
+        started = time.perf_counter()
+        first = None
+        pieces = 0
+        try:
+            for _content in stream_chat("mock", PROMPT, max_tokens=max_tokens):
+                if first is None:
+                    first = time.perf_counter() - started
+                pieces += 1
+        except Exception:
+            result.add_error()
+            return
+        result.add(first, time.perf_counter() - started, pieces)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+    finally:
+        close_clients()
+
+
+def spawn_mock(port, profile):
+    """목 서버를 별도 프로세스로 띄우고 준비될 때까지 기다립니다 (클라이언트와 CPU를 나누지 않도록)."""
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).with_name("mock_server.py")),
+         "--port", str(port), "--profile", profile],
+        stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("목 서버가 시작되지 않았습니다.")
+
+
+def ms(seconds):
+    return f"{seconds * 1000:.1f}ms" if seconds is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목 서버 대상 채팅 엔진 부하 측정")
+    parser.add_argument("--url", default="http://127.0.0.1:8100/v1", help="목 서버 주소")
+    parser.add_argument("--spawn", action="store_true", help="목 서버를 직접 띄워서 측정")
+    parser.add_argument("--profile", default="instant", choices=sorted(PROFILES),
+                        help="사용할 목 서버 프로필 (model=mock-<프로필>)")
+    parser.add_argument("--mode", default="async", choices=["async", "sync"],
+                        help="async: astream_chat (서버 경로), sync: stream_chat + 스레드 (콘솔 경로)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--max-overhead-ms", type=float, default=None,
+                        help="TTFT 클라이언트 오버헤드 상한 (넘으면 종료 코드 1)")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url
+    if args.spawn:
+        port = httpx.URL(base_url).port or 8100
+        process = spawn_mock(port, args.profile)
+        base_url = f"http://127.0.0.1:{port}/v1"
+    server_url = base_url.rsplit("/v1", 1)[0]
+
+    register_provider(Provider("mock", base_url, "MOCK_API_KEY", f"mock-{args.profile}",
+                               max_tokens_param="max_tokens", http2=False, api_key="mock"))
+    # 리미터 기본 동시성(8)에 막히지 않도록 측정할 동시성으로 고정
+    configure_limits("mock", initial_concurrency=args.concurrency, max_concurrency=args.concurrency)
+
+    try:
+        httpx.post(f"{server_url}/mock/reset")
+        result = LoadResult()
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        if args.mode == "async":
+            asyncio.run(run_async(result, args.requests, args.concurrency, args.max_tokens))
+        else:
+            run_sync(result, args.requests, args.concurrency, args.max_tokens)
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        server = httpx.get(f"{server_url}/mock/stats").json()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    done = len(result.latency)
+    ttft = sorted(result.ttft)
+    latency = sorted(result.latency)
+    print("=" * 60)
+    print(f"{args.mode} / 프로필 {args.profile} / 동시성 {args.concurrency} / {args.requests}개 요청")
+    print("=" * 60)
+    print(f"완료 {done}, 오류 {result.errors} ({elapsed:.2f}s)")
+    print(f"처리량: {done / elapsed:.1f} 요청/s, {result.pieces / elapsed:.0f} 토큰/s")
+    print(f"TTFT:      p50 {ms(percentile(ttft, 0.50))}, p95 {ms(percentile(ttft, 0.95))}, "
+          f"p99 {ms(percentile(ttft, 0.99))}")
+    print(f"응답 시간: p50 {ms(percentile(latency, 0.50))}, p95 {ms(percentile(latency, 0.95))}, "
+          f"p99 {ms(percentile(latency, 0.99))}")
+    print(f"클라이언트 CPU: 요청당 {ms(cpu / max(1, done + result.errors))}")
+
+    overhead = None
+    if ttft and server["ttft_mean"] is not None:
+        overhead = sum(ttft) / len(ttft) - server["ttft_mean"]
+        print(f"클라이언트 오버헤드: TTFT {ms(overhead)}, "
+              f"응답 시간 {ms(sum(latency) / len(latency) - server['duration_mean'])} "
+              f"(클라이언트 평균 - 서버 평균)")
+
+    if args.max_overhead_ms is not None and (overhead is None or overhead * 1000 > args.max_overhead_ms):
+        print(f"TTFT 오버헤드가 {args.max_overhead_ms}ms를 넘었습니다.")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+로컬 OpenAI 호환 목(mock) 서버
+
+실제 API를 호출하지 않고 (비용 없이, 네트워크 없이) 채팅 엔진의 스트리밍 경로를 측정하기 위한 서버입니다.
+  - POST /v1/chat/completions  stream=true면 SSE로 토큰을 하나씩 보냄
+  - POST /v1/embeddings        텍스트 해시로 만든 결정적(deterministic) 단위 벡터
+  - GET  /v1/models            프로필별 모델 목록 (mock-<프로필>)
+  - GET  /mock/stats           서버 쪽에서 잰 TTFT/응답 시간 합계 (load_bench.py가 클라이언트 오버헤드 계산에 사용)
+  - POST /mock/reset           통계 초기화
+  - GET  /health
+
+지연 시간과 오류는 프로필(MockProfile)로 정합니다.
+  TTFT, 초당 토큰 수, 지터(±비율), 응답 토큰 수, 오류 비율/상태 코드/Retry-After, 스트림 중간 끊김 비율
+model을 "mock-<프로필>"로 보내면 요청마다 다른 프로필을 쓸 수 있습니다.
+
+HTTP/1.1 keep-alive와 chunked 전송을 지원하므로 클라이언트 커넥션 풀도 실제와 같이 재사용됩니다.
+
+실행:
+  uv run python 01_LLM_API/mock_server.py --port 8100 --profile openai
+
+  # 엔진을 목 서버에 붙여서 부하 측정
+  uv run python 01_LLM_API/load_bench.py --url http://127.0.0.1:8100/v1 --profile openai
+"""
+
+import argparse
+import array
+import asyncio
+import base64
+import contextlib
+import dataclasses
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from http import HTTPStatus
+
+from http_util import HTTPError, chunk, error_body, parse_json, read_request, response_head, send_json
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    """
+    목 서버의 응답 특성
+
+    Args:
+        ttft: 첫 토큰까지 지연(초)
+        tokens_per_second: 첫 토큰 이후 생성 속도 (0이면 지연 없이 한 번에)
+        jitter: 지연 시간에 곱할 무작위 비율 (0.2면 ±20%)
+        response_tokens: 응답 토큰 수 (요청의 max_tokens가 더 작으면 그 값)
+        error_rate: 요청을 오류로 응답할 비율
+        error_status: 오류 응답 상태 코드 (429, 500, 503 등)
+        retry_after: 오류 응답에 붙일 Retry-After(초)
+        disconnect_rate: 스트림 도중 연결을 끊을 비율
+        embedding_latency: 임베딩 요청 지연(초)
+        embedding_dim: 임베딩 차원 (요청에 dimensions가 있으면 그 값)
+    """
+    ttft: float = 0.2
+    tokens_per_second: float = 100.0
+    jitter: float = 0.1
+    response_tokens: int = 200
+    error_rate: float = 0.0
+    error_status: int = 500
+    retry_after: float | None = None
+    disconnect_rate: float = 0.0
+    embedding_latency: float = 0.05
+    embedding_dim: int = 1536
+
+
+PROFILES = {
+    # 클라이언트 오버헤드만 측정 (서버 지연 없음)
+    "instant": MockProfile(ttft=0.0, tokens_per_second=0, jitter=0.0, embedding_latency=0.0),
+    "openai": MockProfile(ttft=0.5, tokens_per_second=80, jitter=0.3),
+    "cerebras": MockProfile(ttft=0.15, tokens_per_second=1500, jitter=0.2),
+    "ollama": MockProfile(ttft=0.8, tokens_per_second=30, jitter=0.1),
+    # 429/끊김이 섞인 불안정한 제공자
+    "flaky": MockProfile(ttft=0.3, tokens_per_second=100, jitter=0.5, error_rate=0.1,
+                         error_status=429, retry_after=0.5, disconnect_rate=0.02),
+}
+
+VOCAB = ("오늘", "날씨가", "정말", "좋네요", "산책", "하기", "딱", "좋은", "날이에요", "기분이",
+         "어때요", "저는", "항상", "여기", "있어요", "천천히", "이야기해", "주세요")
+
+
+def jittered(seconds, jitter):
+    if seconds <= 0 or jitter <= 0:
+        return max(0.0, seconds)
+    return seconds * random.uniform(1.0 - jitter, 1.0 + jitter)
+
+
+def fake_embedding(text, dim):
+    """텍스트마다 항상 같은 단위 벡터"""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+class MockStats:
+    """서버 쪽에서 잰 요청 통계"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.completion_tokens = 0
+        self.ttft_count = 0
+        self.ttft_sum = 0.0
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.active = 0
+
+    def add_ttft(self, seconds):
+        self.ttft_count += 1
+        self.ttft_sum += seconds
+
+    def add_duration(self, seconds):
+        self.duration_count += 1
+        self.duration_sum += seconds
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "disconnects": self.disconnects,
+            "completion_tokens": self.completion_tokens,
+            "ttft_mean": self.ttft_sum / self.ttft_count if self.ttft_count else None,
+            "duration_mean": self.duration_sum / self.duration_count if self.duration_count else None,
+            "active": self.active,
+        }
+
+
+class MockServer:
+    """
+    OpenAI 호환 목 서버
+
+    Args:
+        profile: 기본 MockProfile (model이 mock-<프로필>이면 그 프로필 사용)
+        overrides: 기본 프로필과 이름 있는 프로필 모두에 덮어쓸 MockProfile 필드 (--ttft, --tokens 등)
+    """
+
+    def __init__(self, profile=PROFILES["openai"], overrides=None):
+        overrides = overrides or {}
+        self.profile = dataclasses.replace(profile, **overrides)
+        self.profiles = {name: dataclasses.replace(named, **overrides) for name, named in PROFILES.items()}
+        self.stats = MockStats()
+
+    def _profile_for(self, model):
+        if model and model.startswith("mock-"):
+            return self.profiles.get(model[len("mock-"):], self.profile)
+        return self.profile
+
+    # ------------------------------------------------------------
+    # HTTP (keep-alive)
+    # ------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    return
+                method, path, headers, body = request
+                try:
+                    await self.dispatch(writer, method, path, body)
+                except HTTPError as e:
+                    await send_json(writer, e.status, error_body(e.message, e.error_type))
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except HTTPError as e:
+            await send_json(writer, e.status, error_body(e.message, e.error_type))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def dispatch(self, writer, method, path, body):
+        if path == "/v1/chat/completions" and method == "POST":
+            await self.chat_completions(writer, parse_json(body))
+        elif path == "/v1/embeddings" and method == "POST":
+            await self.embeddings(writer, parse_json(body))
+        elif path == "/v1/models" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, {
+                "object": "list",
+                "data": [{"id": f"mock-{name}", "object": "model", "created": 0, "owned_by": "mock"}
+                         for name in PROFILES],
+            })
+        elif path == "/mock/stats" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, self.stats.snapshot())
+        elif path == "/mock/reset" and method == "POST":
+            self.stats.reset()
+            await send_json(writer, HTTPStatus.OK, {"reset": True})
+        elif path == "/health" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, {"status": "ok"})
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"{method} {path} 경로가 없습니다.")
+
+    async def _inject_error(self, writer, profile):
+        """오류 주입 대상이면 오류 응답을 보내고 True"""
+        if profile.error_rate <= 0 or random.random() >= profile.error_rate:
+            return False
+        self.stats.errors += 1
+        headers = {}
+        if profile.retry_after is not None:
+            headers["Retry-After"] = str(profile.retry_after)
+        error_type = "rate_limit_error" if profile.error_status == 429 else "server_error"
+        await send_json(writer, profile.error_status, error_body("목 서버 오류 주입", error_type), headers)
+        return True
+
+    # ------------------------------------------------------------
+    # 채팅
+    # ------------------------------------------------------------
+
+    async def chat_completions(self, writer, request):
+        started = time.perf_counter()
+        model = request.get("model") or "mock"
+        profile = self._profile_for(model)
+        self.stats.requests += 1
+        if await self._inject_error(writer, profile):
+            return
+
+        max_tokens = request.get("max_completion_tokens") or request.get("max_tokens") or profile.response_tokens
+        n_tokens = max(1, min(profile.response_tokens, max_tokens))
+        prompt_tokens = sum(len(str(m.get("content") or "")) // 3 + 4 for m in request.get("messages", []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                 "total_tokens": prompt_tokens + n_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        ttft = jittered(profile.ttft, profile.jitter)
+        gap = 1.0 / profile.tokens_per_second if profile.tokens_per_second > 0 else 0.0
+
+        self.stats.active += 1
+        try:
+            if not request.get("stream"):
+                await asyncio.sleep(ttft + jittered(gap * (n_tokens - 1), profile.jitter))
+                self.stats.add_ttft(time.perf_counter() - started)
+                await send_json(writer, HTTPStatus.OK, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                        "role": "assistant",
+                        "content": "".join(VOCAB[i % len(VOCAB)] + " " for i in range(n_tokens)),
+                    }}],
+                    "usage": usage,
+                })
+            else:
+                await self._stream(writer, request, profile, n_tokens, ttft, gap, usage,
+                                   completion_id, created, model, started)
+            self.stats.completion_tokens += n_tokens
+        finally:
+            self.stats.active -= 1
+            self.stats.add_duration(time.perf_counter() - started)
+
+    async def _stream(self, writer, request, profile, n_tokens, ttft, gap, usage,
+                      completion_id, created, model, started):
+        def event(delta, finish_reason=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return b"data: " + json.dumps(payload, ensure_ascii=False).encode() + b"\n\n"
+
+        disconnect_at = None
+        if profile.disconnect_rate > 0 and random.random() < profile.disconnect_rate:
+            disconnect_at = random.randrange(n_tokens)
+
+        writer.write(response_head(HTTPStatus.OK, "text/event-stream", {"Cache-Control": "no-cache"},
+                                   chunked=True))
+        await asyncio.sleep(ttft)
+        writer.write(chunk(event({"role": "assistant", "content": ""})))
+        # 토큰 시각은 시작 시점 기준으로 계산해서 sleep 오차가 쌓이지 않게 합니다
+        first_at = time.perf_counter()
+        for i in range(n_tokens):
+            if i == disconnect_at:
+                self.stats.disconnects += 1
+                writer.transport.abort()
+                return
+            due = first_at + jittered(gap * i, profile.jitter)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            writer.write(chunk(event({"content": VOCAB[i % len(VOCAB)] + " "})))
+            if i == 0:
+                self.stats.add_ttft(time.perf_counter() - started)
+            await writer.drain()
+        writer.write(chunk(event({}, "stop")))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": [], "usage": usage}
+            writer.write(chunk(b"data: " + json.dumps(payload).encode() + b"\n\n"))
+        writer.write(chunk(b"data: [DONE]\n\n"))
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    # ------------------------------------------------------------
+    # 임베딩
+    # ------------------------------------------------------------
+
+    async def embeddings(self, writer, request):
+        started = time.perf_counter()
+        model = request.get("model") or "mock"
+        profile = self._profile_for(model)
+        self.stats.requests += 1
+        if await self._inject_error(writer, profile):
+            return
+
+        inputs = request.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not isinstance(inputs, list) or not inputs:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "input은 문자열 또는 비어 있지 않은 리스트여야 합니다.")
+        dim = request.get("dimensions") or profile.embedding_dim
+        base64_format = request.get("encoding_format") == "base64"
+
+        await asyncio.sleep(jittered(profile.embedding_latency, profile.jitter))
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(str(text), dim)
+            if base64_format:
+                # SDK 기본값: float32 리틀 엔디언 바이트를 base64로
+                vector = base64.b64encode(array.array("f", vector).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        prompt_tokens = sum(len(str(text)) // 3 + 1 for text in inputs)
+        self.stats.add_ttft(time.perf_counter() - started)
+        self.stats.add_duration(time.perf_counter() - started)
+        await send_json(writer, HTTPStatus.OK, {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        })
+
+    async def serve(self, host="127.0.0.1", port=8100):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"목 서버 시작: http://{host}:{port}/v1 ({self.profile})", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 목 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--profile", default="openai", choices=sorted(PROFILES))
+    parser.add_argument("--ttft", type=float, default=None, help="프로필의 TTFT(초) 변경")
+    parser.add_argument("--tps", type=float, default=None, help="프로필의 초당 토큰 수 변경")
+    parser.add_argument("--jitter", type=float, default=None)
+    parser.add_argument("--tokens", type=int, default=None, help="응답 토큰 수")
+    parser.add_argument("--error-rate", type=float, default=None)
+    parser.add_argument("--error-status", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None, help="지터/오류 주입 난수 시드")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    overrides = {
+        "ttft": args.ttft,
+        "tokens_per_second": args.tps,
+        "jitter": args.jitter,
+        "response_tokens": args.tokens,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+    }
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    try:
+        asyncio.run(MockServer(PROFILES[args.profile], overrides).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n목 서버를 종료합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+모델 카탈로그 (디스크 캐시 + 지연 시간 측정)
+
+등록된 모든 제공자(OpenAI, Cerebras, OpenRouter, Ollama)의 모델 목록을
+output/model_catalog.json에 TTL과 함께 캐시하고,
+선택적으로 모델별 TTFT(첫 토큰까지 시간)와 tokens/s를 동시에 측정합니다.
+
+측정 결과가 있으면 choose_model()로 품질 등급(tier)을 만족하는 모델 중
+가장 빠른 모델을 고를 수 있습니다. (주석 처리된 model= 줄을 바꿔 가며 고르지 않아도 됨)
+
+실행:
+  # 모델 목록 (캐시 사용)
+  uv run python 01_LLM_API/model_catalog.py --providers openai cerebras
+
+  # 등급이 지정된 모델들의 TTFT / tokens/s 측정
+  uv run python 01_LLM_API/model_catalog.py --providers cerebras ollama --bench
+
+  # medium 등급 이상에서 가장 빠른 모델
+  uv run python 01_LLM_API/model_catalog.py --choose medium
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from chat_engine import PROVIDERS, build_request, get_client, get_provider
+
+DEFAULT_CATALOG_FILE = Path("output") / "model_catalog.json"
+
+BENCH_PROMPT = "한국의 사계절을 각각 한 문장으로 설명해줘."
+
+# 품질 등급 (낮은 등급 → 높은 등급)
+TIER_ORDER = ["small", "medium", "large"]
+
+# 모델별 품질 등급. 여기 없는 모델은 choose_model()에서 사용하지 않습니다.
+MODEL_TIERS = {
+    # OpenAI
+    "gpt-4.1": "large",
+    "gpt-4.1-mini": "medium",
+    "gpt-4.1-nano": "small",
+    "gpt-4o-mini": "small",
+    # Cerebras
+    "llama3.1-8b": "small",
+    "qwen-3-32b": "medium",
+    "llama-4-scout-17b-16e-instruct": "medium",
+    "llama-3.3-70b": "medium",
+    "qwen-3-235b-a22b-instruct-2507": "large",
+    "gpt-oss-120b": "large",
+    # OpenRouter
+    "openai/gpt-4o-mini": "small",
+    "deepseek/deepseek-chat-v3.1:free": "large",
+    # Ollama
+    "llama3.2": "small",
+    "qwen2.5": "small",
+    "gpt-oss:20b": "medium",
+}
+
+
+class ModelCatalog:
+    """
+    제공자별 모델 목록과 측정 결과를 디스크에 캐시하는 카탈로그
+
+    Args:
+        path: 캐시 파일 경로
+        ttl: 모델 목록 캐시 유지 시간(초)
+        bench_ttl: 측정 결과 유지 시간(초)
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_FILE, ttl=24 * 3600, bench_ttl=6 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.bench_ttl = bench_ttl
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass  # 깨진 캐시는 새로 만듭니다
+        return {"models": {}, "bench": {}}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        tmp.replace(self.path)
+
+    # ------------------------------------------------------------
+    # 모델 목록
+    # ------------------------------------------------------------
+
+    def list_models(self, provider, refresh=False):
+        """
+        제공자의 모델 ID 목록 (캐시가 TTL 안이면 API를 호출하지 않음)
+
+        Args:
+            provider: 제공자 이름
+            refresh: True면 캐시를 무시하고 다시 조회
+        """
+        get_provider(provider)
+        entry = self._data["models"].get(provider)
+        if not refresh and entry and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["ids"]
+
+        ids = sorted(model.id for model in get_client(provider).models.list())
+        with self._lock:
+            self._data["models"][provider] = {"fetched_at": time.time(), "ids": ids}
+            self._save()
+        return ids
+
+    def list_all(self, providers=None, refresh=False):
+        """여러 제공자의 모델 목록을 동시에 조회. 실패한 제공자는 오류 메시지를 담습니다."""
+        providers = providers or list(PROVIDERS)
+        results = {}
+
+        def fetch(provider):
+            try:
+                results[provider] = self.list_models(provider, refresh)
+            except Exception as e:
+                results[provider] = e
+
+        with ThreadPoolExecutor(max_workers=len(providers)) as pool:
+            list(pool.map(fetch, providers))
+        return {provider: results[provider] for provider in providers}
+
+    # ------------------------------------------------------------
+    # 지연 시간 측정
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _measure(provider, model, prompt, max_tokens):
+        """스트리밍 요청 한 번의 TTFT와 tokens/s (토큰 수는 스트림 조각 수로 근사)"""
+        request = build_request(get_provider(provider), [{"role": "user", "content": prompt}],
+                                model, temperature=0.0, max_tokens=max_tokens)
+        started = time.perf_counter()
+        first = None
+        pieces = 0
+        response = get_client(provider).chat.completions.create(**request, stream=True)
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first is None:
+                        first = time.perf_counter()
+                    pieces += 1
+        finally:
+            response.close()
+        ended = time.perf_counter()
+        if first is None:
+            raise RuntimeError("응답에 토큰이 없습니다.")
+        generation = ended - first
+        return {
+            "ttft": first - started,
+            "tokens_per_second": (pieces - 1) / generation if pieces > 1 and generation > 0 else 0.0,
+        }
+
+    def benchmark(self, targets, prompt=BENCH_PROMPT, runs=3, max_tokens=200, concurrency=8):
+        """
+        (provider, model) 목록의 TTFT / tokens/s를 동시에 측정하고 캐시에 저장합니다.
+
+        같은 모델은 runs번 측정해서 중앙값을 사용합니다.
+
+        Returns:
+            {"provider/model": {"ttft": ..., "tokens_per_second": ..., "errors": ...}}
+        """
+        jobs = [(provider, model) for provider, model in targets for _ in range(runs)]
+        samples = {f"{p}/{m}": [] for p, m in targets}
+        errors = {key: 0 for key in samples}
+        lock = threading.Lock()
+
+        def run(job):
+            provider, model = job
+            key = f"{provider}/{model}"
+            try:
+                sample = self._measure(provider, model, prompt, max_tokens)
+            except Exception:
+                with lock:
+                    errors[key] += 1
+                return
+            with lock:
+                samples[key].append(sample)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run, jobs))
+
+        results = {}
+        for key, values in samples.items():
+            result = {"measured_at": time.time(), "errors": errors[key]}
+            if values:
+                result["ttft"] = statistics.median(v["ttft"] for v in values)
+                result["tokens_per_second"] = statistics.median(v["tokens_per_second"] for v in values)
+            results[key] = result
+        with self._lock:
+            self._data["bench"].update(results)
+            self._save()
+        return results
+
+    # ------------------------------------------------------------
+    # 모델 선택
+    # ------------------------------------------------------------
+
+    def choose_model(self, tier="medium", providers=None, answer_tokens=200):
+        """
+        tier 이상 등급이면서 측정 결과가 가장 빠른 (provider, model)을 반환합니다.
+
+        속도는 answer_tokens 길이의 답변을 받는 예상 시간 (TTFT + answer_tokens / tokens/s)으로 비교합니다.
+        유효한 측정 결과가 없으면 None.
+        """
+        min_rank = TIER_ORDER.index(tier)
+        providers = set(providers or PROVIDERS)
+        now = time.time()
+        best, best_seconds = None, float("inf")
+        for key, result in self._data["bench"].items():
+            provider, model = key.split("/", 1)
+            model_tier = MODEL_TIERS.get(model)
+            if (provider not in providers or model_tier is None
+                    or TIER_ORDER.index(model_tier) < min_rank
+                    or now - result["measured_at"] > self.bench_ttl
+                    or not result.get("tokens_per_second")):
+                continue
+            seconds = result["ttft"] + answer_tokens / result["tokens_per_second"]
+            if seconds < best_seconds:
+                best, best_seconds = (provider, model), seconds
+        return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 카탈로그 조회 및 지연 시간 측정")
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDERS), choices=sorted(PROVIDERS))
+    parser.add_argument("--refresh", action="store_true", help="캐시를 무시하고 모델 목록 다시 조회")
+    parser.add_argument("--bench", action="store_true", help="등급이 지정된 모델의 TTFT / tokens/s 측정")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--choose", choices=TIER_ORDER, help="이 등급 이상에서 가장 빠른 모델 출력")
+    args = parser.parse_args()
+
+    catalog = ModelCatalog()
+    listing = catalog.list_all(args.providers, refresh=args.refresh)
+    for provider, ids in listing.items():
+        print("=" * 60)
+        if isinstance(ids, Exception):
+            print(f"{provider}: 조회 실패 ({ids})")
+            continue
+        print(f"{provider}: {len(ids)}개 모델")
+        for model_id in ids:
+            tier = MODEL_TIERS.get(model_id)
+            print(f"  {model_id}" + (f"  [{tier}]" if tier else ""))
+
+    if args.bench:
+        targets = [(provider, model_id)
+                   for provider, ids in listing.items() if not isinstance(ids, Exception)
+                   for model_id in ids if model_id in MODEL_TIERS]
+        print("\n" + "=" * 60)
+        print(f"{len(targets)}개 모델 측정 중... (모델당 {args.runs}회)")
+        print("=" * 60)
+        for key, result in sorted(catalog.benchmark(targets, runs=args.runs).items()):
+            if "ttft" in result:
+                print(f"{key}: TTFT {result['ttft'] * 1000:.0f}ms, "
+                      f"{result['tokens_per_second']:.1f} tok/s (오류 {result['errors']}회)")
+            else:
+                print(f"{key}: 측정 실패 (오류 {result['errors']}회)")
+
+    if args.choose:
+        choice = catalog.choose_model(args.choose, args.providers)
+        print(f"\n{args.choose} 등급 이상 가장 빠른 모델: "
+              + (f"{choice[0]} / {choice[1]}" if choice else "측정 결과 없음 (--bench 먼저 실행)"))
+
+
+if __name__ == "__main__":
+    main()
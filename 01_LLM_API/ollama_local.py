@@ -0,0 +1,196 @@
+"""
+Ollama 로컬 추론 모드 (모델 예열, keep_alive 고정, 컨텍스트/스레드 설정)
+
+OpenAI 호환 엔드포인트(/v1)로 Ollama를 쓰면
+  - 첫 턴에 모델 로드 시간(20B 모델은 CPU에서 수십 초)이 그대로 들어가고
+  - 대화 중에 유휴 시간이 길어지면 모델이 메모리에서 내려가며
+  - num_ctx, num_thread 같은 실행 옵션을 줄 수 없습니다.
+
+OllamaRuntime은 Ollama 네이티브 API(/api/generate, /api/chat)를 사용해서
+  - 시작할 때 모델을 미리 로드하고 (preload)
+  - 세션이 열려 있는 동안 keep_alive=-1로 메모리에 고정한 뒤
+  - 끝나면 release_keep_alive(기본 5분) 후 내려가도록 되돌리고
+  - 응답마다 로드 시간, 프롬프트 처리 속도, 생성 속도를 알려줍니다.
+
+사용 예:
+  runtime = OllamaRuntime("gpt-oss:20b", num_ctx=8192, num_thread=8)
+  with runtime:  # 예열 + 고정, 끝나면 해제
+      stream = runtime.stream_chat(messages)
+      for content in stream:
+          print(content, end="", flush=True)
+      print(stream.stats)
+"""
+
+import json
+from dataclasses import dataclass
+
+import httpx
+
+NS_PER_SECOND = 1e9
+
+
+@dataclass
+class OllamaStats:
+    """Ollama 응답 통계 (API의 *_duration 값은 나노초 단위)"""
+    load_seconds: float = 0.0
+    prompt_tokens: int = 0
+    prompt_seconds: float = 0.0
+    eval_tokens: int = 0
+    eval_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @classmethod
+    def from_response(cls, data):
+        return cls(
+            load_seconds=data.get("load_duration", 0) / NS_PER_SECOND,
+            prompt_tokens=data.get("prompt_eval_count", 0),
+            prompt_seconds=data.get("prompt_eval_duration", 0) / NS_PER_SECOND,
+            eval_tokens=data.get("eval_count", 0),
+            eval_seconds=data.get("eval_duration", 0) / NS_PER_SECOND,
+            total_seconds=data.get("total_duration", 0) / NS_PER_SECOND,
+        )
+
+    @property
+    def prompt_eval_rate(self):
+        """프롬프트 처리 속도 (tokens/s)"""
+        return self.prompt_tokens / self.prompt_seconds if self.prompt_seconds else 0.0
+
+    @property
+    def eval_rate(self):
+        """생성 속도 (tokens/s)"""
+        return self.eval_tokens / self.eval_seconds if self.eval_seconds else 0.0
+
+    def __str__(self):
+        return (f"로드 {self.load_seconds:.2f}s, "
+                f"프롬프트 {self.prompt_tokens}토큰 @ {self.prompt_eval_rate:.1f} tok/s, "
+                f"생성 {self.eval_tokens}토큰 @ {self.eval_rate:.1f} tok/s, "
+                f"전체 {self.total_seconds:.2f}s")
+
+
+class OllamaStream:
+    """/api/chat 스트리밍 응답. 반복이 끝나면 stats에 통계가 채워집니다."""
+
+    def __init__(self, runtime, payload):
+        self.runtime = runtime
+        self.payload = payload
+        self.stats = None
+
+    def __iter__(self):
+        with self.runtime.client.stream("POST", "/api/chat", json=self.payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(f"Ollama 오류: {data['error']}")
+                content = data.get("message", {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    self.stats = OllamaStats.from_response(data)
+
+
+class OllamaRuntime:
+    """
+    Ollama 모델 하나를 예열하고 메모리에 고정해서 사용하는 로컬 추론 런타임
+
+    Args:
+        model: Ollama 모델 이름 (ollama list로 확인)
+        host: Ollama 서버 주소
+        num_ctx: 컨텍스트 길이 (토큰)
+        num_thread: 추론에 사용할 CPU 스레드 수 (None이면 Ollama 기본값)
+        release_keep_alive: 세션 종료 후 모델을 유지할 시간 ("5m", 0이면 즉시 내림)
+        extra_options: Ollama options에 그대로 전달할 추가 값 (num_batch 등)
+    """
+
+    def __init__(self, model, host="http://localhost:11434", num_ctx=8192, num_thread=None,
+                 release_keep_alive="5m", timeout=600.0, **extra_options):
+        self.model = model
+        self.num_ctx = num_ctx
+        self.num_thread = num_thread
+        self.release_keep_alive = release_keep_alive
+        self.extra_options = extra_options
+        # 모델 로드는 오래 걸릴 수 있으므로 읽기 타임아웃을 길게 둡니다
+        self.client = httpx.Client(base_url=host, timeout=httpx.Timeout(timeout, connect=5.0))
+        self.keep_alive = release_keep_alive
+        self.load_stats = None
+
+    def options(self, **overrides):
+        options = {"num_ctx": self.num_ctx}
+        if self.num_thread is not None:
+            options["num_thread"] = self.num_thread
+        options.update(self.extra_options)
+        options.update(overrides)
+        return options
+
+    def preload(self, keep_alive=-1):
+        """
+        프롬프트 없이 /api/generate를 호출해서 모델을 메모리에 올립니다.
+
+        Args:
+            keep_alive: 모델 유지 시간 (-1이면 명시적으로 해제할 때까지 유지)
+
+        Returns:
+            OllamaStats (load_seconds에 로드 시간)
+        """
+        self.keep_alive = keep_alive
+        response = self.client.post("/api/generate", json={
+            "model": self.model,
+            "keep_alive": keep_alive,
+            "options": self.options(),
+            "stream": False,
+        })
+        response.raise_for_status()
+        self.load_stats = OllamaStats.from_response(response.json())
+        return self.load_stats
+
+    def release(self):
+        """keep_alive 고정을 풀어 release_keep_alive 후에 모델이 내려가도록 합니다."""
+        self.keep_alive = self.release_keep_alive
+        try:
+            self.client.post("/api/generate", json={
+                "model": self.model,
+                "keep_alive": self.release_keep_alive,
+                # options가 로드된 인스턴스와 다르면 Ollama가 기본 컨텍스트로 모델을 다시 로드하므로 같은 값 전송
+                "options": self.options(),
+                "stream": False,
+            }).raise_for_status()
+        except httpx.HTTPError:
+            pass
+
+    def loaded_models(self):
+        """현재 메모리에 올라가 있는 모델 목록 (/api/ps)"""
+        response = self.client.get("/api/ps")
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    def stream_chat(self, messages, model=None, temperature=0.7, max_tokens=1000, **extra):
+        """
+        /api/chat 스트리밍 요청 (chat_engine.run_chat_loop의 stream_fn으로 사용 가능)
+
+        매 요청에 현재 keep_alive를 함께 보내서, 고정 상태가 요청 때문에 풀리지 않게 합니다.
+
+        Returns:
+            OllamaStream (반복하면 텍스트 조각, 끝나면 .stats에 통계)
+        """
+        return OllamaStream(self, {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": self.options(temperature=temperature, num_predict=max_tokens, **extra),
+        })
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        print(f"Ollama 모델 로드 중... ({self.model})")
+        stats = self.preload()
+        print(f"모델 로드 완료! ({stats.load_seconds:.2f}s, keep_alive 고정)")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        self.close()
@@ -0,0 +1,326 @@
+"""
+제공자별 요청 속도 제한과 적응형 동시성 제어
+
+여러 세션이 동시에 요청하면 429(Too Many Requests)나 5xx로 바로 실패합니다.
+RateLimiter는 제공자(+모델)마다
+  - 토큰 버킷 두 개로 분당 요청 수(RPM)와 분당 토큰 수(TPM)를 지키고
+  - AIMD(additive-increase, multiplicative-decrease) 방식으로 동시 요청 수를 조절합니다.
+    성공하면 한도를 조금씩 올리고, 429/5xx를 받으면 절반으로 줄입니다.
+  - Retry-After 헤더가 있으면 그 시간 동안 새 요청을 보내지 않습니다.
+
+chat_engine의 스트리밍 호출, batch_runner, 02_embedding의 get_embeddings가 같은 리미터를 공유합니다.
+SDK 자체 재시도는 끄고(max_retries=0) 재시도는 리미터가 담당합니다.
+
+사용 예:
+  limiter = get_limiter("openai", "text-embedding-3-small")
+  with limiter.request(lambda: client.embeddings.create(...), estimated_tokens=500) as response:
+      ...
+
+한도 설정 (계정 등급마다 다르므로 직접 지정):
+  configure_limits("cerebras", rpm=30, tpm=60000)
+  configure_limits("openai", "gpt-4.1", rpm=500, tpm=30000)
+"""
+
+import asyncio
+import contextlib
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import openai
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """분당 한도 (None이면 제한 없음)와 동시성 범위"""
+    rpm: float | None = None
+    tpm: float | None = None
+    initial_concurrency: float = 8
+    min_concurrency: float = 1
+    max_concurrency: float = 256
+
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷 (용량 = 1분치)"""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_take(self, amount, now):
+        """가져올 수 있으면 가져오고 0을, 없으면 기다려야 할 시간(초)을 반환"""
+        amount = min(amount, self.capacity)  # 한 번에 용량보다 큰 요청도 언젠가는 통과
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+def retry_after_seconds(error):
+    """오류 응답의 Retry-After(-ms) 헤더 값(초). 없으면 None."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Python 3.10은 잘못된 날짜에 TypeError를 냅니다. 알 수 없으면 None (백오프 사용)
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def is_throttle_error(error):
+    """속도 제한/과부하로 보고 재시도할 오류인지"""
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+class RateLimiter:
+    """
+    RPM/TPM 토큰 버킷 + AIMD 동시성 제어기 (스레드와 asyncio 양쪽에서 사용 가능)
+
+    Args:
+        limits: RateLimits
+        name: 로그용 이름
+    """
+
+    def __init__(self, limits=RateLimits(), name=""):
+        self.limits = limits
+        self.name = name
+        self.concurrency = float(limits.initial_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._requests = TokenBucket(limits.rpm) if limits.rpm else None
+        self._tokens = TokenBucket(limits.tpm) if limits.tpm else None
+        self._lock = threading.Lock()
+        # 슬롯이 비면 깨울 대기자: 스레드는 Condition, 코루틴은 (루프, future) 목록
+        self._slot_freed = threading.Condition(self._lock)
+        self._async_waiters = []
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0}
+
+    # ------------------------------------------------------------
+    # 슬롯 획득 / 반납
+    # ------------------------------------------------------------
+
+    def _try_enter(self, estimated_tokens):
+        """
+        들어갈 수 있으면 0, 버킷/일시정지 때문이면 기다릴 시간(초),
+        동시성 한도가 찼으면 None (슬롯이 빌 때까지 대기). self._lock을 잡은 상태로 호출합니다.
+        """
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= max(1, int(self.concurrency)):
+            return None
+        # 토큰이 모자라면 요청 버킷에서 가져가지 않도록 먼저 확인
+        if self._tokens is not None:
+            wait = self._tokens.try_take(estimated_tokens, now)
+            if wait:
+                return wait
+        if self._requests is not None:
+            wait = self._requests.try_take(1, now)
+            if wait:
+                if self._tokens is not None:
+                    self._tokens.tokens += min(estimated_tokens, self._tokens.capacity)
+                return wait
+        self.in_flight += 1
+        self.stats["requests"] += 1
+        return 0.0
+
+    def _enter(self, estimated_tokens):
+        """슬롯을 얻을 때까지 스레드를 재웁니다 (슬롯 반납 시 notify, 버킷은 채워질 시간만큼 대기)"""
+        with self._slot_freed:
+            while True:
+                wait = self._try_enter(estimated_tokens)
+                if wait == 0:
+                    return
+                self._slot_freed.wait(wait)
+
+    async def _aenter(self, estimated_tokens):
+        """_enter()의 asyncio 버전"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._try_enter(estimated_tokens)
+                if wait == 0:
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock, contextlib.suppress(ValueError):
+                    self._async_waiters.remove((loop, waiter))
+
+    def _wake_waiters(self):
+        """슬롯을 기다리는 스레드와 코루틴을 모두 깨웁니다. self._lock을 잡은 상태로 호출합니다."""
+        self._slot_freed.notify_all()
+        for loop, waiter in self._async_waiters:
+            # 다른 스레드의 루프일 수 있으므로 call_soon_threadsafe (이미 닫힌 루프는 무시)
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(_resolve, waiter)
+        self._async_waiters.clear()
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_waiters()
+
+    def _on_success(self):
+        with self._lock:
+            before = int(self.concurrency)
+            # additive increase: 한도만큼 성공하면 +1
+            self.concurrency = min(self.limits.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            if int(self.concurrency) > before:
+                self._wake_waiters()
+
+    def _on_error(self, error, attempt, max_retries):
+        """재시도할 오류면 기다릴 시간(초), 아니면 None"""
+        if not is_throttle_error(error):
+            return None
+        retry_after = retry_after_seconds(error)
+        # 재시도 횟수를 다 썼어도 (hedge처럼 max_retries=0이어도) 한도는 줄여서 다른 요청에 반영
+        with self._lock:
+            self.stats["throttled"] += 1
+            # multiplicative decrease
+            self.concurrency = max(self.limits.min_concurrency, self.concurrency * 0.5)
+            if retry_after is not None:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            if attempt >= max_retries:
+                return None
+            self.stats["retries"] += 1
+        if retry_after is not None:
+            return retry_after
+        # Retry-After가 없으면 지수 백오프 + 지터
+        return min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    # ------------------------------------------------------------
+    # 동기 / 비동기 사용
+    # ------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def request(self, fn, estimated_tokens=0, max_retries=4):
+        """
+        슬롯을 얻고 fn()을 호출합니다. 429/5xx면 한도를 줄이고 재시도합니다.
+
+        with 블록이 끝날 때 슬롯을 반납하므로, 스트리밍 응답은 블록 안에서 끝까지 읽습니다.
+
+        Args:
+            fn: 요청 함수 (SDK 재시도는 끈 클라이언트 사용 권장)
+            estimated_tokens: TPM 버킷에서 차감할 예상 토큰 수 (프롬프트 + 최대 생성 토큰)
+            max_retries: 최대 재시도 횟수
+        """
+        attempt = 0
+        while True:
+            self._enter(estimated_tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                self._leave()
+                delay = self._on_error(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            break
+        self._on_success()
+        try:
+            yield result
+        finally:
+            self._leave()
+
+    @contextlib.asynccontextmanager
+    async def arequest(self, fn, estimated_tokens=0, max_retries=4):
+        """request()의 asyncio 버전 (fn은 awaitable을 반환하는 함수)"""
+        attempt = 0
+        while True:
+            await self._aenter(estimated_tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                self._leave()
+                delay = self._on_error(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            break
+        self._on_success()
+        try:
+            yield result
+        finally:
+            self._leave()
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+# ------------------------------------------------------------
+# 제공자/모델별 리미터 레지스트리
+# ------------------------------------------------------------
+
+_limits = {}
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def configure_limits(provider, model=None, **limits):
+    """
+    제공자(또는 제공자+모델)의 한도를 설정합니다.
+
+    Args:
+        provider: 제공자 이름
+        model: 모델 이름 (None이면 그 제공자의 모든 모델 기본값)
+        limits: RateLimits 필드 (rpm, tpm, initial_concurrency, ...)
+    """
+    with _registry_lock:
+        _limits[(provider, model)] = RateLimits(**limits)
+        # 이미 만든 리미터는 새 설정으로 다시 만듭니다
+        for key in [k for k in _limiters if k[0] == provider and (model is None or k[1] == model)]:
+            del _limiters[key]
+
+
+def get_limits(provider, model=None):
+    """configure_limits()로 설정한 한도 (없으면 제공자 기본값, 그것도 없으면 RateLimits())"""
+    with _registry_lock:
+        return _limits.get((provider, model)) or _limits.get((provider, None)) or RateLimits()
+
+
+def get_limiter(provider, model=None):
+    """제공자+모델별 공유 RateLimiter"""
+    key = (provider, model)
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limits = _limits.get(key) or _limits.get((provider, None)) or RateLimits()
+            limiter = RateLimiter(limits, name=f"{provider}/{model}")
+            _limiters[key] = limiter
+        return limiter
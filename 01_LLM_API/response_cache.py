@@ -0,0 +1,208 @@
+"""
+채팅 응답 캐시 (정확 일치 + 의미 유사도)
+
+인사말이나 자주 묻는 질문처럼 거의 같은 턴이 반복되면
+매번 chat.completions.create를 호출할 필요가 없습니다.
+
+  1. 정확 일치: 정규화한 messages 히스토리 + 모델 + temperature의 해시로 조회
+  2. 의미 유사도(선택): 마지막 사용자 메시지를 BGE-M3로 임베딩해서
+     코사인 유사도가 threshold 이상인 캐시된 답변을 사용
+     (같은 모델/temperature/시스템 프롬프트 안에서만 비교하며, 이전 턴은 보지 않으므로
+      FAQ처럼 문맥과 무관한 질문에 적합합니다)
+
+항목은 TTL이 지나면 만료되고, max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 삭제(LRU)됩니다.
+캐시된 답변은 스트림처럼 조각으로 다시 재생되므로 출력 코드는 그대로입니다.
+
+사용 예:
+  cache = ResponseCache(semantic=True)
+  chunks = cache.wrap(messages, "qwen-3-32b", 0.7, stream_chat("cerebras", messages))
+  for content in chunks:
+      ...
+
+  run_chat_loop(..., cache=ResponseCache())                 # 콘솔 챗봇
+  python 01_LLM_API/chat_server.py --cache                  # 채팅 서버 (--semantic-cache면 의미 유사도도)
+
+의미 유사도용 BGE-M3는 02_embedding/model_client.load_encoder()로 불러옵니다.
+모델 서버(model_server.py)가 떠 있으면 그 서버를, 없으면 BGE_M3_BACKEND 설정대로 프로세스 안에서 로드합니다.
+"""
+
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+
+def normalize_text(text):
+    """공백을 하나로 합치고 대소문자 구분을 없앤 텍스트"""
+    return " ".join((text or "").split()).casefold()
+
+
+def cache_key(messages, model, temperature):
+    """messages 히스토리 + 모델 + temperature의 SHA-256 키"""
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [[m.get("role"), normalize_text(m.get("content"))] for m in messages],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def replay(text, delay=0.0):
+    """캐시된 답변을 단어(공백 포함) 단위 조각으로 다시 스트리밍"""
+    for piece in re.findall(r"\S+\s*|\s+", text):
+        if delay:
+            time.sleep(delay)
+        yield piece
+
+
+@dataclass
+class _Entry:
+    answer: str
+    expires_at: float
+    scope: str | None = None   # 의미 유사도 비교 범위 (모델/temperature/시스템 프롬프트)
+    vector: np.ndarray | None = field(default=None, repr=False)
+
+
+class ResponseCache:
+    """
+    TTL + LRU 채팅 응답 캐시
+
+    Args:
+        max_entries: 최대 항목 수 (넘으면 LRU 삭제)
+        ttl: 항목 유지 시간(초)
+        semantic: True면 의미 유사도 조회도 사용
+        threshold: 의미 유사도 조회에 사용할 최소 코사인 유사도
+        encoder: 의미 유사도용 인코더 (encode(texts, normalize_embeddings=True)를 가진 객체,
+            None이면 처음 필요할 때 model_client.load_encoder()로 BGE-M3를 불러옴)
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, semantic=False, threshold=0.92, encoder=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoder = encoder
+        self._last_embedding = (None, None)  # get() → put() 사이에 같은 질문을 두 번 임베딩하지 않도록
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    # ------------------------------------------------------------
+    # 의미 유사도
+    # ------------------------------------------------------------
+
+    def _embed(self, text):
+        last_text, last_vector = self._last_embedding
+        if text == last_text:
+            return last_vector
+        if self._encoder is None:
+            # 모델 로드가 무거우므로 처음 필요할 때만 불러옵니다 (모델 서버가 있으면 클라이언트)
+            sys.path.append(str(Path(__file__).resolve().parent.parent / "02_embedding"))
+            from model_client import load_encoder
+            self._encoder = load_encoder()
+        vector = self._encoder.encode([text], normalize_embeddings=True)[0]
+        vector = np.asarray(vector, dtype=np.float32)
+        self._last_embedding = (text, vector)
+        return vector
+
+    @staticmethod
+    def _scope(messages, model, temperature):
+        system = next((m.get("content") for m in messages if m.get("role") == "system"), "")
+        return cache_key([{"role": "system", "content": system}], model, temperature)
+
+    @staticmethod
+    def _last_user_message(messages):
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                return message.get("content") or ""
+        return None
+
+    # ------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------
+
+    def _evict_expired(self, now):
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, messages, model, temperature):
+        """캐시된 답변을 반환합니다. 없으면 None."""
+        key = cache_key(messages, model, temperature)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.answer
+
+        if self.semantic:
+            query = self._last_user_message(messages)
+            if query:
+                vector = self._embed(query)
+                scope = self._scope(messages, model, temperature)
+                with self._lock:
+                    self._evict_expired(now)
+                    candidates = [(k, e) for k, e in self._entries.items()
+                                  if e.scope == scope and e.vector is not None]
+                    if candidates:
+                        matrix = np.stack([e.vector for _, e in candidates])
+                        scores = matrix @ vector
+                        best = int(np.argmax(scores))
+                        if scores[best] >= self.threshold:
+                            best_key, best_entry = candidates[best]
+                            self._entries.move_to_end(best_key)
+                            self.stats["semantic_hits"] += 1
+                            return best_entry.answer
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, messages, model, temperature, answer):
+        key = cache_key(messages, model, temperature)
+        entry = _Entry(answer=answer, expires_at=time.monotonic() + self.ttl)
+        if self.semantic:
+            query = self._last_user_message(messages)
+            if query:
+                entry.scope = self._scope(messages, model, temperature)
+                entry.vector = self._embed(query)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def wrap(self, messages, model, temperature, chunks):
+        """
+        스트림 앞에 캐시를 둡니다.
+
+        캐시에 있으면 chunks는 시작하지 않고(닫고) 캐시된 답변을 재생하고,
+        없으면 chunks를 그대로 전달하다가 끝까지 받으면 캐시에 저장합니다.
+        """
+        answer = self.get(messages, model, temperature)
+        if answer is not None:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            yield from replay(answer)
+            return
+
+        parts = []
+        for content in chunks:
+            parts.append(content)
+            yield content
+        if parts:
+            self.put(messages, model, temperature, "".join(parts))
+
+    def __len__(self):
+        return len(self._entries)
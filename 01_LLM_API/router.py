@@ -0,0 +1,289 @@
+"""
+대체 경로(fallback chain)와 서킷 브레이커를 가진 제공자 라우터
+
+챗봇 스크립트는 제공자 하나에 고정되어 있어서, 그 제공자가 죽으면 전체가 멈추고
+타임아웃이 날 때까지 사용자가 기다려야 합니다.
+Router는 여러 엔드포인트(제공자 + 모델)를 순서대로 묶고
+  - 첫 토큰 전에 실패하면 다음 엔드포인트로 넘어가고 (대체 경로)
+  - 엔드포인트마다 서킷 브레이커를 두어, 연속으로 실패하거나 느린 엔드포인트는
+    cooldown 동안 요청을 보내지 않고 바로 건너뜁니다. cooldown이 지나면 요청 하나만
+    시험 삼아 보내고(half-open), 성공하면 다시 사용합니다.
+  - strategy="latency"면 최근 TTFT(지수 이동 평균)가 짧은 엔드포인트부터 시도합니다.
+
+첫 토큰을 받은 뒤에 끊긴 스트림은 이미 출력한 내용이 있으므로 다른 엔드포인트로 넘기지 않고
+오류를 그대로 전달합니다.
+
+사용 예:
+  router = Router([
+      Endpoint("cerebras", "qwen-3-32b"),
+      Endpoint("openrouter", "deepseek/deepseek-chat-v3.1:free"),
+      Endpoint("ollama", "gpt-oss:20b"),
+  ])
+  stream = router.stream(messages)
+  for content in stream:
+      print(content, end="", flush=True)
+  print(stream.stats)
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import httpx
+import openai
+
+from chat_engine import get_provider, stream_chat, warmup
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """라우팅 대상 (model이 None이면 제공자 기본 모델)"""
+    provider: str
+    model: str | None = None
+
+    @property
+    def name(self):
+        return f"{self.provider}/{self.model or get_provider(self.provider).default_model}"
+
+
+class CircuitBreaker:
+    """
+    엔드포인트 하나의 서킷 브레이커
+
+    closed(정상) → 연속 failure_threshold번 실패 → open(차단) → cooldown 경과
+    → half_open(시험 요청 하나만 허용) → 성공하면 closed, 실패하면 다시 open
+
+    Args:
+        failure_threshold: 회로를 여는 연속 실패 횟수
+        cooldown: 회로를 연 뒤 요청을 보내지 않을 시간(초)
+        slow_ttft: TTFT가 이 값(초)보다 길면 성공해도 실패로 셈 (None이면 사용하지 않음)
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, cooldown=30.0, slow_ttft=None):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_ttft = slow_ttft
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """요청을 보내도 되는지 (half_open이면 시험 요청 하나만 허용)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def retry_in(self):
+        """회로가 열려 있으면 다시 시도할 수 있을 때까지 남은 시간(초)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def record_success(self, ttft=None):
+        if self.slow_ttft is not None and ttft is not None and ttft > self.slow_ttft:
+            self.record_failure()
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """결과 없이 끝난 시험 요청 (사용자가 중간에 멈춘 경우): 다음 요청이 다시 시험하도록"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class EndpointHealth:
+    """엔드포인트별 서킷 브레이커 + 최근 TTFT + 누적 횟수"""
+
+    def __init__(self, breaker, alpha=0.3):
+        self.breaker = breaker
+        self.alpha = alpha
+        self.ttft = None  # 지수 이동 평균(초)
+        self.requests = 0
+        self.failures = 0
+
+    def on_first_token(self, ttft):
+        self.ttft = ttft if self.ttft is None else self.alpha * ttft + (1 - self.alpha) * self.ttft
+
+    def on_success(self, ttft):
+        """스트림을 끝까지 받았을 때 (첫 토큰만 받고 끊기면 on_failure만 기록)"""
+        self.requests += 1
+        self.breaker.record_success(ttft)
+
+    def on_failure(self):
+        self.requests += 1
+        self.failures += 1
+        self.breaker.record_failure()
+
+
+class RoutedStream:
+    """
+    Router.stream()이 반환하는 이터레이터
+
+    Attributes:
+        endpoint: 응답한 Endpoint (첫 토큰 이후에 설정)
+        ttft: 첫 토큰까지 걸린 시간(초)
+        errors: 첫 토큰 전에 실패한 (엔드포인트 이름, 오류) 리스트
+        skipped: 회로가 열려 있어서 건너뛴 엔드포인트 이름 리스트
+    """
+
+    def __init__(self, router, messages, temperature, max_tokens, extra):
+        self.router = router
+        self.messages = messages
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.extra = extra
+        self.endpoint = None
+        self.ttft = None
+        self.errors = []
+        self.skipped = []
+
+    @property
+    def stats(self):
+        if self.endpoint is None:
+            return None
+        text = f"{self.endpoint.name} TTFT {self.ttft * 1000:.0f}ms"
+        if self.errors:
+            text += f", 실패 후 대체 {len(self.errors)}회 ({', '.join(name for name, _ in self.errors)})"
+        if self.skipped:
+            text += f", 차단됨: {', '.join(self.skipped)}"
+        return text
+
+    def __iter__(self):
+        router = self.router
+        for endpoint in router.ordered():
+            health = router.health[endpoint]
+            if not health.breaker.allow():
+                self.skipped.append(endpoint.name)
+                continue
+
+            started = time.perf_counter()
+            first = None
+            # 다른 엔드포인트가 재시도 역할을 하므로 리미터 재시도는 끄고 타임아웃을 짧게 둡니다
+            chunks = stream_chat(endpoint.provider, self.messages, endpoint.model,
+                                 self.temperature, self.max_tokens, retries=0,
+                                 timeout=router.timeout, **self.extra)
+            recorded = False
+            try:
+                for content in chunks:
+                    if first is None:
+                        first = time.perf_counter() - started
+                        health.on_first_token(first)
+                        self.endpoint, self.ttft = endpoint, first
+                    yield content
+            except openai.BadRequestError:
+                # 요청 자체가 잘못된 경우(컨텍스트 초과 등)는 다른 엔드포인트에서도 실패
+                raise
+            except Exception as e:
+                health.on_failure()
+                recorded = True
+                if first is not None:
+                    raise  # 이미 출력한 내용이 있으므로 대체하지 않음
+                self.errors.append((endpoint.name, e))
+                continue
+            else:
+                if first is None:
+                    # 빈 응답으로 정상 종료
+                    first = time.perf_counter() - started
+                    health.on_first_token(first)
+                    self.endpoint, self.ttft = endpoint, first
+                # 성공은 스트림이 끝까지 온 뒤에만 기록 (중간에 끊기면 실패 하나로만 셈)
+                health.on_success(first)
+                recorded = True
+            finally:
+                chunks.close()
+                if not recorded:
+                    health.breaker.release()  # 결과 없이 끝난 시험 요청 (사용자가 멈춘 경우 등)
+            return
+
+        if self.errors:
+            raise RuntimeError(
+                "모든 엔드포인트가 실패했습니다: "
+                + ", ".join(f"{name} ({type(e).__name__})" for name, e in self.errors)
+            ) from self.errors[-1][1]
+        retry_in = min(router.health[e].breaker.retry_in() for e in router.endpoints)
+        raise RuntimeError(f"모든 엔드포인트의 회로가 열려 있습니다. {retry_in:.0f}초 뒤에 다시 시도하세요.")
+
+
+def _ttft_key(ttft):
+    return float("inf") if ttft is None else ttft
+
+
+class Router:
+    """
+    대체 경로 + 서킷 브레이커 + 지연 시간 기반 라우터
+
+    Args:
+        endpoints: Endpoint 리스트 (대체 경로 순서)
+        strategy: "ordered"면 항상 리스트 순서, "latency"면 최근 TTFT가 짧은 순서
+            (TTFT 측정값이 없는 엔드포인트는 측정된 엔드포인트 뒤에 리스트 순서대로 시도)
+        timeout: 연결/첫 토큰/토큰 사이 대기 시간 상한(초). 넘으면 실패로 보고 다음 엔드포인트로
+        failure_threshold, cooldown, slow_ttft: CircuitBreaker 설정
+        ewma_alpha: TTFT 이동 평균 가중치
+    """
+
+    def __init__(self, endpoints, strategy="latency", timeout=10.0, failure_threshold=3,
+                 cooldown=30.0, slow_ttft=None, ewma_alpha=0.3):
+        if not endpoints:
+            raise ValueError("엔드포인트가 최소 하나 필요합니다.")
+        if strategy not in ("ordered", "latency"):
+            raise ValueError(f"알 수 없는 전략입니다: {strategy}")
+        for endpoint in endpoints:
+            get_provider(endpoint.provider)
+        self.endpoints = list(endpoints)
+        self.strategy = strategy
+        self.timeout = httpx.Timeout(timeout)
+        self.health = {
+            endpoint: EndpointHealth(CircuitBreaker(failure_threshold, cooldown, slow_ttft), ewma_alpha)
+            for endpoint in self.endpoints
+        }
+
+    def ordered(self):
+        """이번 요청에서 시도할 엔드포인트 순서 (회로 상태는 시도할 때 확인)"""
+        if self.strategy == "ordered":
+            return list(self.endpoints)
+        # 계속 실패하는 엔드포인트도 TTFT가 없으므로, 측정 전인 엔드포인트를 앞에 두면
+        # 매 요청마다 timeout을 기다리게 됩니다. 측정값이 없으면 맨 뒤 (안정 정렬이라 그 안에서는 리스트 순서)
+        return sorted(self.endpoints, key=lambda e: _ttft_key(self.health[e].ttft))
+
+    def stream(self, messages, temperature=0.7, max_tokens=1000, **extra):
+        return RoutedStream(self, messages, temperature, max_tokens, extra)
+
+    def stream_chat(self, messages, model=None, temperature=0.7, max_tokens=1000, **extra):
+        """run_chat_loop(stream_fn=...)용 (model은 무시하고 엔드포인트의 모델 사용)"""
+        return self.stream(messages, temperature, max_tokens, **extra)
+
+    def warmup(self):
+        """모든 제공자의 커넥션을 백그라운드에서 미리 엽니다."""
+        for provider in {endpoint.provider for endpoint in self.endpoints}:
+            warmup(provider)
+
+    def status(self):
+        """엔드포인트별 상태 요약"""
+        return [
+            {
+                "endpoint": endpoint.name,
+                "state": self.health[endpoint].breaker.state,
+                "ttft": self.health[endpoint].ttft,
+                "requests": self.health[endpoint].requests,
+                "failures": self.health[endpoint].failures,
+            }
+            for endpoint in self.ordered()
+        ]
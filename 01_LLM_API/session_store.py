@@ -0,0 +1,333 @@
+"""
+추가 전용(append-only) 대화 세션 저장소
+
+'quit'를 입력하거나 프로세스가 죽으면 messages가 사라집니다.
+SessionStore는 세션마다 두 파일에 대화를 저장합니다.
+
+  {세션}.log  메시지 JSON을 한 줄씩 이어 붙이는 로그 (덮어쓰지 않음)
+  {세션}.idx  메시지마다 (로그 오프셋, 길이)를 12바이트로 기록한 인덱스
+
+인덱스가 기준이므로 세션을 이어서 열 때는
+인덱스 끝부분만 읽고 필요한 메시지(시스템 프롬프트 + 토큰 예산 안의 최근 턴)만
+로그에서 찾아 읽습니다. 세션 길이와 관계없이 읽는 양이 일정합니다.
+
+  - fsync는 매 메시지가 아니라 fsync_interval마다 백그라운드 스레드에서 묶어서 처리
+  - 실패한 턴 되돌리기(truncate)는 인덱스만 줄이고, 로그에 남은 죽은 레코드는
+    죽은 비율이 compact_ratio를 넘으면 백그라운드에서 압축(compaction)해서 정리
+
+사용 예:
+  store = SessionStore("sessions")
+  store.append("alice", {"role": "user", "content": "안녕"})
+  messages, skipped = store.load_recent("alice", budget=8000, count_tokens=count_message_tokens)
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+
+_ENTRY = struct.Struct("<QI")  # (로그 오프셋, 레코드 길이)
+_SAFE_ID = re.compile(r"[A-Za-z0-9_.-]{1,100}")
+
+
+def _read_at(file, size, offset):
+    """offset부터 size바이트 읽기 (os.pread는 Windows에 없으므로 seek + read, files.lock 안에서 호출).
+    파일은 추가 모드(a+b)로 열었으므로 읽으려고 옮긴 위치와 상관없이 쓰기는 항상 끝에 붙습니다."""
+    file.seek(offset)
+    return file.read(size)
+
+
+def _file_stem(session_id):
+    """세션 id를 파일 이름으로 (안전하지 않은 문자가 있으면 해시)"""
+    if _SAFE_ID.fullmatch(session_id) and not session_id.startswith("."):
+        return session_id
+    return "h-" + hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+
+class _SessionFiles:
+    """세션 하나의 로그/인덱스 파일 핸들"""
+
+    def __init__(self, log_path, idx_path):
+        self.log_path = log_path
+        self.idx_path = idx_path
+        self.lock = threading.RLock()
+        self._open()
+        self.dirty = False
+        self.dead_bytes = None  # 처음 필요할 때 계산
+
+    def _recover(self):
+        """압축 도중 죽었을 때 남은 임시 파일 정리"""
+        tmp_log = self.log_path.with_suffix(".log.tmp")
+        tmp_idx = self.idx_path.with_suffix(".idx.tmp")
+        if tmp_log.exists():
+            # 아직 아무것도 교체하지 않았으므로 기존 파일이 그대로 유효
+            tmp_log.unlink()
+            tmp_idx.unlink(missing_ok=True)
+        elif tmp_idx.exists():
+            # 로그는 이미 새 파일 → 인덱스도 새 파일로
+            os.replace(tmp_idx, self.idx_path)
+
+    def _open(self):
+        self._recover()
+        self.log = open(self.log_path, "a+b")
+        self.idx = open(self.idx_path, "a+b")
+        self.log_size = self.log.seek(0, os.SEEK_END)
+        idx_size = self.idx.seek(0, os.SEEK_END)
+        # 인덱스를 쓰다가 죽어서 잘린 마지막 엔트리는 버립니다
+        self.count = idx_size // _ENTRY.size
+        if idx_size % _ENTRY.size:
+            self.idx.truncate(self.count * _ENTRY.size)
+
+    def entries(self, start, stop):
+        """인덱스 엔트리 [start, stop) 읽기"""
+        if stop <= start:
+            return []
+        raw = _read_at(self.idx, (stop - start) * _ENTRY.size, start * _ENTRY.size)
+        return [_ENTRY.unpack_from(raw, i * _ENTRY.size) for i in range(stop - start)]
+
+    def read_records(self, entries):
+        """엔트리들이 가리키는 메시지 읽기 (가까이 붙어 있으면 한 번에 읽음)"""
+        if not entries:
+            return []
+        first = min(offset for offset, _ in entries)
+        last = max(offset + length for offset, length in entries)
+        if last - first <= 2 * sum(length for _, length in entries):
+            span = _read_at(self.log, last - first, first)
+            raws = [span[offset - first:offset - first + length] for offset, length in entries]
+        else:
+            raws = [_read_at(self.log, length, offset) for offset, length in entries]
+        return [json.loads(raw) for raw in raws]
+
+    def live_bytes(self):
+        return sum(length for _, length in self.entries(0, self.count))
+
+    def sync(self):
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        self.idx.flush()
+        os.fsync(self.idx.fileno())
+        self.dirty = False
+
+    def close(self):
+        self.log.close()
+        self.idx.close()
+
+
+class SessionStore:
+    """
+    세션별 append-only 로그 + 오프셋 인덱스 저장소
+
+    Args:
+        root: 저장 디렉토리
+        fsync_interval: 디스크 동기화 주기(초). 0이면 매 append마다 fsync
+        compact_ratio: 로그에서 죽은 레코드 비율이 이 값을 넘으면 압축
+        compact_min_bytes: 죽은 레코드가 이 크기 이상일 때만 압축
+    """
+
+    def __init__(self, root="sessions", fsync_interval=1.0, compact_ratio=0.5,
+                 compact_min_bytes=64 * 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._files = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._worker = None
+        if fsync_interval > 0:
+            self._worker = threading.Thread(target=self._background, name="session-store", daemon=True)
+            self._worker.start()
+
+    def _session(self, session_id):
+        with self._lock:
+            files = self._files.get(session_id)
+            if files is None:
+                stem = _file_stem(session_id)
+                files = _SessionFiles(self.root / f"{stem}.log", self.root / f"{stem}.idx")
+                self._files[session_id] = files
+            return files
+
+    # ------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------
+
+    def append(self, session_id, message):
+        """메시지 하나를 로그 끝에 추가하고 인덱스에 위치를 기록합니다."""
+        self.extend(session_id, [message])
+
+    def extend(self, session_id, messages):
+        files = self._session(session_id)
+        with files.lock:
+            records = [json.dumps(m, ensure_ascii=False).encode("utf-8") + b"\n" for m in messages]
+            entries = []
+            offset = files.log_size
+            for record in records:
+                entries.append(_ENTRY.pack(offset, len(record) - 1))  # 길이는 줄바꿈 제외
+                offset += len(record)
+            # 로그를 먼저 쓰고 인덱스를 씁니다 (인덱스에 없는 레코드는 무시되므로 안전)
+            files.log.write(b"".join(records))
+            files.log.flush()
+            files.idx.write(b"".join(entries))
+            files.idx.flush()
+            files.log_size = offset
+            files.count += len(records)
+            files.dirty = True
+            if self.fsync_interval <= 0:
+                files.sync()
+
+    def truncate(self, session_id, length):
+        """메시지를 앞에서부터 length개만 남깁니다. 로그의 레코드는 압축 때 정리됩니다."""
+        files = self._session(session_id)
+        with files.lock:
+            if length >= files.count:
+                return
+            dropped = sum(n + 1 for _, n in files.entries(length, files.count))
+            files.idx.truncate(length * _ENTRY.size)
+            files.idx.seek(0, os.SEEK_END)
+            files.count = length
+            files.dirty = True
+            if files.dead_bytes is not None:
+                files.dead_bytes += dropped
+
+    def delete(self, session_id):
+        with self._lock:
+            files = self._files.pop(session_id, None)
+        stem = _file_stem(session_id)
+        if files is not None:
+            with files.lock:
+                files.close()
+        for suffix in (".log", ".idx"):
+            (self.root / f"{stem}{suffix}").unlink(missing_ok=True)
+
+    # ------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------
+
+    def exists(self, session_id):
+        return (self.root / f"{_file_stem(session_id)}.idx").exists()
+
+    def length(self, session_id):
+        """저장된 메시지 수 (인덱스 크기로 계산, 로그는 읽지 않음)"""
+        if session_id not in self._files and not self.exists(session_id):
+            return 0
+        return self._session(session_id).count
+
+    def load(self, session_id, start=0, stop=None):
+        """메시지 [start, stop) 읽기"""
+        files = self._session(session_id)
+        with files.lock:
+            stop = files.count if stop is None else min(stop, files.count)
+            return files.read_records(files.entries(start, stop))
+
+    def load_recent(self, session_id, budget, count_tokens, batch=32):
+        """
+        첫 메시지(시스템 프롬프트) + 토큰 예산 안에 들어가는 최근 메시지를 읽습니다.
+
+        인덱스 끝에서부터 batch개씩 거꾸로 읽으므로 세션이 길어도 필요한 만큼만 읽습니다.
+
+        Args:
+            session_id: 세션 id
+            budget: 토큰 예산 (None이면 전체)
+            count_tokens: 메시지 토큰 수 함수 (chat_history.count_message_tokens)
+
+        Returns:
+            (messages, skipped): skipped는 읽지 않고 건너뛴 앞쪽 메시지 수 (시스템 프롬프트 제외)
+        """
+        files = self._session(session_id)
+        with files.lock:
+            if files.count == 0:
+                return [], 0
+            system = files.read_records(files.entries(0, 1))[0]
+            if budget is None:
+                return [system] + files.read_records(files.entries(1, files.count)), 0
+
+            used = count_tokens(system)
+            recent = []
+            stop = files.count
+            while stop > 1:
+                start = max(1, stop - batch)
+                chunk = files.read_records(files.entries(start, stop))
+                for message in reversed(chunk):
+                    cost = count_tokens(message)
+                    if recent and used + cost > budget:
+                        return [system] + recent[::-1], files.count - 1 - len(recent)
+                    used += cost
+                    recent.append(message)
+                stop = start
+            return [system] + recent[::-1], 0
+
+    def sessions(self):
+        """저장된 세션 파일 이름 목록 (해시된 id는 h-로 시작)"""
+        return sorted(path.stem for path in self.root.glob("*.idx"))
+
+    # ------------------------------------------------------------
+    # fsync / 압축
+    # ------------------------------------------------------------
+
+    def flush(self):
+        """밀린 쓰기를 모두 디스크에 동기화"""
+        with self._lock:
+            files_list = list(self._files.values())
+        for files in files_list:
+            with files.lock:
+                if files.dirty and not files.log.closed:
+                    files.sync()
+
+    def compact(self, session_id):
+        """살아 있는 레코드만 새 로그/인덱스로 옮기고 원자적으로 교체합니다."""
+        files = self._session(session_id)
+        with files.lock:
+            entries = files.entries(0, files.count)
+            tmp_log = files.log_path.with_suffix(".log.tmp")
+            tmp_idx = files.idx_path.with_suffix(".idx.tmp")
+            with open(tmp_log, "wb") as log, open(tmp_idx, "wb") as idx:
+                offset = 0
+                for old_offset, length in entries:
+                    log.write(_read_at(files.log, length + 1, old_offset))
+                    idx.write(_ENTRY.pack(offset, length))
+                    offset += length + 1
+                log.flush()
+                os.fsync(log.fileno())
+                idx.flush()
+                os.fsync(idx.fileno())
+            files.close()
+            # 로그 → 인덱스 순서로 교체합니다. 그 사이에 죽으면 .idx.tmp만 남고,
+            # 다음에 열 때 _recover()가 인덱스 교체를 마저 끝냅니다.
+            os.replace(tmp_log, files.log_path)
+            os.replace(tmp_idx, files.idx_path)
+            files._open()
+            files.dead_bytes = 0
+            files.dirty = False
+
+    def _needs_compaction(self, files):
+        with files.lock:
+            if files.dead_bytes is None:
+                files.dead_bytes = files.log_size - (files.live_bytes() + files.count)
+            return (files.dead_bytes >= self.compact_min_bytes
+                    and files.dead_bytes >= self.compact_ratio * files.log_size)
+
+    def _background(self):
+        while not self._closed.wait(self.fsync_interval):
+            try:
+                self.flush()
+                with self._lock:
+                    items = list(self._files.items())
+                for session_id, files in items:
+                    if self._needs_compaction(files):
+                        self.compact(session_id)
+            except Exception as e:
+                print(f"[세션 저장소] 백그라운드 작업 오류: {e}")
+
+    def close(self):
+        self._closed.set()
+        if self._worker is not None:
+            self._worker.join()
+        self.flush()
+        with self._lock:
+            for files in self._files.values():
+                files.close()
+            self._files.clear()
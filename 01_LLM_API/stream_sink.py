@@ -0,0 +1,170 @@
+"""
+스트리밍 응답 출력용 싱크(sink)
+
+토큰마다 `full_response += content`와 `print(..., flush=True)`를 하면
+문자열이 매번 다시 할당되고, 토큰 하나당 write 시스템 콜이 한 번씩 발생합니다.
+StreamBuffer는
+  - 전체 응답은 리스트에 모아 두었다가 마지막에 한 번만 join 하고
+  - 출력은 시간(기본 30ms) 또는 크기(기본 4KB) 기준으로 모아서 한 번에 내보내며
+    (다음 토큰이 늦게 와도 타이머가 마감 시간에 남은 조각을 내보냄)
+  - 터미널, 로그 파일, 소켓 등 여러 싱크로 동시에 보냅니다.
+
+사용 예:
+  buffer = StreamBuffer([TerminalSink(), FileSink("chat.log")])
+  for content in stream_chat(...):
+      buffer.write(content)
+  buffer.flush()
+  full_response = buffer.text()
+"""
+
+import sys
+import threading
+import time
+
+
+class StreamSink:
+    """출력 대상 기본 클래스. write()는 모아 둔 텍스트 묶음을 한 번에 받습니다."""
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class TerminalSink(StreamSink):
+    """표준 출력(또는 지정한 텍스트 스트림)으로 출력"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, text):
+        self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        # 표준 출력은 닫지 않습니다
+        self.flush()
+
+
+class FileSink(StreamSink):
+    """로그 파일에 이어 쓰기"""
+
+    def __init__(self, path, encoding="utf-8"):
+        self.file = open(path, "a", encoding=encoding)
+
+    def write(self, text):
+        self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class SocketSink(StreamSink):
+    """연결된 소켓으로 UTF-8 바이트 전송"""
+
+    def __init__(self, sock, encoding="utf-8"):
+        self.sock = sock
+        self.encoding = encoding
+
+    def write(self, text):
+        self.sock.sendall(text.encode(self.encoding))
+
+    def close(self):
+        self.sock.close()
+
+
+class StreamBuffer:
+    """
+    스트리밍 조각을 모아서 여러 싱크로 묶음 단위로 내보내는 버퍼
+
+    Args:
+        sinks: 출력 대상 리스트
+        flush_interval: 마지막 출력 후 이 시간(초)이 지나면 출력
+            (다음 write()가 없어도 데몬 타이머 스레드가 마감 시간에 출력)
+        flush_bytes: 모인 텍스트가 이 크기(문자 수)를 넘으면 출력
+    """
+
+    def __init__(self, sinks, flush_interval=0.03, flush_bytes=4096):
+        self.sinks = list(sinks)
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._chunks = []    # 전체 응답
+        self._pending = []   # 아직 출력하지 않은 조각
+        self._pending_size = 0
+        self._last_flush = None  # 첫 조각은 바로 출력해서 첫 토큰 지연을 늘리지 않음
+        self._timer = None
+        self._lock = threading.RLock()  # 타이머 스레드와 싱크 출력이 겹치지 않도록
+
+    def write(self, content):
+        with self._lock:
+            self._chunks.append(content)
+            self._pending.append(content)
+            self._pending_size += len(content)
+            now = time.monotonic()
+            if (self._last_flush is None
+                    or self._pending_size >= self.flush_bytes
+                    or now - self._last_flush >= self.flush_interval):
+                self._emit(now)
+            elif self._timer is None:
+                # 스트림이 느려서 다음 조각이 늦게 와도 마감 시간에는 출력
+                self._timer = threading.Timer(self._last_flush + self.flush_interval - now, self._on_deadline)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_deadline(self):
+        with self._lock:
+            self._timer = None
+            self._emit(time.monotonic())
+
+    def _emit(self, now):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        for sink in self.sinks:
+            sink.write(text)
+            sink.flush()
+        self._last_flush = now
+
+    def broadcast(self, text):
+        """응답에 포함되지 않는 텍스트(이름표, 줄바꿈 등)를 모든 싱크로 바로 출력"""
+        with self._lock:
+            self.flush()
+            for sink in self.sinks:
+                sink.write(text)
+                sink.flush()
+
+    def flush(self):
+        """남은 조각을 모두 출력 (응답이 끝났을 때 호출)"""
+        with self._lock:
+            self._emit(time.monotonic())
+
+    def text(self):
+        """지금까지 받은 전체 응답"""
+        return "".join(self._chunks)
+
+    def reset(self):
+        """다음 응답을 위해 버퍼 비우기 (싱크는 유지)"""
+        with self._lock:
+            self.flush()
+            self._chunks = []
+            self._last_flush = None
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            for sink in self.sinks:
+                sink.close()
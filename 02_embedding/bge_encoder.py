@@ -0,0 +1,199 @@
+"""
+BGE-M3 인코더 백엔드 선택 (PyTorch fp32 / ONNX Runtime / ONNX int8)
+
+SentenceTransformer('BAAI/bge-m3')는 CPU에서 PyTorch fp32로 동작하고, 예제에서 가장 큰 CPU 비용입니다.
+load_bge_m3()는 같은 SentenceTransformer 객체를 돌려주되 백엔드를 고를 수 있습니다.
+
+  torch      PyTorch fp32 (기준, 기본값)
+  onnx       ONNX로 내보낸 뒤 그래프 최적화(O2: 연산 융합)한 fp32 모델
+  onnx-int8  위 모델을 동적 int8 양자화 (CPU 명령어셋에 맞춰 avx512_vnni / avx512 / avx2 / arm64)
+
+내보낸 모델은 output/models/bge-m3-onnx/onnx/ 아래에 저장해 두고 다음부터 그대로 불러옵니다.
+백엔드는 인자 또는 BGE_M3_BACKEND 환경 변수로 고릅니다.
+
+  model = load_bge_m3()                       # BGE_M3_BACKEND 또는 torch
+  model = load_bge_m3("onnx-int8")
+  embeddings = model.encode(texts, normalize_embeddings=True)
+
+일치도 확인 + 처리량 벤치마크 (기준은 torch):
+  python 02_embedding/bge_encoder.py --backends torch onnx onnx-int8
+    - 문서별 기준 임베딩과의 코사인 유사도 (평균/최소)
+    - 한국어 평가 세트(korean_eval.py) recall@k, 기준 상위 k개와 겹치는 비율
+    - 초당 인코딩 문장 수
+
+필요한 패키지:
+  uv add sentence-transformers                  # torch
+  uv add "sentence-transformers[onnx]"          # onnx, onnx-int8 (optimum, onnxruntime)
+"""
+
+import argparse
+import os
+import platform
+import time
+from pathlib import Path
+
+# sentence_transformers(→ torch)는 import만 몇 초 걸리므로 모델을 실제로 로드할 때 가져옵니다
+
+MODEL_NAME = "BAAI/bge-m3"
+EXPORT_DIR = Path("output") / "models" / "bge-m3-onnx"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# O3 이상은 GELU 근사(O3)나 fp16(O4, GPU 전용)이 들어가 결과가 달라지므로 CPU에서는 O2까지만 씁니다
+OPTIMIZATION_LEVEL = "O2"
+
+
+def quantization_target():
+    """현재 CPU에 맞는 동적 양자화 설정 이름 (optimum AutoQuantizationConfig)"""
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "arm64"
+    flags = set()
+    try:
+        with open("/proc/cpuinfo", 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = set(line.split(":", 1)[1].split())
+                    break
+    except OSError:
+        pass
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def onnx_file_name(backend):
+    """백엔드별로 불러올 ONNX 파일 (내보내기 디렉토리 기준 상대 경로)"""
+    if backend == "onnx":
+        return f"onnx/model_{OPTIMIZATION_LEVEL}.onnx"
+    return f"onnx/model_{OPTIMIZATION_LEVEL}_qint8_{quantization_target()}.onnx"
+
+
+def export_onnx(backend, model_name=MODEL_NAME, export_dir=EXPORT_DIR):
+    """
+    backend에 필요한 ONNX 파일이 없으면 내보내고 (ONNX 변환 → O2 최적화 → int8 양자화) 경로를 반환합니다.
+    """
+    from sentence_transformers import (SentenceTransformer, export_dynamic_quantized_onnx_model,
+                                       export_optimized_onnx_model)
+
+    export_dir = Path(export_dir)
+    target = export_dir / onnx_file_name(backend)
+    if target.exists():
+        return target
+
+    if not (export_dir / "onnx" / "model.onnx").exists():
+        print(f"{model_name}을(를) ONNX로 내보내는 중... ({export_dir})")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(str(export_dir))
+
+    optimized = export_dir / onnx_file_name("onnx")
+    if not optimized.exists():
+        print(f"ONNX 그래프 최적화 중... ({OPTIMIZATION_LEVEL})")
+        model = SentenceTransformer(str(export_dir), backend="onnx")
+        export_optimized_onnx_model(model, OPTIMIZATION_LEVEL, str(export_dir))
+
+    if backend == "onnx-int8":
+        config = quantization_target()
+        print(f"동적 int8 양자화 중... ({config})")
+        model = SentenceTransformer(str(export_dir), backend="onnx",
+                                    model_kwargs={"file_name": onnx_file_name("onnx")})
+        export_dynamic_quantized_onnx_model(model, config, str(export_dir),
+                                            file_suffix=f"{OPTIMIZATION_LEVEL}_qint8_{config}")
+    return target
+
+
+def load_bge_m3(backend=None, model_name=MODEL_NAME, export_dir=EXPORT_DIR, threads=None):
+    """
+    BGE-M3 SentenceTransformer 로드
+
+    Args:
+        backend: "torch", "onnx", "onnx-int8" (None이면 BGE_M3_BACKEND 환경 변수, 없으면 "torch")
+        model_name: Hugging Face 모델 이름
+        export_dir: ONNX 모델을 내보내 둘 디렉토리
+        threads: 연산 스레드 수 (None이면 라이브러리 기본값, 보통 전체 코어)
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or os.getenv("BGE_M3_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"backend는 {BACKENDS} 중 하나여야 합니다: {backend}")
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+
+    export_onnx(backend, model_name, export_dir)
+    model_kwargs = {"file_name": onnx_file_name(backend), "provider": "CPUExecutionProvider"}
+    if threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = session_options
+    return SentenceTransformer(str(export_dir), backend="onnx", model_kwargs=model_kwargs)
+
+
+# ------------------------------------------------------------
+# 일치도 확인 + 벤치마크
+# ------------------------------------------------------------
+
+def run_benchmark(backends, k, repeat, batch_size):
+    import numpy as np
+
+    from korean_eval import DOCUMENTS, QUERIES, overlap_at_k, recall_at_k
+    from similarity import SimilarityIndex
+
+    queries = [query for query, _ in QUERIES]
+    answers = [answer for _, answer in QUERIES]
+    corpus = DOCUMENTS * repeat
+
+    reference = None
+    rows = []
+    for backend in backends:
+        start = time.perf_counter()
+        model = load_bge_m3(backend)
+        load_seconds = time.perf_counter() - start
+
+        doc_embeddings = model.encode(DOCUMENTS, batch_size=batch_size, normalize_embeddings=True)
+        query_embeddings = model.encode(queries, batch_size=batch_size, normalize_embeddings=True)
+        _, retrieved = SimilarityIndex(doc_embeddings).search(query_embeddings, k)
+
+        # 처리량: 첫 호출(워밍업)은 위에서 끝났으므로 여기서는 순수 인코딩 시간만 잽니다
+        start = time.perf_counter()
+        model.encode(corpus, batch_size=batch_size, normalize_embeddings=True)
+        throughput = len(corpus) / (time.perf_counter() - start)
+
+        if reference is None:
+            reference = {"backend": backend, "docs": doc_embeddings, "retrieved": retrieved,
+                         "throughput": throughput}
+        cosines = np.sum(doc_embeddings * reference["docs"], axis=1)
+        rows.append((backend, load_seconds, float(cosines.mean()), float(cosines.min()),
+                     recall_at_k(retrieved, answers, 1), recall_at_k(retrieved, answers, k),
+                     overlap_at_k(retrieved, reference["retrieved"], k),
+                     throughput, throughput / reference["throughput"]))
+        del model
+
+    print(f"\n기준: {reference['backend']} | 문서 {len(DOCUMENTS)}개, 질문 {len(QUERIES)}개, "
+          f"처리량 측정 {len(corpus)}문장 (batch_size={batch_size})")
+    print(f"{'backend':<10} {'로드(s)':>8} {'cos 평균':>9} {'cos 최소':>9} {'R@1':>6} {f'R@{k}':>6} "
+          f"{f'겹침@{k}':>7} {'문장/s':>8} {'배속':>6}")
+    for backend, load_seconds, cos_mean, cos_min, r1, rk, overlap, throughput, speedup in rows:
+        print(f"{backend:<10} {load_seconds:>8.1f} {cos_mean:>9.4f} {cos_min:>9.4f} {r1:>6.2f} {rk:>6.2f} "
+              f"{overlap:>7.2f} {throughput:>8.1f} {speedup:>5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BGE-M3 백엔드 일치도 확인 + 처리량 벤치마크")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS),
+                        help="비교할 백엔드 (첫 번째가 기준)")
+    parser.add_argument("--k", type=int, default=3, help="recall@k의 k")
+    parser.add_argument("--repeat", type=int, default=8, help="처리량 측정 시 문서 세트 반복 횟수")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    run_benchmark(args.backends, args.k, args.repeat, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
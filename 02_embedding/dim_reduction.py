@@ -0,0 +1,231 @@
+"""
+임베딩 차원 축소 (Matryoshka 자르기 / PCA / 랜덤 투영)
+
+text-embedding-3-large는 3072차원, BGE-M3는 1024차원 벡터를 그대로 저장합니다.
+256~512차원으로 줄이면 벡터 저장소 크기와 검색 시간이 몇 배 줄어듭니다.
+
+  - OpenAI text-embedding-3: get_embeddings(..., dimensions=256)으로 API가 줄인 벡터를 받습니다.
+    (앞쪽 차원만 남기고 다시 정규화한 것과 같으므로 Projection.truncate로 미리 평가할 수 있음)
+  - BGE-M3 등 dimensions를 지원하지 않는 모델: 말뭉치 표본으로 PCA 또는 랜덤 투영을 학습해서
+    .npz로 저장해 두고 문서와 질문에 똑같이 적용합니다.
+
+  projection = Projection.fit_pca(doc_embeddings, 256)
+  projection.save("output/models/bge-m3-pca256.npz")
+  ...
+  projection = Projection.load("output/models/bge-m3-pca256.npz")
+  reduced = projection.transform(model.encode(texts, normalize_embeddings=True))
+
+차원별 recall@k 비교 (원래 차원 검색 결과 대비 상위 k개가 얼마나 겹치는지):
+  python 02_embedding/dim_reduction.py --store output/my_corpus --dims 128 256 512
+  python 02_embedding/dim_reduction.py --texts corpus.txt --model bge-m3 --method pca --save 256
+  python 02_embedding/dim_reduction.py --texts corpus.txt --model text-embedding-3-large --method truncate
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from similarity import SimilarityIndex, normalize
+
+METHODS = ("pca", "random", "truncate")
+MODELS_DIR = Path("output") / "models"
+
+
+class Projection:
+    """
+    (원래 차원 → dim) 선형 투영. transform 결과는 다시 단위 벡터로 정규화합니다.
+
+    Args:
+        components: (원래 차원, dim) 투영 행렬
+        mean: 투영 전에 뺄 평균 벡터 (PCA, 없으면 None)
+        method: "pca", "random", "truncate"
+        meta: 저장할 부가 정보 (모델 이름, 학습 표본 수 등)
+    """
+
+    def __init__(self, components, mean=None, method="pca", meta=None):
+        self.components = np.asarray(components, dtype=np.float32)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.method = method
+        self.meta = meta or {}
+
+    @property
+    def source_dim(self):
+        return self.components.shape[0]
+
+    @property
+    def dim(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit_pca(cls, vectors, dim, sample=20000, seed=0, meta=None):
+        """
+        말뭉치 표본으로 PCA 학습 (공분산 행렬의 고유 벡터 중 분산이 큰 dim개)
+
+        Args:
+            vectors: (n, 원래 차원) 임베딩
+            dim: 줄일 차원 (학습 표본 수 이하)
+            sample: 학습에 쓸 최대 표본 수
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) > sample:
+            rows = np.random.default_rng(seed).choice(len(vectors), sample, replace=False)
+            vectors = vectors[np.sort(rows)]
+        if dim > min(vectors.shape):
+            raise ValueError(f"PCA 차원({dim})은 표본 수와 원래 차원({min(vectors.shape)}) 이하여야 합니다.")
+        mean = vectors.mean(axis=0)
+        centered = (vectors - mean).astype(np.float64)
+        # 표본 수가 차원보다 많으므로 SVD 대신 (d × d) 공분산의 고유값 분해
+        covariance = centered.T @ centered / max(len(centered) - 1, 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dim]
+        explained = float(eigenvalues[order].sum() / eigenvalues.sum())
+        meta = {**(meta or {}), "fit_samples": len(vectors), "explained_variance": explained}
+        return cls(eigenvectors[:, order], mean, "pca", meta)
+
+    @classmethod
+    def random(cls, source_dim, dim, seed=0, meta=None):
+        """가우시안 랜덤 투영 (학습 없이 거리 비율을 대략 보존, Johnson–Lindenstrauss)"""
+        rng = np.random.default_rng(seed)
+        components = rng.standard_normal((source_dim, dim)) / np.sqrt(dim)
+        return cls(components, None, "random", {**(meta or {}), "seed": seed})
+
+    @classmethod
+    def truncate(cls, source_dim, dim, meta=None):
+        """앞쪽 dim개 차원만 남김 (OpenAI dimensions 파라미터와 같은 결과)"""
+        return cls(np.eye(source_dim, dim), None, "truncate", meta)
+
+    @classmethod
+    def fit(cls, method, vectors, dim, seed=0, meta=None):
+        source_dim = np.asarray(vectors).shape[1]
+        if method == "pca":
+            return cls.fit_pca(vectors, dim, seed=seed, meta=meta)
+        if method == "random":
+            return cls.random(source_dim, dim, seed=seed, meta=meta)
+        if method == "truncate":
+            return cls.truncate(source_dim, dim, meta=meta)
+        raise ValueError(f"method는 {METHODS} 중 하나여야 합니다: {method}")
+
+    def transform(self, vectors):
+        """(n, 원래 차원) → (n, dim) 정규화된 float32"""
+        vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+        if vectors.shape[1] != self.source_dim:
+            raise ValueError(f"입력 차원({vectors.shape[1]})이 투영의 원래 차원({self.source_dim})과 다릅니다.")
+        if self.mean is not None:
+            vectors = vectors - self.mean
+        return normalize(vectors @ self.components)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"components": self.components}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        np.savez(path, method=self.method, meta=json.dumps(self.meta, ensure_ascii=False), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            mean = data["mean"] if "mean" in data.files else None
+            return cls(data["components"], mean, str(data["method"]), json.loads(str(data["meta"])))
+
+
+# ------------------------------------------------------------
+# 차원별 recall@k 평가
+# ------------------------------------------------------------
+
+def evaluate(vectors, dims, method, k=10, queries=200, seed=0):
+    """
+    말뭉치 일부를 질문으로 떼어 내서, 원래 차원 검색의 상위 k개가 축소 차원 검색의 상위 k개에 몇 개나 들어가는지
+
+    Returns:
+        차원별 dict 리스트 (dim, recall, 벡터당 바이트, 검색 시간, 설명된 분산)
+    """
+    vectors = normalize(vectors)
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(vectors), min(queries, len(vectors) // 2), replace=False)
+    corpus_mask = np.ones(len(vectors), dtype=bool)
+    corpus_mask[query_rows] = False
+    corpus, query_vectors = vectors[corpus_mask], vectors[query_rows]
+    k = min(k, len(corpus))
+
+    full_index = SimilarityIndex(corpus)
+    start = time.perf_counter()
+    _, truth = full_index.search(query_vectors, k)
+    full_seconds = time.perf_counter() - start
+
+    rows = [{"dim": corpus.shape[1], "recall": 1.0, "bytes": corpus.shape[1] * 4,
+             "search_ms": full_seconds * 1000, "explained_variance": None}]
+    for dim in sorted(dims):
+        if dim >= corpus.shape[1]:
+            continue
+        try:
+            projection = Projection.fit(method, corpus, dim, seed=seed)
+        except ValueError as e:
+            print(f"{dim}차원 건너뜀: {e}")
+            continue
+        index = SimilarityIndex(projection.transform(corpus))
+        start = time.perf_counter()
+        _, found = index.search(projection.transform(query_vectors), k)
+        seconds = time.perf_counter() - start
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)])
+        rows.append({"dim": dim, "recall": float(recall), "bytes": dim * 4, "search_ms": seconds * 1000,
+                     "explained_variance": projection.meta.get("explained_variance")})
+    return rows
+
+
+def load_vectors(args):
+    """--store 또는 --texts에서 평가할 (n, d) 임베딩 읽기"""
+    from embedding_store import EmbeddingStore
+
+    if args.store:
+        store = EmbeddingStore(args.store)
+        return np.asarray(store.vectors()), store.model
+
+    texts = [line.strip() for line in open(args.texts, encoding="utf-8") if line.strip()]
+    if args.model == "bge-m3":
+        from model_client import load_encoder
+
+        vectors = load_encoder().encode(texts, normalize_embeddings=True)
+    else:
+        from eg_openai_embedding import get_embeddings
+
+        vectors = get_embeddings(texts, model=args.model)
+    return np.asarray(vectors, dtype=np.float32), args.model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="차원 축소 recall@k 평가")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", help="평가할 EmbeddingStore 디렉토리")
+    source.add_argument("--texts", help="한 줄에 문서 하나인 텍스트 파일 (--model로 임베딩)")
+    parser.add_argument("--model", default="bge-m3", help="--texts 임베딩 모델 (bge-m3 또는 OpenAI 모델)")
+    parser.add_argument("--method", choices=METHODS, default=None,
+                        help="축소 방법 (기본: OpenAI text-embedding-3는 truncate, 그 외 pca)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256, 384, 512, 768])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="말뭉치에서 질문으로 떼어 낼 개수")
+    parser.add_argument("--save", type=int, default=None, help="이 차원의 투영을 전체 말뭉치로 학습해서 저장")
+    args = parser.parse_args()
+
+    vectors, model = load_vectors(args)
+    method = args.method or ("truncate" if model and model.startswith("text-embedding-3") else "pca")
+    print(f"임베딩 {vectors.shape[0]}개 × {vectors.shape[1]}차원 ({model}), 방법: {method}, k={args.k}\n")
+
+    rows = evaluate(vectors, args.dims, method, args.k, args.queries)
+    print(f"{'차원':>6} {f'recall@{args.k}':>10} {'바이트/벡터':>11} {'검색(ms)':>9} {'설명 분산':>9}")
+    for row in rows:
+        explained = f"{row['explained_variance']:.3f}" if row["explained_variance"] is not None else "-"
+        print(f"{row['dim']:>6} {row['recall']:>10.3f} {row['bytes']:>11} {row['search_ms']:>9.2f} {explained:>9}")
+
+    if args.save:
+        projection = Projection.fit(method, vectors, args.save, meta={"model": model})
+        path = MODELS_DIR / f"{(model or 'embeddings').split('/')[-1]}-{method}{args.save}.npz"
+        projection.save(path)
+        print(f"\n투영 저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
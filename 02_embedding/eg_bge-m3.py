@@ -4,15 +4,18 @@ BGE-M3 임베딩 기본 예제
 BGE-M3는 다국어를 지원하는 강력한 임베딩 모델입니다.
 한국어, 영어 등 100개 이상의 언어를 지원합니다.
 
+모델 서버(model_server.py)가 떠 있으면 서버에 요청하고, 없으면 프로세스 안에서 모델을 로드합니다.
+BGE_M3_BACKEND=onnx-int8로 실행하면 ONNX Runtime int8 백엔드를 사용합니다. (bge_encoder.py)
+
 필요한 패키지:
   uv add sentence-transformers
 """
 
-from sentence_transformers import SentenceTransformer
+from model_client import load_encoder
 
-# BGE-M3 모델 로드
+# BGE-M3 모델 로드 (모델 서버가 있으면 서버 사용, 백엔드: BGE_M3_BACKEND 환경 변수)
 print("BGE-M3 모델을 로드하는 중...")
-model = SentenceTransformer('BAAI/bge-m3')
+model = load_encoder()
 print("모델 로드 완료!")
 
 # 임베딩할 텍스트
@@ -3,34 +3,88 @@ import numpy as np
 from dotenv import load_dotenv
 load_dotenv()
 import os
-# OpenAI 클라이언트 초기화
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
+import sys
+from pathlib import Path
 
-def get_embeddings(texts, model="text-embedding-3-small"):
+# 01_LLM_API의 공유 모듈 사용 (속도 제한 등)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "01_LLM_API"))
+from chat_history import count_text_tokens
+from rate_limit import get_limiter
+
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from similarity import SimilarityIndex
+
+# OpenAI 클라이언트는 처음 요청할 때 만듭니다
+# (import만 하는 스크립트와 시작 시간 측정이 OPENAI_API_KEY 없이도 동작하도록)
+_client = None
+
+def get_client():
+    """embeddings.create에 사용할 OpenAI 클라이언트 (처음 사용할 때 생성)"""
+    global _client
+    if _client is None:
+        # 재시도와 429 처리는 공유 리미터가 담당하므로 SDK 재시도는 끕니다
+        _client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+        )
+    return _client
+
+# 한 번 임베딩한 텍스트는 output/embedding_cache.sqlite에 저장해 두고 다시 호출하지 않습니다
+_cache = None
+
+def get_embedding_cache():
+    """get_embeddings가 사용하는 디스크 캐시 (처음 사용할 때 생성)"""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+def create_embeddings(texts, model="text-embedding-3-small", dimensions=None):
+    """embeddings.create 요청 한 번 (입력 개수/토큰 한도 안의 배치만 전달)"""
+    try:
+        # 제공자/모델별 RPM·TPM 한도와 동시성을 채팅 루프와 공유합니다 (01_LLM_API/rate_limit.py)
+        limiter = get_limiter("openai", model)
+        estimated_tokens = sum(count_text_tokens(text) for text in texts)
+        # text-embedding-3 모델은 dimensions로 앞쪽 차원만 남긴(Matryoshka) 정규화 벡터를 돌려줍니다
+        options = {"dimensions": dimensions} if dimensions else {}
+        client = get_client()
+        with limiter.request(
+            lambda: client.embeddings.create(model=model, input=texts, **options),
+            estimated_tokens=estimated_tokens,
+        ) as response:
+            return [item.embedding for item in response.data]
+    except Exception as e:
+        print(f"임베딩 생성 오류: {e}")
+        raise
+
+def get_embeddings(texts, model="text-embedding-3-small", use_cache=True, policy="truncate",
+                   concurrency=8, dimensions=None):
     """
     OpenAI API를 사용하여 텍스트 리스트의 임베딩 생성
     
+    입력이 많으면 요청 한도(입력 2048개, 30만 토큰) 안으로 나눠서 동시에 요청합니다. (embedding_batcher.py)
+    
     Args:
         texts: 임베딩할 텍스트 리스트
         model: 사용할 임베딩 모델
+        use_cache: True면 캐시에 없는 텍스트만 API로 임베딩
+        policy: 토큰 한도(8191)를 넘는 입력 처리 ("truncate", "chunk", "error")
+        concurrency: 동시에 보낼 요청 수
+        dimensions: 줄일 차원 수 (None이면 모델 기본값. 예: text-embedding-3-large 3072 → 256)
         
     Returns:
-        임베딩 벡터 리스트
+        임베딩 벡터 리스트 (texts와 같은 순서)
     """
-    try:
-        response = client.embeddings.create(
-            model=model,
-            input=texts
-        )
-        return [item.embedding for item in response.data]
-    except Exception as e:
-        print(f"임베딩 생성 오류: {e}")
-        raise
+    batcher = EmbeddingBatcher(lambda batch: create_embeddings(batch, model, dimensions),
+                               concurrency=concurrency, policy=policy)
+    if use_cache:
+        # 캐시 키에 차원이 들어가므로 같은 텍스트라도 차원별로 따로 저장됩니다
+        return get_embedding_cache().get_or_embed(texts, model, dimensions, batcher.embed)
+    return batcher.embed(texts)
 
 def cosine_similarity(vec1, vec2):
-    """두 벡터 간의 코사인 유사도 계산"""
+    """두 벡터 간의 코사인 유사도 계산 (여러 쌍은 similarity.SimilarityIndex로 한 번에)"""
     vec1 = np.array(vec1)
     vec2 = np.array(vec2)
     dot_product = np.dot(vec1, vec2)
@@ -89,10 +143,13 @@ def test_get_embeddings():
         (3, 4, "안녕하세요, 세계! vs 이것은 테스트입니다")
     ]
     
+    # 정규화는 한 번만 하고 전체 쌍 유사도를 행렬 곱 한 번으로 계산
+    similarities = SimilarityIndex(embeddings).pairwise()
     for idx1, idx2, description in pairs:
-        similarity = cosine_similarity(embeddings[idx1], embeddings[idx2])
+        similarity = similarities[idx1, idx2]
         print(f"{description}: {similarity:.4f}")
     
+    print(f"\n임베딩 캐시: {get_embedding_cache().stats()}")
     print("\n테스트 완료!")
 
 
@@ -1,23 +1,18 @@
-from openai import OpenAI
-from sklearn.manifold import TSNE
-import matplotlib.pyplot as plt
-import numpy as np
-import os
 import json
 from pathlib import Path
-from dotenv import load_dotenv
-load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
+from eg_openai_embedding import get_embedding_cache, get_embeddings
+from embedding_store import EmbeddingStore
+
+EMBEDDING_MODEL = "text-embedding-3-small"
 
 # 출력 디렉토리 생성
 output_dir = Path("output")
 output_dir.mkdir(exist_ok=True)
 
 # 파일 경로 설정
-embeddings_file = output_dir / "embeddings_2d.json"
+embeddings_dir = output_dir / "embeddings_2d"
+legacy_embeddings_file = output_dir / "embeddings_2d.json"
 image_file = output_dir / "embeddings_2d_visualization.png"
 
 # 예시 데이터: 비슷한 의미끼리 클러스터링되는 모습을 보여주기 위한 예시
@@ -56,50 +51,78 @@ for category, items in examples.items():
         categories.append(category)
 
 # 임베딩 로딩 또는 생성
-if embeddings_file.exists():
-    print(f"저장된 임베딩 파일을 로딩 중... ({embeddings_file})")
-    with open(embeddings_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        embeddings = data['embeddings']
-        saved_texts = data['texts']
-        saved_categories = data['categories']
-        
-        # 데이터가 일치하는지 확인
-        if saved_texts == texts and saved_categories == categories:
-            print("임베딩 로딩 완료!")
-        else:
-            print("데이터가 변경되어 새로 임베딩을 생성합니다.")
-            embeddings = None
+# 벡터는 바이너리 저장소(embedding_store.py)에 두고 메모리 맵으로 바로 읽습니다
+store = EmbeddingStore(embeddings_dir, model=EMBEDDING_MODEL)
+if len(store) and store.column("text") == texts and store.column("category") == categories:
+    print(f"저장된 임베딩을 로딩 중... ({embeddings_dir})")
+    embeddings_array = store.vectors()
+    print("임베딩 로딩 완료!")
 else:
-    embeddings = None
-
-# 임베딩이 없으면 새로 생성
-if embeddings is None:
-    print(f"총 {len(texts)}개의 예시 텍스트를 임베딩 생성 중...")
-    
-    # OpenAI API를 사용하여 임베딩 생성 (배치 처리로 효율화)
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=texts
-    )
-    embeddings = [item.embedding for item in response.data]
-    
+    # 텍스트별로 캐시하므로 예시 문장을 일부 바꿔도 바뀐 문장만 새로 임베딩합니다 (embedding_cache.py)
+    cache = get_embedding_cache()
+    if legacy_embeddings_file.exists():
+        # 이전 버전이 남긴 JSON 결과를 캐시에 넣어 두면 그대로인 텍스트는 API를 호출하지 않습니다
+        with open(legacy_embeddings_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        cache.put_many(EMBEDDING_MODEL, None, data['texts'], data['embeddings'])
+
+    print(f"총 {len(texts)}개의 예시 텍스트 임베딩 중... (캐시에 없는 텍스트만 API 호출)")
+    embeddings = get_embeddings(texts, model=EMBEDDING_MODEL)
+    stats = cache.stats()
+    print(f"임베딩 완료! (캐시 적중 {stats['hits']}개, 새로 생성 {stats['misses']}개)")
+
     # 임베딩 저장
-    print(f"임베딩을 파일에 저장 중... ({embeddings_file})")
-    with open(embeddings_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'texts': texts,
-            'categories': categories,
-            'embeddings': embeddings
-        }, f, ensure_ascii=False, indent=2)
-    
-    print("임베딩 생성 및 저장 완료!")
-
-# t-SNE 모델 생성 및 변환 (비슷한 의미끼리 클러스터링되는 모습을 보여줌)
+    print(f"임베딩을 저장 중... ({embeddings_dir})")
+    store.clear()
+    store.append(embeddings, [{"text": text, "category": category}
+                              for text, category in zip(texts, categories)])
+    embeddings_array = store.vectors()
+
+
+def reduce_to_2d(embeddings):
+    """t-SNE로 2차원 좌표 계산 (비슷한 의미끼리 클러스터링되는 모습을 보여줌)"""
+    # sklearn은 import만 1초 가까이 걸리므로 실제로 t-SNE를 돌릴 때 가져옵니다
+    from sklearn.manifold import TSNE
+
+    tsne = TSNE(n_components=2, perplexity=5, random_state=42, init='random', learning_rate=200)
+    return tsne.fit_transform(embeddings)
+
+
+def plot_clusters(vis_dims, texts, categories, category_colors, image_file):
+    """카테고리별 색으로 점과 라벨을 그려서 image_file로 저장"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 8))
+    for category in category_colors.keys():
+        indices = [i for i, cat in enumerate(categories) if cat == category]
+        x_coords = [vis_dims[i][0] for i in indices]
+        y_coords = [vis_dims[i][1] for i in indices]
+        plt.scatter(x_coords, y_coords, c=category_colors[category],
+                    label=category, alpha=0.6, s=100)
+        # 각 점에 텍스트 라벨 추가 (간단하게 표시)
+        for i, idx in enumerate(indices):
+            # 텍스트가 너무 길면 앞부분만 표시
+            label = texts[idx][:25] + "..." if len(texts[idx]) > 25 else texts[idx]
+            plt.annotate(label, (x_coords[i], y_coords[i]),
+                        fontsize=9, alpha=0.7, ha='left')
+
+    plt.title("Semantic Clustering with t-SNE", fontsize=14, fontweight='bold')
+    plt.xlabel("t-SNE Dimension 1", fontsize=12)
+    plt.ylabel("t-SNE Dimension 2", fontsize=12)
+    plt.legend(loc='best', fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+    # 이미지 파일로 저장
+    print(f"시각화 이미지 저장 중... ({image_file})")
+    plt.savefig(image_file, dpi=300, bbox_inches='tight')
+    print(f"이미지 저장 완료: {image_file}")
+
+    plt.show()
+
+
 print("t-SNE로 2D 시각화 중...")
-embeddings_array = np.array(embeddings)  # 리스트를 numpy 배열로 변환
-tsne = TSNE(n_components=2, perplexity=5, random_state=42, init='random', learning_rate=200)
-vis_dims = tsne.fit_transform(embeddings_array)
+vis_dims = reduce_to_2d(embeddings_array)
 
 # 카테고리별 색상 지정
 category_colors = {
@@ -110,33 +133,7 @@ category_colors = {
 }
 
 # 시각화
-plt.figure(figsize=(12, 8))
-for category in category_colors.keys():
-    indices = [i for i, cat in enumerate(categories) if cat == category]
-    x_coords = [vis_dims[i][0] for i in indices]
-    y_coords = [vis_dims[i][1] for i in indices]
-    plt.scatter(x_coords, y_coords, c=category_colors[category], 
-                label=category, alpha=0.6, s=100)
-    # 각 점에 텍스트 라벨 추가 (간단하게 표시)
-    for i, idx in enumerate(indices):
-        # 텍스트가 너무 길면 앞부분만 표시
-        label = texts[idx][:25] + "..." if len(texts[idx]) > 25 else texts[idx]
-        plt.annotate(label, (x_coords[i], y_coords[i]), 
-                    fontsize=9, alpha=0.7, ha='left')
-
-plt.title("Semantic Clustering with t-SNE", fontsize=14, fontweight='bold')
-plt.xlabel("t-SNE Dimension 1", fontsize=12)
-plt.ylabel("t-SNE Dimension 2", fontsize=12)
-plt.legend(loc='best', fontsize=10)
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-
-# 이미지 파일로 저장
-print(f"시각화 이미지 저장 중... ({image_file})")
-plt.savefig(image_file, dpi=300, bbox_inches='tight')
-print(f"이미지 저장 완료: {image_file}")
-
-plt.show()
+plot_clusters(vis_dims, texts, categories, category_colors, image_file)
 
 print("시각화 완료!")
 print("\n=== 결과 설명 ===")
@@ -0,0 +1,185 @@
+"""
+토큰 기준 임베딩 자동 배치 + 동시 요청
+
+embeddings.create 한 번에 보낼 수 있는 양에는 한도가 있습니다. (text-embedding-3 기준)
+  - 요청당 입력 개수: 2048개
+  - 입력 하나의 토큰 수: 8191 토큰
+  - 요청당 토큰 합계: 300,000 토큰
+한도를 넘으면 요청 전체가 실패하고, 반대로 작은 요청 하나씩 순서대로 보내면 병렬성을 쓰지 못합니다.
+
+EmbeddingBatcher는
+  1. 입력을 토큰화해서 길이를 재고
+  2. 입력 하나가 너무 길면 정책(policy)에 따라 자르거나(truncate) 나눠서(chunk) 임베딩한 뒤
+     토큰 수 가중 평균으로 합치고 (error면 ValueError)
+  3. 한도 안에서 요청 단위로 묶어
+  4. 최대 concurrency개 요청을 동시에 보낸 뒤 입력 순서대로 결과를 모읍니다.
+
+토큰 수는 tiktoken(cl100k_base, text-embedding-3의 토크나이저, 프로젝트 의존성)으로 정확히 셉니다.
+tiktoken이 없는 환경의 근사치는 한도를 넘지 않도록 보수적으로 셉니다. (한글 등 비ASCII는 바이트당 1토큰)
+
+사용 예:
+  batcher = EmbeddingBatcher(lambda batch: create_embeddings(batch, model), concurrency=8)
+  vectors = batcher.embed(texts)
+  print(batcher.stats)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # 미설치이거나, 오프라인이라 인코딩 파일을 내려받지 못한 경우 근사치 사용
+    _ENCODING = None
+
+MAX_INPUTS = 2048
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_TOKENS = 300_000
+
+POLICIES = ("truncate", "chunk", "error")
+
+
+def _approx_weight(char):
+    # 근사치 가중치 (3 = 1토큰): ASCII는 3글자당 1토큰, 비ASCII는 UTF-8 바이트당 1토큰.
+    # cl100k는 한글 음절 하나를 2~3토큰으로 나누기도 하므로, 바이트 수(토큰 수의 상한)로 셉니다
+    size = len(char.encode("utf-8"))
+    return 1 if size == 1 else 3 * size
+
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (sum(_approx_weight(char) for char in text) + 2) // 3
+
+
+def split_tokens(text, max_tokens):
+    """텍스트를 max_tokens 이하 조각들로 나눕니다."""
+    if _ENCODING is not None:
+        tokens = _ENCODING.encode(text, disallowed_special=())
+        return [_ENCODING.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+    # count_tokens와 같은 근사치 가중치로 문자 단위로 자름 (조각마다 count_tokens ≤ max_tokens)
+    pieces, current, current_weight = [], [], 0
+    limit = max_tokens * 3 - 2
+    for char in text:
+        weight = _approx_weight(char)
+        if current and current_weight + weight > limit:
+            pieces.append("".join(current))
+            current, current_weight = [], 0
+        current.append(char)
+        current_weight += weight
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+class EmbeddingBatcher:
+    """
+    토큰 한도를 지키는 임베딩 배치 + 동시 요청기
+
+    Args:
+        embed_fn: 텍스트 리스트 → 벡터 리스트 (API 요청 한 번)
+        max_inputs: 요청당 입력 개수 한도
+        max_input_tokens: 입력 하나의 토큰 한도
+        max_batch_tokens: 요청당 토큰 합계 한도
+        concurrency: 동시에 보낼 요청 수
+        policy: 입력이 max_input_tokens를 넘을 때 "truncate"(앞부분만), "chunk"(나눠서 평균), "error"
+    """
+
+    def __init__(self, embed_fn, max_inputs=MAX_INPUTS, max_input_tokens=MAX_INPUT_TOKENS,
+                 max_batch_tokens=MAX_BATCH_TOKENS, concurrency=8, policy="truncate"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy는 {POLICIES} 중 하나여야 합니다: {policy}")
+        self.embed_fn = embed_fn
+        self.max_inputs = max_inputs
+        self.max_input_tokens = max_input_tokens
+        self.max_batch_tokens = max_batch_tokens
+        self.concurrency = concurrency
+        self.policy = policy
+        self.stats = {"inputs": 0, "pieces": 0, "requests": 0, "tokens": 0, "truncated": 0, "chunked": 0}
+
+    def _pieces(self, texts):
+        """
+        입력을 요청에 넣을 조각으로 바꿉니다.
+
+        Returns:
+            (pieces, owners, weights): 조각 텍스트, 조각이 속한 입력 번호, 조각 토큰 수
+        """
+        pieces, owners, weights = [], [], []
+        for index, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if tokens <= self.max_input_tokens:
+                parts = [text]
+            elif self.policy == "error":
+                raise ValueError(f"{index}번째 입력이 {tokens}토큰으로 한도({self.max_input_tokens})를 넘습니다.")
+            elif self.policy == "truncate":
+                parts = split_tokens(text, self.max_input_tokens)[:1]
+                self.stats["truncated"] += 1
+            else:
+                parts = split_tokens(text, self.max_input_tokens)
+                self.stats["chunked"] += 1
+            for part in parts:
+                pieces.append(part)
+                owners.append(index)
+                weights.append(tokens if part is text else count_tokens(part))
+        return pieces, owners, weights
+
+    def plan(self, weights):
+        """조각들을 요청 단위 [start, stop) 범위로 묶습니다 (순서 유지)."""
+        batches = []
+        start, tokens = 0, 0
+        for i, weight in enumerate(weights):
+            if i > start and (i - start >= self.max_inputs or tokens + weight > self.max_batch_tokens):
+                batches.append((start, i))
+                start, tokens = i, 0
+            tokens += weight
+        if start < len(weights):
+            batches.append((start, len(weights)))
+        return batches
+
+    def embed(self, texts):
+        """texts의 임베딩 벡터 리스트 (입력 순서 유지)"""
+        texts = list(texts)
+        if not texts:
+            return []
+        pieces, owners, weights = self._pieces(texts)
+        batches = self.plan(weights)
+        self.stats["inputs"] += len(texts)
+        self.stats["pieces"] += len(pieces)
+        self.stats["requests"] += len(batches)
+        self.stats["tokens"] += sum(weights)
+
+        results = [None] * len(pieces)
+
+        def run(batch):
+            start, stop = batch
+            vectors = self.embed_fn(pieces[start:stop])
+            if len(vectors) != stop - start:
+                raise RuntimeError(f"요청한 {stop - start}개와 다른 {len(vectors)}개의 벡터를 받았습니다.")
+            results[start:stop] = vectors
+
+        if len(batches) == 1 or self.concurrency <= 1:
+            for batch in batches:
+                run(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                # list()로 소비해야 요청 중 난 오류가 여기서 다시 발생합니다
+                list(pool.map(run, batches))
+
+        if len(pieces) == len(texts):
+            return results
+
+        # 나눠서 임베딩한 입력은 토큰 수 가중 평균 후 다시 단위 벡터로
+        combined = [None] * len(texts)
+        groups = {}
+        for owner, vector, weight in zip(owners, results, weights):
+            groups.setdefault(owner, []).append((vector, weight))
+        for owner, parts in groups.items():
+            if len(parts) == 1:
+                combined[owner] = parts[0][0]
+                continue
+            matrix = np.asarray([vector for vector, _ in parts], dtype=np.float64)
+            average = np.average(matrix, axis=0, weights=[weight for _, weight in parts])
+            combined[owner] = (average / np.linalg.norm(average)).tolist()
+        return combined
@@ -0,0 +1,183 @@
+"""
+내용 주소(content-addressed) 임베딩 캐시
+
+같은 텍스트를 다시 임베딩하지 않도록 (모델, 차원, sha256(텍스트))를 키로
+벡터를 로컬 SQLite 파일(output/embedding_cache.sqlite)에 float32 바이트로 저장합니다.
+  - get_or_embed(): 캐시에 없는 텍스트만 (중복 제거 후) 임베딩하고, 입력 순서대로 합쳐서 반환
+  - 파일 크기 상한(max_bytes)을 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+  - stats(): 적중/미스 수, 항목 수, 저장 크기
+
+텍스트 하나만 바뀌어도 그 텍스트만 새로 임베딩하므로
+말뭉치를 조금 고친 뒤 다시 색인할 때 시간과 비용이 거의 들지 않습니다.
+
+사용 예:
+  cache = EmbeddingCache()
+  vectors = cache.get_or_embed(texts, "text-embedding-3-small", None,
+                               lambda misses: get_embeddings(misses, use_cache=False))
+  print(cache.stats())
+"""
+
+import array
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_FILE = Path("output") / "embedding_cache.sqlite"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    (모델, 차원, sha256(텍스트)) → 임베딩 벡터 디스크 캐시
+
+    Args:
+        path: SQLite 파일 경로
+        max_bytes: 저장할 벡터 바이트 합계 상한 (넘으면 LRU 순서로 삭제)
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_bytes=1024 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                hash BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, hash)
+            ) WITHOUT ROWID
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    # ------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------
+
+    def get_many(self, model, dimensions, texts):
+        """텍스트별 캐시된 벡터 리스트 (없으면 None)"""
+        dimensions = dimensions or 0  # 모델 기본 차원
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한(기본 999) 안에서 나눠서 조회
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND hash IN ({','.join('?' * len(part))})",
+                    [model, dimensions, *part]).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimensions = ? AND hash = ?",
+                    [(now, model, dimensions, h) for h in found])
+                self._db.commit()
+        results = []
+        for h in hashes:
+            blob = found.get(h)
+            results.append(array.array("f", blob).tolist() if blob is not None else None)
+        return results
+
+    def put_many(self, model, dimensions, texts, vectors):
+        dimensions = dimensions or 0
+        now = time.time()
+        rows = [(model, dimensions, text_hash(text), array.array("f", vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, dimensions, hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            if rows:
+                # 같은 모델/차원의 벡터는 크기가 같으므로 새로 들어간 행 수로 계산
+                self._bytes += (self._db.total_changes - before) * len(rows[0][3])
+            self._db.commit()
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def get_or_embed(self, texts, model, dimensions, embed_fn):
+        """
+        캐시에 없는 텍스트만 embed_fn으로 임베딩하고 입력 순서대로 벡터를 반환합니다.
+
+        Args:
+            texts: 텍스트 리스트
+            model: 임베딩 모델 이름
+            dimensions: 요청 차원 (None이면 모델 기본값)
+            embed_fn: 텍스트 리스트 → 벡터 리스트 (캐시 미스만 전달, 중복 제거됨)
+        """
+        cached = self.get_many(model, dimensions, texts)
+        # 같은 텍스트가 여러 번 나와도 한 번만 임베딩
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - sum(vector is None for vector in cached)
+        if not missing:
+            return cached
+
+        new_vectors = embed_fn(missing)
+        self.put_many(model, dimensions, missing, new_vectors)
+        by_text = dict(zip(missing, new_vectors))
+        return [vector if vector is not None else by_text[text] for text, vector in zip(texts, cached)]
+
+    # ------------------------------------------------------------
+    # 삭제 / 통계
+    # ------------------------------------------------------------
+
+    def _evict(self):
+        """LRU 순서로 지워서 max_bytes의 90% 아래로 (lock 안에서 호출)"""
+        target = int(self.max_bytes * 0.9)
+        while self._bytes > target:
+            rows = self._db.execute(
+                "SELECT model, dimensions, hash, LENGTH(vector) FROM embeddings "
+                "ORDER BY last_used LIMIT 1000").fetchall()
+            if not rows:
+                break
+            removed = []
+            for model, dimensions, h, size in rows:
+                removed.append((model, dimensions, h))
+                self._bytes -= size
+                if self._bytes <= target:
+                    break
+            self._db.executemany(
+                "DELETE FROM embeddings WHERE model = ? AND dimensions = ? AND hash = ?", removed)
+        self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else None,
+                "entries": entries,
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+            self._bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
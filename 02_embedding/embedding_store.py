@@ -0,0 +1,161 @@
+"""
+메모리 맵(mmap) 바이너리 임베딩 저장소
+
+임베딩을 json.dump(indent=2)로 저장하면 숫자가 텍스트로 바뀌어 파일이 5~10배 커지고,
+불러올 때마다 문자열을 파이썬 float로 파싱해야 합니다.
+EmbeddingStore는 디렉토리 하나에 다음 파일을 둡니다.
+
+  vectors.bin   float32(또는 float16) 행렬을 행 순서대로 이어 붙인 바이너리
+  items.jsonl   행마다 텍스트/카테고리 등 메타데이터 한 줄
+  meta.json     모델, 차원, dtype, 행 수 (커밋 지점)
+
+  - vectors(): np.memmap으로 복사 없이 (count, dim) 행렬을 엽니다.
+  - append(): 벡터와 메타데이터를 파일 끝에 추가하고 마지막에 meta.json을 원자적으로 교체합니다.
+    도중에 죽으면 meta.json의 행 수 뒤에 남은 부분은 다음 append 때 잘라냅니다.
+
+사용 예:
+  store = EmbeddingStore("output/embeddings_2d", model="text-embedding-3-small", dim=1536)
+  store.append(vectors, [{"text": t, "category": c} for t, c in zip(texts, categories)])
+  matrix = store.vectors()          # np.memmap (count, dim)
+  texts = store.column("text")
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+class EmbeddingStore:
+    """
+    디렉토리 기반 바이너리 임베딩 저장소
+
+    Args:
+        path: 저장 디렉토리
+        model: 임베딩 모델 이름 (새로 만들 때 기록, 기존 저장소와 다르면 오류)
+        dim: 벡터 차원 (None이면 처음 append할 때 결정)
+        dtype: "float32" 또는 "float16" (float16은 크기가 절반, 정밀도는 약 3자리). None이면 float32
+    """
+
+    def __init__(self, path, model=None, dim=None, dtype=None):
+        if dtype is not None and dtype not in DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {dtype}")
+        self.path = Path(path)
+        self.meta_file = self.path / "meta.json"
+        self.vectors_file = self.path / "vectors.bin"
+        self.items_file = self.path / "items.jsonl"
+        self._items = None
+
+        if self.meta_file.exists():
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            for key, value in (("model", model), ("dim", dim), ("dtype", dtype)):
+                if value is not None and self.meta[key] is not None and self.meta[key] != value:
+                    raise ValueError(f"저장소의 {key}({self.meta[key]})와 요청한 값({value})이 다릅니다.")
+        else:
+            self.meta = {"model": model, "dim": dim, "dtype": dtype or "float32",
+                         "count": 0, "items_bytes": 0}
+
+    @property
+    def model(self):
+        return self.meta["model"]
+
+    @property
+    def dim(self):
+        return self.meta["dim"]
+
+    @property
+    def dtype(self):
+        return DTYPES[self.meta["dtype"]]
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def exists(self):
+        return self.meta_file.exists()
+
+    # ------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------
+
+    def _write_meta(self):
+        tmp = self.meta_file.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.meta_file)
+
+    def append(self, vectors, items=None):
+        """
+        벡터 행렬과 행별 메타데이터를 추가합니다.
+
+        Args:
+            vectors: (n, dim) 배열 또는 벡터 리스트
+            items: 행별 메타데이터 dict 리스트 (None이면 빈 dict)
+        """
+        matrix = np.asarray(vectors, dtype=self.dtype)
+        if matrix.ndim != 2:
+            raise ValueError("vectors는 (행 수, 차원) 2차원이어야 합니다.")
+        if self.dim is None:
+            self.meta["dim"] = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"차원이 다릅니다: 저장소 {self.dim}, 입력 {matrix.shape[1]}")
+        items = items if items is not None else [{} for _ in range(len(matrix))]
+        if len(items) != len(matrix):
+            raise ValueError("items와 vectors의 행 수가 다릅니다.")
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        row_bytes = self.dim * np.dtype(self.dtype).itemsize
+        lines = b"".join(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n" for item in items)
+        with open(self.vectors_file, "ab") as vf, open(self.items_file, "ab") as itf:
+            # 커밋되지 않은 꼬리(이전에 쓰다가 죽은 부분)는 잘라내고 이어 씁니다
+            vf.truncate(len(self) * row_bytes)
+            itf.truncate(self.meta["items_bytes"])
+            vf.write(np.ascontiguousarray(matrix).tobytes())
+            itf.write(lines)
+            vf.flush()
+            itf.flush()
+            os.fsync(vf.fileno())
+            os.fsync(itf.fileno())
+        self.meta["count"] += len(matrix)
+        self.meta["items_bytes"] += len(lines)
+        self._write_meta()
+        if self._items is not None:
+            self._items.extend(items)
+
+    def clear(self):
+        """모든 행 삭제 (모델/차원 설정은 유지)"""
+        self.meta.update(count=0, items_bytes=0)
+        if self.path.exists():
+            self._write_meta()
+            for file in (self.vectors_file, self.items_file):
+                file.unlink(missing_ok=True)
+        self._items = []
+
+    # ------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------
+
+    def vectors(self):
+        """(count, dim) 행렬. 파일을 메모리 맵으로 열기 때문에 복사하지 않습니다 (읽기 전용)."""
+        if len(self) == 0:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return np.memmap(self.vectors_file, dtype=self.dtype, mode="r", shape=(len(self), self.dim))
+
+    def items(self):
+        """행별 메타데이터 리스트"""
+        if self._items is None:
+            self._items = []
+            if len(self):
+                with open(self.items_file, "rb") as f:
+                    data = f.read(self.meta["items_bytes"])
+                self._items = [json.loads(line) for line in data.splitlines()]
+        return self._items
+
+    def column(self, key):
+        """메타데이터의 한 필드 리스트 (예: column("text"))"""
+        return [item.get(key) for item in self.items()]
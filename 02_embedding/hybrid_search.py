@@ -0,0 +1,377 @@
+"""
+BGE-M3 하이브리드 검색 (dense + sparse 어휘 가중치)
+
+BGE-M3는 한 번의 인코딩으로 dense 벡터와 함께 토큰별 어휘 가중치(sparse, lexical weights)를 낼 수 있습니다.
+  - dense: 의미가 비슷한 문서를 찾지만 고유명사, 숫자, 희귀 용어를 놓치기도 함
+  - sparse: 질문과 문서에 같이 나오는 토큰의 가중치 곱의 합 (BM25처럼 단어 일치에 강함)
+
+두 점수를 합치면 1차 검색의 recall이 올라가서, 비싼 CrossEncoder 리랭커에 보낼 후보 수를 줄여도
+같은 최종 품질을 얻을 수 있습니다. (리랭커 비용은 후보 수에 비례)
+
+  SparseEncoder   SentenceTransformer의 토큰 임베딩 + BGE-M3 sparse_linear 가중치로 어휘 가중치 계산
+                  (모델 서버 클라이언트면 서버의 /sparse 사용)
+  SparseIndex     토큰별 (문서 번호, 가중치) 역색인. CSR 형태의 numpy 배열 3개로 저장 (.npz)
+  HybridRetriever dense 검색 + sparse 검색을 RRF(reciprocal rank fusion) 또는 가중합으로 합침
+
+사용 예:
+  model = load_encoder()
+  sparse_encoder = SparseEncoder(model)
+  doc_vectors = model.encode(documents, normalize_embeddings=True)
+  retriever = HybridRetriever(doc_vectors, SparseIndex.build(sparse_encoder.encode(documents)))
+  scores, rows = retriever.search(model.encode(queries, normalize_embeddings=True),
+                                  sparse_encoder.encode(queries), k=10)
+
+한국어 평가 세트(korean_eval.py)로 dense / sparse / 하이브리드 recall@k와
+리랭커 후보 수별 최종 recall@1, 리랭커 시간 비교:
+  python 02_embedding/hybrid_search.py
+  python 02_embedding/hybrid_search.py --rerank --candidates 3 5 10 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from similarity import normalize, top_k
+
+FUSIONS = ("rrf", "weighted")
+MODES = ("dense", "sparse") + FUSIONS
+
+# BGE-M3 논문의 dense + sparse 가중합 비율 (dense 1 : sparse 0.3)
+DEFAULT_WEIGHTS = (1.0, 0.3)
+RRF_K = 60
+
+
+# ------------------------------------------------------------
+# 어휘 가중치 계산
+# ------------------------------------------------------------
+
+class SparseEncoder:
+    """
+    BGE-M3 어휘 가중치(lexical weights) 계산기
+
+    토큰별 마지막 은닉 상태에 sparse_linear(1024 → 1)를 적용하고 ReLU를 씌운 값이 토큰 가중치입니다.
+    같은 토큰이 여러 번 나오면 가장 큰 값을 쓰고, 특수 토큰([CLS], </s>, 패딩, unk)은 뺍니다.
+    (FlagEmbedding BGEM3FlagModel의 return_sparse=True와 같은 계산)
+
+    Args:
+        model: load_bge_m3()/load_encoder()가 돌려준 SentenceTransformer 또는 ModelClient
+        model_name: sparse_linear.pt를 받을 Hugging Face 모델 이름
+    """
+
+    def __init__(self, model, model_name="BAAI/bge-m3"):
+        self.model = model
+        # 모델 서버 클라이언트는 서버가 계산 (torch/huggingface_hub import 없음)
+        self.remote = hasattr(model, "encode_sparse")
+        if not self.remote:
+            self.weight, self.bias = load_sparse_linear(model_name)
+            tokenizer = model.tokenizer
+            self.special_ids = {tokenizer.cls_token_id, tokenizer.eos_token_id,
+                                tokenizer.pad_token_id, tokenizer.unk_token_id}
+
+    def encode(self, texts, batch_size=32):
+        """텍스트별 {토큰 id: 가중치} dict 리스트"""
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self.remote:
+            weights = self.model.encode_sparse(texts, batch_size=batch_size)
+        else:
+            token_embeddings = self.model.encode(texts, batch_size=batch_size, output_value="token_embeddings")
+            input_ids = self.model.tokenizer(texts, truncation=True, max_length=self.model.max_seq_length,
+                                             add_special_tokens=True)["input_ids"]
+            weights = [self._token_weights(ids, hidden) for ids, hidden in zip(input_ids, token_embeddings)]
+        return weights[0] if single else weights
+
+    def _token_weights(self, ids, hidden):
+        hidden = hidden.float().cpu().numpy() if hasattr(hidden, "cpu") else np.asarray(hidden, dtype=np.float32)
+        scores = np.maximum(hidden[:len(ids)] @ self.weight + self.bias, 0)
+        weights = {}
+        for token, score in zip(ids, scores.tolist()):
+            if score > 0 and token not in self.special_ids and score > weights.get(token, 0):
+                weights[token] = score
+        return weights
+
+
+def load_sparse_linear(model_name="BAAI/bge-m3"):
+    """모델 저장소의 sparse_linear.pt (Linear(hidden, 1))를 numpy (weight 벡터, bias)로"""
+    import torch
+    from huggingface_hub import hf_hub_download
+
+    state = torch.load(hf_hub_download(model_name, "sparse_linear.pt"), map_location="cpu")
+    return state["weight"].float().numpy().reshape(-1), float(state["bias"].float().numpy().reshape(-1)[0])
+
+
+# ------------------------------------------------------------
+# 역색인
+# ------------------------------------------------------------
+
+class SparseIndex:
+    """
+    어휘 가중치 역색인 (CSR)
+
+    tokens[i] 토큰의 문서 목록은 doc_ids[indptr[i]:indptr[i + 1]], 가중치는 같은 구간의 weights입니다.
+    dict 리스트(문서당 수백 개의 파이썬 객체)보다 몇 배 작고, 질문 토큰 수만큼의 구간 덧셈으로 점수를 계산합니다.
+
+    Args:
+        tokens: 정렬된 토큰 id (int32)
+        indptr: 토큰별 구간 시작 위치 (len(tokens) + 1, int64)
+        doc_ids: 문서 번호 (int32)
+        weights: 가중치 (float16, 점수 누적은 float32)
+        n_docs: 문서 수
+    """
+
+    def __init__(self, tokens, indptr, doc_ids, weights, n_docs):
+        self.tokens = np.asarray(tokens, dtype=np.int32)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float16)
+        self.n_docs = int(n_docs)
+
+    def __len__(self):
+        return self.n_docs
+
+    @classmethod
+    def build(cls, doc_weights):
+        """문서별 {토큰 id: 가중치} dict 리스트로 역색인 생성"""
+        lengths = [len(weights) for weights in doc_weights]
+        tokens = np.fromiter((token for weights in doc_weights for token in weights),
+                             dtype=np.int32, count=sum(lengths))
+        values = np.fromiter((value for weights in doc_weights for value in weights.values()),
+                             dtype=np.float32, count=len(tokens))
+        doc_ids = np.repeat(np.arange(len(doc_weights), dtype=np.int32), lengths)
+        # 토큰 순으로 정렬 (stable이므로 토큰 안에서는 문서 번호 순서 유지)
+        order = np.argsort(tokens, kind="stable")
+        tokens, doc_ids, values = tokens[order], doc_ids[order], values[order]
+        unique, starts = np.unique(tokens, return_index=True)
+        indptr = np.append(starts, len(tokens))
+        return cls(unique, indptr, doc_ids, values, len(doc_weights))
+
+    @property
+    def memory_bytes(self):
+        return self.tokens.nbytes + self.indptr.nbytes + self.doc_ids.nbytes + self.weights.nbytes
+
+    def scores(self, query_weights):
+        """질문 하나({토큰 id: 가중치})와 모든 문서의 어휘 점수 (n_docs,)"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        if not query_weights:
+            return scores
+        query_tokens = np.fromiter(query_weights.keys(), dtype=np.int32, count=len(query_weights))
+        positions = np.searchsorted(self.tokens, query_tokens)
+        for token, position, weight in zip(query_tokens, positions, query_weights.values()):
+            if position < len(self.tokens) and self.tokens[position] == token:
+                start, end = self.indptr[position], self.indptr[position + 1]
+                # 한 토큰의 구간 안에서 문서 번호는 겹치지 않으므로 np.add.at 없이 더할 수 있음
+                scores[self.doc_ids[start:end]] += np.float32(weight) * self.weights[start:end]
+        return scores
+
+    def search(self, queries, k=10):
+        """
+        Args:
+            queries: 질문별 {토큰 id: 가중치} dict 리스트 (또는 dict 하나)
+
+        Returns:
+            (scores, indices): 둘 다 (q, k), 점수 내림차순
+        """
+        if isinstance(queries, dict):
+            queries = [queries]
+        return top_k(np.stack([self.scores(query) for query in queries]), k)
+
+    def save(self, path):
+        np.savez(path, tokens=self.tokens, indptr=self.indptr, doc_ids=self.doc_ids,
+                 weights=self.weights, n_docs=self.n_docs)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["tokens"], data["indptr"], data["doc_ids"], data["weights"], data["n_docs"])
+
+
+# ------------------------------------------------------------
+# 점수 합치기
+# ------------------------------------------------------------
+
+def reciprocal_rank_fusion(rankings, k=RRF_K, weights=None):
+    """
+    RRF: 문서마다 Σ weight / (k + 순위). 점수 크기가 다른 검색 결과를 순위만으로 합칩니다.
+
+    Args:
+        rankings: 검색 방법별 문서 번호 배열 (순위 순서, 길이가 달라도 됨)
+        k: 순위 완화 상수 (클수록 하위 순위의 영향이 커짐)
+
+    Returns:
+        (scores, indices): 합친 점수 내림차순 1차원 배열
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(np.asarray(ranking).tolist(), 1):
+            fused[doc] = fused.get(doc, 0.0) + weight / (k + rank)
+    indices = np.array(sorted(fused, key=lambda doc: -fused[doc]), dtype=np.int64)
+    return np.array([fused[doc] for doc in indices.tolist()], dtype=np.float32), indices
+
+
+def weighted_fusion(dense_scores, sparse_scores, weights=DEFAULT_WEIGHTS):
+    """dense 코사인 유사도와 sparse 어휘 점수의 가중합 (같은 문서 순서의 배열)"""
+    return weights[0] * np.asarray(dense_scores, dtype=np.float32) + \
+        weights[1] * np.asarray(sparse_scores, dtype=np.float32)
+
+
+class HybridRetriever:
+    """
+    메모리 안의 dense 행렬 + SparseIndex 하이브리드 검색
+
+    Args:
+        vectors: (n, dim) dense 임베딩
+        sparse_index: 같은 문서 순서의 SparseIndex
+        fusion: "rrf" 또는 "weighted"
+        candidates: RRF에서 방법별로 가져올 후보 수
+        weights: weighted 방식의 (dense, sparse) 가중치 (RRF는 두 순위를 같은 비중으로 합침)
+    """
+
+    def __init__(self, vectors, sparse_index, fusion="rrf", candidates=100, weights=DEFAULT_WEIGHTS):
+        if fusion not in FUSIONS:
+            raise ValueError(f"fusion은 {FUSIONS} 중 하나여야 합니다: {fusion}")
+        self.matrix = normalize(vectors)
+        if len(self.matrix) != len(sparse_index):
+            raise ValueError(f"dense 벡터 수({len(self.matrix)})와 sparse 색인 문서 수({len(sparse_index)})가 다릅니다.")
+        self.sparse_index = sparse_index
+        self.fusion = fusion
+        self.candidates = candidates
+        self.weights = weights
+
+    def search(self, query_vectors, query_weights, k=10, mode=None):
+        """
+        Args:
+            query_vectors: (q, dim) 질문 dense 임베딩
+            query_weights: 질문별 {토큰 id: 가중치} dict 리스트
+            mode: "dense", "sparse", "rrf", "weighted" (None이면 fusion)
+
+        Returns:
+            (scores, indices): 둘 다 (q, k), 점수 내림차순
+                (문서나 RRF 후보가 k보다 적으면 남는 칸은 점수 0, 번호 -1)
+        """
+        mode = mode or self.fusion
+        if mode not in MODES:
+            raise ValueError(f"mode는 {MODES} 중 하나여야 합니다: {mode}")
+        if isinstance(query_weights, dict):
+            query_weights = [query_weights]
+        dense = normalize(query_vectors) @ self.matrix.T
+        if mode == "dense":
+            return _pad(*top_k(dense, k), k)
+        sparse = np.stack([self.sparse_index.scores(query) for query in query_weights])
+        if mode == "sparse":
+            return _pad(*top_k(sparse, k), k)
+        if mode == "weighted":
+            return _pad(*top_k(weighted_fusion(dense, sparse, self.weights), k), k)
+
+        _, dense_rows = top_k(dense, self.candidates)
+        _, sparse_rows = top_k(sparse, self.candidates)
+        all_scores = np.zeros((len(dense), k), dtype=np.float32)
+        all_indices = np.full((len(dense), k), -1, dtype=np.int64)
+        for row, (dense_ranking, sparse_ranking, sparse_scores) in enumerate(zip(dense_rows, sparse_rows, sparse)):
+            # 어휘 점수가 0인 문서는 순위만 있고 근거가 없으므로 sparse 순위에서 뺌
+            sparse_ranking = sparse_ranking[sparse_scores[sparse_ranking] > 0]
+            scores, indices = reciprocal_rank_fusion([dense_ranking, sparse_ranking])
+            all_scores[row, :len(indices[:k])] = scores[:k]
+            all_indices[row, :len(indices[:k])] = indices[:k]
+        return all_scores, all_indices
+
+
+def _pad(scores, indices, k):
+    """top_k 결과의 열이 k보다 적으면 점수 0, 번호 -1로 채워서 (q, k)로 맞춤"""
+    missing = k - scores.shape[1]
+    if missing <= 0:
+        return scores, indices
+    return (np.pad(scores.astype(np.float32), ((0, 0), (0, missing))),
+            np.pad(indices, ((0, 0), (0, missing)), constant_values=-1))
+
+
+# ------------------------------------------------------------
+# 한국어 평가 세트 벤치마크
+# ------------------------------------------------------------
+
+def rerank(reranker, queries, documents, candidate_rows, n):
+    """질문마다 상위 n개 후보를 리랭커로 재정렬. (재정렬된 문서 번호 리스트, 리랭커 쌍 수, 걸린 시간)"""
+    pairs, owners = [], []
+    for row, (query, candidates) in enumerate(zip(queries, candidate_rows)):
+        for doc in candidates[:n]:
+            if doc >= 0:
+                pairs.append([query, documents[doc]])
+                owners.append((row, doc))
+    start = time.perf_counter()
+    scores = np.asarray(reranker.predict(pairs), dtype=np.float32)
+    seconds = time.perf_counter() - start
+    ranked = [[] for _ in queries]
+    for (row, doc), score in sorted(zip(owners, scores.tolist()), key=lambda item: -item[1]):
+        ranked[row].append(doc)
+    return ranked, len(pairs), seconds
+
+
+def run_benchmark(k, candidates, fusion_weights, do_rerank):
+    from korean_eval import DOCUMENTS, QUERIES, recall_at_k
+    from model_client import load_encoder
+
+    queries = [query for query, _ in QUERIES]
+    answers = [answer for _, answer in QUERIES]
+    max_n = max([k, *candidates])
+
+    model = load_encoder()
+    sparse_encoder = SparseEncoder(model)
+    start = time.perf_counter()
+    doc_vectors = model.encode(DOCUMENTS, normalize_embeddings=True)
+    dense_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    doc_weights = sparse_encoder.encode(DOCUMENTS)
+    sparse_seconds = time.perf_counter() - start
+    query_vectors = model.encode(queries, normalize_embeddings=True)
+    query_weights = sparse_encoder.encode(queries)
+
+    sparse_index = SparseIndex.build(doc_weights)
+    retriever = HybridRetriever(doc_vectors, sparse_index, weights=fusion_weights)
+    print(f"문서 {len(DOCUMENTS)}개, 질문 {len(QUERIES)}개 | 문서 인코딩 dense {dense_seconds:.2f}초, "
+          f"sparse {sparse_seconds:.2f}초 | 역색인 {sparse_index.memory_bytes / 1024:.1f}KB "
+          f"(토큰 {len(sparse_index.tokens)}개, 항목 {len(sparse_index.doc_ids)}개)\n")
+
+    retrieved = {}
+    print(f"{'방법':<10}" + "".join(f"{f'R@{n}':>7}" for n in sorted({1, 3, 5, k})) + f"{'검색(ms)':>10}")
+    for mode in MODES:
+        start = time.perf_counter()
+        _, rows = retriever.search(query_vectors, query_weights, max_n, mode=mode)
+        seconds = time.perf_counter() - start
+        retrieved[mode] = rows
+        print(f"{mode:<10}" + "".join(f"{recall_at_k(rows, answers, n):>7.2f}" for n in sorted({1, 3, 5, k}))
+              + f"{seconds * 1000:>10.2f}")
+
+    print("\n후보 수 N별 1차 검색 recall@N (리랭커에 N개를 보낼 때 정답이 후보에 들어 있는 비율)")
+    print(f"{'방법':<10}" + "".join(f"{f'N={n}':>7}" for n in candidates))
+    for mode, rows in retrieved.items():
+        print(f"{mode:<10}" + "".join(f"{recall_at_k(rows, answers, n):>7.2f}" for n in candidates))
+
+    if not do_rerank:
+        return
+    from model_client import load_reranker
+
+    reranker = load_reranker()
+    print("\n리랭커 적용 후 recall@1 / 리랭커 쌍 수 / 리랭커 시간")
+    print(f"{'방법':<10} {'N':>4} {'R@1':>6} {'쌍 수':>6} {'시간(s)':>8}")
+    for mode in ("dense", retriever.fusion):
+        for n in candidates:
+            ranked, pairs, seconds = rerank(reranker, queries, DOCUMENTS, retrieved[mode], n)
+            top1 = np.mean([bool(row) and row[0] == answer for row, answer in zip(ranked, answers)])
+            print(f"{mode:<10} {n:>4} {top1:>6.2f} {pairs:>6} {seconds:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BGE-M3 dense + sparse 하이브리드 검색 평가")
+    parser.add_argument("--k", type=int, default=10, help="recall@k의 k")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 2, 3, 5, 10],
+                        help="리랭커에 보낼 후보 수 N")
+    parser.add_argument("--weights", type=float, nargs=2, default=list(DEFAULT_WEIGHTS),
+                        metavar=("DENSE", "SPARSE"), help="합칠 때 dense, sparse 가중치")
+    parser.add_argument("--rerank", action="store_true", help="리랭커로 후보 수별 최종 recall@1과 시간 측정")
+    args = parser.parse_args()
+    run_benchmark(args.k, args.candidates, tuple(args.weights), args.rerank)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+한국어 검색 평가 세트
+
+임베딩 백엔드/차원 축소/양자화를 바꿨을 때 검색 품질이 유지되는지 확인하기 위한 작은 평가용 데이터입니다.
+  - DOCUMENTS: 주제별 한국어 문서
+  - QUERIES: (질문, 정답 문서 번호) 목록
+  - recall_at_k(): 정답 문서가 상위 k개 안에 든 비율
+  - overlap_at_k(): 기준 결과(예: PyTorch fp32)의 상위 k개와 겹치는 비율
+
+실제 데이터로 평가하려면 같은 형태의 리스트를 만들어 함수에 넘기면 됩니다.
+"""
+
+import numpy as np
+
+DOCUMENTS = [
+    # AI
+    "인공지능은 인간의 학습능력, 추론능력, 지각능력을 컴퓨터 프로그램으로 실현한 기술입니다.",
+    "머신러닝은 데이터를 기반으로 컴퓨터가 스스로 학습하는 인공지능의 한 분야입니다.",
+    "딥러닝은 인공신경망을 기반으로 한 머신러닝의 한 종류로, 다층 구조를 가집니다.",
+    "자연어 처리는 인간의 언어를 컴퓨터가 이해하고 처리할 수 있도록 하는 기술입니다.",
+    "벡터 데이터베이스는 고차원 벡터를 효율적으로 저장하고 검색할 수 있는 데이터베이스입니다.",
+    "임베딩은 텍스트나 이미지 같은 데이터를 고차원 벡터 공간으로 변환하는 과정입니다.",
+    "대규모 언어 모델은 방대한 텍스트로 사전 학습되어 문장을 생성하고 질문에 답할 수 있습니다.",
+    "검색 증강 생성(RAG)은 관련 문서를 찾아 언어 모델의 답변에 근거로 제공하는 방법입니다.",
+    # 프로그래밍
+    "파이썬은 배우기 쉬운 프로그래밍 언어로 문법이 간결해 초보자에게 적합합니다.",
+    "자바스크립트는 웹 브라우저에서 동작하는 언어로 웹 개발에 널리 사용됩니다.",
+    "Go는 구글이 만든 언어로 동시성 처리가 쉽고 컴파일 속도가 빠릅니다.",
+    "러스트는 메모리 안전성을 컴파일 시점에 보장하는 시스템 프로그래밍 언어입니다.",
+    "깃은 소스 코드의 변경 이력을 관리하는 분산 버전 관리 시스템입니다.",
+    "도커는 애플리케이션을 컨테이너로 묶어 어디서나 같은 환경에서 실행할 수 있게 합니다.",
+    # 한국
+    "서울은 대한민국의 수도이자 최대 도시로 약 천만 명이 살고 있습니다.",
+    "부산은 한국 제2의 도시이며 해운대 해수욕장과 큰 항구로 유명합니다.",
+    "제주도는 화산섬으로 한라산과 아름다운 해안 경치 덕분에 관광객이 많이 찾습니다.",
+    "김치는 배추와 고춧가루로 만드는 한국의 대표적인 발효 음식입니다.",
+    "비빔밥은 밥 위에 여러 가지 나물과 고추장을 넣고 비벼 먹는 한국 음식입니다.",
+    "한글은 1443년 세종대왕이 창제한 한국의 고유 문자입니다.",
+    "K-pop은 한국 대중음악을 지칭하는 말로 전 세계적인 인기를 얻고 있습니다.",
+    "추석은 음력 8월 15일로 가족이 모여 송편을 빚고 차례를 지내는 명절입니다.",
+    # 생활/건강
+    "규칙적인 유산소 운동은 심폐 기능을 높이고 체지방을 줄이는 데 도움이 됩니다.",
+    "하루 7~8시간의 충분한 수면은 기억력과 면역력 유지에 중요합니다.",
+    "커피에 들어 있는 카페인은 각성 효과가 있지만 많이 마시면 잠을 방해합니다.",
+    "물을 충분히 마시면 체온 조절과 노폐물 배출에 도움이 됩니다.",
+    # 경제/과학
+    "기준금리가 오르면 대출 이자가 늘어나 소비와 투자가 줄어드는 경향이 있습니다.",
+    "인플레이션은 물가가 지속적으로 오르면서 화폐 가치가 떨어지는 현상입니다.",
+    "태양광 발전은 태양전지를 이용해 햇빛을 전기 에너지로 바꾸는 방식입니다.",
+    "블랙홀은 중력이 매우 강해서 빛조차 빠져나올 수 없는 천체입니다.",
+]
+
+QUERIES = [
+    ("컴퓨터가 스스로 학습하는 기술은 무엇인가요?", 1),
+    ("여러 층의 신경망을 쓰는 학습 방법", 2),
+    ("사람의 말을 기계가 이해하게 만드는 분야", 3),
+    ("고차원 벡터를 빠르게 검색하는 저장소", 4),
+    ("문장을 숫자 벡터로 바꾸는 방법", 5),
+    ("챗GPT 같은 생성형 모델은 어떻게 만들어지나요?", 6),
+    ("문서를 찾아서 LLM 답변의 근거로 쓰는 기법", 7),
+    ("초보자에게 좋은 프로그래밍 언어는?", 8),
+    ("웹 프론트엔드 개발에 쓰는 언어", 9),
+    ("메모리 안전한 시스템 언어", 11),
+    ("코드 변경 이력을 관리하는 도구", 12),
+    ("컨테이너로 배포 환경을 통일하는 방법", 13),
+    ("한국의 수도는 어디인가요?", 14),
+    ("해수욕장과 항구로 유명한 도시", 15),
+    ("한라산이 있는 섬", 16),
+    ("한국의 전통 발효 음식", 17),
+    ("한국의 전통 문자에 대해 알려주세요", 19),
+    ("송편을 먹는 명절", 21),
+    ("잠을 충분히 자면 좋은 점", 23),
+    ("금리 인상이 경제에 미치는 영향", 26),
+    ("물가가 계속 오르는 현상", 27),
+    ("빛도 탈출하지 못하는 천체", 29),
+]
+
+
+def recall_at_k(retrieved, relevant, k):
+    """
+    정답 문서가 상위 k개 안에 든 질문의 비율
+
+    Args:
+        retrieved: 질문별 검색된 문서 번호 배열 (q, ≥k), 순위 순서
+        relevant: 질문별 정답 문서 번호
+    """
+    retrieved = np.asarray(retrieved)[:, :k]
+    return float(np.mean([answer in row for row, answer in zip(retrieved, relevant)]))
+
+
+def overlap_at_k(retrieved, reference, k):
+    """기준 결과의 상위 k개 중 retrieved 상위 k개에도 있는 비율 (질문 평균)"""
+    retrieved = np.asarray(retrieved)[:, :k]
+    reference = np.asarray(reference)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(retrieved, reference)]))
@@ -0,0 +1,214 @@
+"""
+모델 서버(model_server.py) 클라이언트
+
+표준 라이브러리(http.client)와 numpy만 사용하므로 torch/sentence-transformers를 import하지 않습니다.
+SentenceTransformer/CrossEncoder와 같은 모양의 encode()/predict()를 제공해서
+예제 스크립트는 모델 객체 대신 클라이언트를 그대로 쓸 수 있습니다.
+
+  model = load_encoder()      # 서버가 떠 있으면 클라이언트, 아니면 프로세스 안에서 BGE-M3 로드
+  embeddings = model.encode(texts, normalize_embeddings=True)   # np.ndarray (n, 1024)
+
+  reranker = load_reranker()
+  scores = reranker.predict([[query, doc] for doc in docs])
+
+서버 주소는 MODEL_SERVER_URL 환경 변수로 정합니다. (기본 http://127.0.0.1:8200)
+  http://127.0.0.1:8200
+  unix://output/model_server.sock
+
+같은 호스트의 서버이고 결과가 크면 공유 메모리로 받습니다. (base64 JSON 인코딩/디코딩 생략)
+"""
+
+import base64
+import http.client
+import json
+import os
+import socket
+import threading
+from multiprocessing import shared_memory
+from urllib.parse import urlsplit
+
+import numpy as np
+
+DEFAULT_URL = "http://127.0.0.1:8200"
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# 결과가 이 크기 이상으로 예상되면 공유 메모리 전달을 요청 (서버 쪽 기준과 별개)
+SHM_MIN_BYTES = 1024 * 1024
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Unix 소켓으로 접속하는 HTTPConnection"""
+
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ModelServerError(Exception):
+    """모델 서버가 오류를 응답했거나 접속할 수 없음"""
+
+
+class ModelClient:
+    """
+    모델 서버 HTTP 클라이언트 (스레드별 keep-alive 연결)
+
+    Args:
+        url: 서버 주소 (None이면 MODEL_SERVER_URL 환경 변수, 없으면 http://127.0.0.1:8200)
+        timeout: 요청 타임아웃(초). 큰 배치 인코딩은 오래 걸릴 수 있습니다.
+        use_shm: 같은 호스트면 큰 결과를 공유 메모리로 받기
+    """
+
+    def __init__(self, url=None, timeout=600.0, use_shm=True):
+        self.url = url or os.getenv("MODEL_SERVER_URL", DEFAULT_URL)
+        parts = urlsplit(self.url)
+        if parts.scheme == "unix":
+            self.socket_path = parts.netloc + parts.path
+            self.host = self.port = None
+        elif parts.scheme == "http":
+            self.socket_path = None
+            self.host, self.port = parts.hostname, parts.port or 80
+        else:
+            raise ValueError(f"http:// 또는 unix:// 주소여야 합니다: {self.url}")
+        self.timeout = timeout
+        self.use_shm = use_shm and (self.socket_path is not None or self.host in LOCAL_HOSTS)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.socket_path:
+                conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self, conn):
+        conn.close()
+        self._local.conn = None
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            reused = conn.sock is not None
+            try:
+                if not reused:
+                    conn.connect()
+            except OSError as e:
+                self._reset(conn)
+                raise ModelServerError(f"모델 서버({self.url})에 접속할 수 없습니다: {e}") from e
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                self._reset(conn)
+                # 서버가 유휴 keep-alive 연결을 닫은 경우만 한 번 새 연결로 재시도.
+                # 읽기 타임아웃 등은 서버가 이미 처리 중일 수 있으므로 큰 배치를 다시 인코딩하지 않도록 재시도하지 않음
+                if not reused or attempt == 1:
+                    raise ModelServerError(f"모델 서버({self.url}) 연결이 끊겼습니다: {e}") from e
+            except (http.client.HTTPException, OSError) as e:
+                self._reset(conn)
+                raise ModelServerError(f"모델 서버({self.url}) 요청 실패: {e}") from e
+        result = json.loads(data or b"{}")
+        if response.status != 200:
+            message = result.get("error", {}).get("message", data.decode("utf-8", "replace"))
+            raise ModelServerError(f"모델 서버 오류 ({response.status}): {message}")
+        return result
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def is_available(self):
+        try:
+            self.health()
+            return True
+        except ModelServerError:
+            return False
+
+    # ------------------------------------------------------------
+    # SentenceTransformer / CrossEncoder와 같은 모양의 API
+    # ------------------------------------------------------------
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        """텍스트(또는 리스트)의 임베딩. SentenceTransformer.encode처럼 np.ndarray를 반환합니다."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        payload = {"texts": texts, "normalize": normalize_embeddings, "batch_size": batch_size}
+        # 차원을 모르므로 BGE-M3(1024차원) 기준으로 결과 크기를 어림합니다
+        if self.use_shm and len(texts) * 1024 * 4 >= SHM_MIN_BYTES:
+            payload["transfer"] = "shm"
+        result = self._request("POST", "/encode", payload)
+        embeddings = decode_array(result)
+        return embeddings[0] if single else embeddings
+
+    def encode_sparse(self, texts, batch_size=32):
+        """텍스트별 BGE-M3 어휘 가중치 {토큰 id: 가중치} 리스트 (hybrid_search.SparseEncoder가 사용)"""
+        result = self._request("POST", "/sparse", {"texts": list(texts), "batch_size": batch_size})
+        return [{int(token): weight for token, weight in item.items()} for item in result["weights"]]
+
+    def predict(self, pairs, batch_size=32, **kwargs):
+        """(질문, 문서) 쌍들의 리랭커 점수. CrossEncoder.predict처럼 np.ndarray를 반환합니다."""
+        result = self._request("POST", "/rerank", {"pairs": [list(pair) for pair in pairs],
+                                                   "batch_size": batch_size})
+        return np.asarray(result["scores"], dtype=np.float32)
+
+    def rerank_scores(self, query, documents, batch_size=32):
+        result = self._request("POST", "/rerank", {"query": query, "documents": list(documents),
+                                                   "batch_size": batch_size})
+        return np.asarray(result["scores"], dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return self.health()["encoder"]["dim"]
+
+
+def decode_array(result):
+    """서버 응답(base64 또는 공유 메모리)을 np.ndarray로"""
+    shape = tuple(result["shape"])
+    dtype = np.dtype(result["dtype"])
+    if "shm" not in result:
+        return np.frombuffer(base64.b64decode(result["data"]), dtype=dtype).reshape(shape)
+    shm = shared_memory.SharedMemory(name=result["shm"])
+    try:
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()  # 가져간 쪽이 지웁니다
+
+
+# ------------------------------------------------------------
+# 스크립트용 로더
+# ------------------------------------------------------------
+
+def load_encoder(url=None):
+    """모델 서버가 있으면 클라이언트, 없으면 프로세스 안에서 BGE-M3 로드 (bge_encoder.load_bge_m3)"""
+    client = ModelClient(url)
+    if client.is_available():
+        print(f"모델 서버 사용: {client.url}")
+        return client
+    from bge_encoder import load_bge_m3
+
+    return load_bge_m3()
+
+
+def load_reranker(url=None, model_name="BAAI/bge-reranker-v2-m3"):
+    """모델 서버에 리랭커가 있으면 클라이언트, 없으면 프로세스 안에서 CrossEncoder 로드"""
+    client = ModelClient(url)
+    try:
+        if client.health().get("reranker"):
+            print(f"모델 서버 사용: {client.url}")
+            return client
+    except ModelServerError:
+        pass
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name)
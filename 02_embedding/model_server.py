@@ -0,0 +1,299 @@
+"""
+임베딩/리랭커 모델 상주 서버
+
+BGE-M3(약 2GB)와 bge-reranker-v2-m3는 스크립트를 실행할 때마다 처음부터 로드하느라
+일을 시작하기 전에 몇 초와 수 GB 메모리를 씁니다. 짧게 실행되는 작업이 많으면 실행 시간 대부분이 모델 로드입니다.
+이 서버는 모델을 한 번만 올려 두고 localhost 또는 Unix 소켓으로 요청을 받습니다.
+스크립트는 model_client.py의 가벼운 클라이언트로 접속하므로 torch를 import할 필요도 없습니다.
+
+엔드포인트 (HTTP/1.1 keep-alive, JSON):
+  POST /encode    {"texts": [...], "normalize": true, "batch_size": 32, "transfer": "base64" | "shm"}
+                  → {"shape": [n, dim], "dtype": "float32", "data": <base64>}
+                    또는 공유 메모리로 {"shape": ..., "dtype": ..., "shm": <이름>}
+  POST /sparse    {"texts": [...], "batch_size": 32}
+                  → {"weights": [{"<토큰 id>": 가중치, ...}, ...]}  (BGE-M3 어휘 가중치, hybrid_search.py)
+  POST /rerank    {"query": "...", "documents": [...]} 또는 {"pairs": [[질문, 문서], ...]}
+                  → {"scores": [...]}
+  GET  /health    로드된 모델, 요청 수, 가동 시간
+
+큰 배치(shm_min_bytes 이상)를 "shm"으로 요청하면 결과 행렬을 공유 메모리에 써서 이름만 돌려줍니다.
+base64 JSON으로 수십 MB를 보내는 대신 클라이언트가 한 번 복사한 뒤 공유 메모리를 지웁니다.
+(클라이언트가 가져가지 않은 공유 메모리는 shm_ttl초 뒤 서버가 지웁니다)
+
+모델 호출은 이벤트 루프를 막지 않도록 스레드에서 실행하고, 모델마다 한 번에 한 요청씩 처리합니다.
+(torch/ONNX Runtime이 이미 모든 코어를 쓰므로 동시에 돌려도 빨라지지 않습니다)
+
+실행:
+  uv run python 02_embedding/model_server.py --port 8200
+  uv run python 02_embedding/model_server.py --socket output/model_server.sock --backend onnx-int8
+
+  # 스크립트 쪽 (서버가 없으면 프로세스 안에서 모델을 로드)
+  MODEL_SERVER_URL=http://127.0.0.1:8200 python 03_vectordb/eg_chroma_bge-m3.py
+  MODEL_SERVER_URL=unix://output/model_server.sock python 03_vectordb/eg_cross_encoder.py
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import os
+import sys
+import time
+import traceback
+from http import HTTPStatus
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+
+# 01_LLM_API의 HTTP 유틸리티 사용 (요청 파싱, keep-alive 응답)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "01_LLM_API"))
+from http_util import HTTPError, error_body, parse_json, read_request, send_json
+
+from bge_encoder import load_bge_m3
+from hybrid_search import SparseEncoder
+
+RERANKER_NAME = "BAAI/bge-reranker-v2-m3"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def parse_object(body):
+    """JSON 객체 본문 (배열이나 문자열이면 400)"""
+    request = parse_json(body)
+    if not isinstance(request, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "요청 본문은 JSON 객체여야 합니다.")
+    return request
+
+
+def batch_size_of(request):
+    try:
+        batch_size = int(request.get("batch_size", 32))
+    except (TypeError, ValueError):
+        batch_size = 0
+    if batch_size < 1:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "batch_size는 1 이상의 정수여야 합니다.")
+    return batch_size
+
+
+class ModelServer:
+    """
+    임베딩/리랭커 모델 상주 HTTP 서버
+
+    Args:
+        backend: BGE-M3 백엔드 ("torch", "onnx", "onnx-int8", None이면 BGE_M3_BACKEND 환경 변수)
+        reranker: 리랭커 모델 이름 (None이면 리랭커 없이 시작)
+        shm_min_bytes: 결과가 이 크기 이상이고 클라이언트가 원하면 공유 메모리로 전달
+        shm_ttl: 클라이언트가 가져가지 않은 공유 메모리를 지우기까지의 시간(초)
+    """
+
+    def __init__(self, backend=None, reranker=RERANKER_NAME, shm_min_bytes=1024 * 1024, shm_ttl=60.0):
+        started = time.perf_counter()
+        print("BGE-M3 모델을 로드하는 중...", flush=True)
+        self.encoder = load_bge_m3(backend)
+        self.backend = backend or os.getenv("BGE_M3_BACKEND", "torch")
+        self.sparse_encoder = None  # 첫 /sparse 요청 때 sparse_linear 가중치 로드
+        self.reranker = None
+        self.reranker_name = reranker
+        if reranker:
+            from sentence_transformers import CrossEncoder
+
+            print(f"리랭커를 로드하는 중... ({reranker})", flush=True)
+            self.reranker = CrossEncoder(reranker)
+        print(f"모델 로드 완료! ({time.perf_counter() - started:.1f}초)", flush=True)
+
+        self.shm_min_bytes = shm_min_bytes
+        self.shm_ttl = shm_ttl
+        self.started_at = time.time()
+        self.requests = {"encode": 0, "sparse": 0, "rerank": 0}
+        self._pending_shm = {}  # 이름 → 만든 시각
+        self._encode_lock = asyncio.Lock()
+        self._rerank_lock = asyncio.Lock()
+
+    # ------------------------------------------------------------
+    # HTTP (keep-alive)
+    # ------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader, MAX_BODY_BYTES)
+                if request is None:
+                    return
+                method, path, headers, body = request
+                try:
+                    await self.dispatch(writer, method, path, body)
+                except HTTPError as e:
+                    await send_json(writer, e.status, error_body(e.message, e.error_type))
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    # 모델 오류 등도 소켓을 끊지 않고 500으로 응답 (끊으면 클라이언트가 같은 요청을 다시 보냄)
+                    traceback.print_exc()
+                    await send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                    error_body("서버 내부 오류입니다.", "server_error"))
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except HTTPError as e:
+            await send_json(writer, e.status, error_body(e.message, e.error_type))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def dispatch(self, writer, method, path, body):
+        if path == "/encode" and method == "POST":
+            await send_json(writer, HTTPStatus.OK, await self.encode(parse_object(body)))
+        elif path == "/sparse" and method == "POST":
+            await send_json(writer, HTTPStatus.OK, await self.sparse(parse_object(body)))
+        elif path == "/rerank" and method == "POST":
+            await send_json(writer, HTTPStatus.OK, await self.rerank(parse_object(body)))
+        elif path == "/health" and method == "GET":
+            await send_json(writer, HTTPStatus.OK, {
+                "status": "ok",
+                "encoder": {"backend": self.backend,
+                            "dim": self.encoder.get_sentence_embedding_dimension()},
+                "reranker": self.reranker_name if self.reranker is not None else None,
+                "requests": self.requests,
+                "pending_shm": len(self._pending_shm),
+                "uptime": time.time() - self.started_at,
+                "pid": os.getpid(),
+            })
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"{method} {path} 경로가 없습니다.")
+
+    # ------------------------------------------------------------
+    # 모델 호출
+    # ------------------------------------------------------------
+
+    async def encode(self, request):
+        texts = request.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "texts는 문자열 리스트여야 합니다.")
+        normalize = bool(request.get("normalize", True))
+        batch_size = batch_size_of(request)
+
+        async with self._encode_lock:
+            embeddings = await asyncio.to_thread(
+                self.encoder.encode, texts, batch_size=batch_size,
+                normalize_embeddings=normalize, convert_to_numpy=True)
+        self.requests["encode"] += 1
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        result = {"shape": list(embeddings.shape), "dtype": "float32"}
+
+        if request.get("transfer") == "shm" and embeddings.nbytes >= self.shm_min_bytes:
+            result["shm"] = self._to_shared_memory(embeddings)
+        else:
+            result["data"] = base64.b64encode(embeddings.tobytes()).decode("ascii")
+        return result
+
+    async def sparse(self, request):
+        texts = request.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "texts는 문자열 리스트여야 합니다.")
+        batch_size = batch_size_of(request)
+
+        async with self._encode_lock:
+            if self.sparse_encoder is None:
+                self.sparse_encoder = await asyncio.to_thread(SparseEncoder, self.encoder)
+            weights = await asyncio.to_thread(self.sparse_encoder.encode, texts, batch_size)
+        self.requests["sparse"] += 1
+        # JSON 객체 키는 문자열이므로 토큰 id를 문자열로 보냄 (클라이언트가 int로 되돌림)
+        return {"weights": [{str(token): weight for token, weight in item.items()} for item in weights]}
+
+    async def rerank(self, request):
+        if self.reranker is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "리랭커 없이 시작한 서버입니다.", "server_error")
+        pairs = request.get("pairs")
+        if pairs is None:
+            query, documents = request.get("query"), request.get("documents")
+            if not isinstance(query, str) or not isinstance(documents, list):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "query와 documents 또는 pairs가 필요합니다.")
+            pairs = [[query, document] for document in documents]
+        batch_size = batch_size_of(request)
+
+        async with self._rerank_lock:
+            scores = await asyncio.to_thread(self.reranker.predict, pairs, batch_size=batch_size)
+        self.requests["rerank"] += 1
+        return {"scores": np.asarray(scores, dtype=np.float32).tolist()}
+
+    # ------------------------------------------------------------
+    # 공유 메모리
+    # ------------------------------------------------------------
+
+    def _to_shared_memory(self, array):
+        shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+        # 지우는 것은 클라이언트 몫이므로 서버 종료 시 resource_tracker가 지우지 않게 합니다
+        resource_tracker.unregister(shm._name, "shared_memory")
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        name = shm.name
+        shm.close()
+        self._pending_shm[name] = time.monotonic()
+        return name
+
+    async def _cleanup_shared_memory(self):
+        while True:
+            await asyncio.sleep(self.shm_ttl / 2)
+            self._sweep_shared_memory(time.monotonic() - self.shm_ttl)
+
+    def _sweep_shared_memory(self, deadline):
+        for name, created in list(self._pending_shm.items()):
+            if created > deadline:
+                continue
+            del self._pending_shm[name]
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue  # 클라이언트가 이미 가져가서 지움
+            shm.close()
+            shm.unlink()
+
+    async def serve(self, host="127.0.0.1", port=8200, socket_path=None):
+        if socket_path:
+            Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(self.handle_connection, socket_path)
+            address = f"unix://{socket_path}"
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+            address = f"http://{host}:{port}"
+        cleanup = asyncio.create_task(self._cleanup_shared_memory())
+        print(f"모델 서버 시작: {address} (MODEL_SERVER_URL={address})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            cleanup.cancel()
+            self._sweep_shared_memory(float("inf"))
+            if socket_path:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩/리랭커 모델 상주 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--socket", default=None, help="TCP 대신 Unix 소켓 경로로 대기")
+    parser.add_argument("--backend", choices=("torch", "onnx", "onnx-int8"), default=None)
+    parser.add_argument("--reranker", default=RERANKER_NAME, help="리랭커 모델 이름")
+    parser.add_argument("--no-reranker", action="store_true", help="리랭커를 로드하지 않음")
+    parser.add_argument("--shm-min-bytes", type=int, default=1024 * 1024,
+                        help="이 크기 이상의 결과는 요청 시 공유 메모리로 전달")
+    args = parser.parse_args()
+
+    async def run():
+        server = ModelServer(args.backend, None if args.no_reranker else args.reranker,
+                             shm_min_bytes=args.shm_min_bytes)
+        await server.serve(args.host, args.port, args.socket)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n모델 서버를 종료합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+양자화 벡터 인덱스 (int8 스칼라 / 1비트 이진) + 원래 정밀도 재채점(rescoring)
+
+모든 임베딩을 float32(또는 Chroma에 파이썬 float 리스트)로 들고 있으면 노드 메모리가 말뭉치 크기의 상한이 됩니다.
+QuantizedIndex는 1차 검색용으로 압축한 코드만 메모리에 두고,
+후보 몇 배수(oversample)를 고른 뒤 메모리 맵 저장소(embedding_store.py)의 float32 벡터로 다시 채점합니다.
+
+  int8    차원별 스케일로 [-127, 127] 정수화 (float32 대비 1/4 크기), 내적으로 1차 검색
+  binary  평균을 뺀 뒤 부호만 1비트로 저장 (float32 대비 1/32 크기), 해밍 거리로 1차 검색
+
+재채점은 후보 행만 디스크(페이지 캐시)에서 읽으므로 전체 float32 행렬을 메모리에 올릴 필요가 없습니다.
+
+사용 예:
+  store = EmbeddingStore("output/corpus")
+  index = QuantizedIndex.from_store(store, mode="binary")
+  scores, rows = index.search(query_embeddings, k=10, oversample=8)
+
+벤치마크 (메모리, QPS, recall@k: 정확한 float32 검색 대비, chromadb가 있으면 collection.query도 비교):
+  python 02_embedding/quantized_index.py --n 100000 --dim 1024
+  python 02_embedding/quantized_index.py --store output/corpus
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from similarity import SimilarityIndex, normalize, top_k
+
+MODES = ("int8", "binary")
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    # numpy 2.0 미만: 바이트 단위 표로 비트 수 세기
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(*words.shape, -1).sum(axis=-1, dtype=np.uint8)
+
+
+class QuantizedIndex:
+    """
+    양자화 코드 1차 검색 + float32 재채점 인덱스
+
+    Args:
+        vectors: (n, dim) 원래 벡터 (np.memmap 가능. 양자화와 재채점에 사용하며 메모리에 복사하지 않음)
+        mode: "int8" 또는 "binary"
+        block_size: 양자화/1차 검색을 나눠서 처리할 행 수
+    """
+
+    def __init__(self, vectors, mode="binary", block_size=16384):
+        if mode not in MODES:
+            raise ValueError(f"mode는 {MODES} 중 하나여야 합니다: {mode}")
+        self.vectors = vectors
+        self.mode = mode
+        self.block_size = block_size
+        n, dim = vectors.shape
+        self.dim = dim
+
+        if mode == "int8":
+            # 차원별 최대 절댓값으로 스케일을 정해 [-127, 127]에 맞춥니다
+            peak = np.zeros(dim, dtype=np.float32)
+            for start in range(0, n, block_size):
+                block = normalize(vectors[start:start + block_size])
+                np.maximum(peak, np.abs(block).max(axis=0), out=peak)
+            self.scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+            self.codes = np.empty((n, dim), dtype=np.int8)
+            for start in range(0, n, block_size):
+                block = normalize(vectors[start:start + block_size])
+                self.codes[start:start + block_size] = np.clip(np.rint(block / self.scale), -127, 127)
+        else:
+            # 임베딩은 평균 방향으로 치우쳐 있어 그대로 부호를 쓰면 비트가 한쪽으로 몰립니다
+            total = np.zeros(dim, dtype=np.float64)
+            for start in range(0, n, block_size):
+                total += normalize(vectors[start:start + block_size]).sum(axis=0)
+            self.mean = (total / max(n, 1)).astype(np.float32)
+            words = -(-dim // 64)  # 64비트 단어 수 (올림)
+            self.codes = np.empty((n, words), dtype=np.uint64)
+            for start in range(0, n, block_size):
+                self.codes[start:start + block_size] = self._pack(normalize(vectors[start:start + block_size]))
+
+    @classmethod
+    def from_store(cls, store, mode="binary", block_size=16384):
+        """EmbeddingStore의 메모리 맵 행렬로 인덱스 생성"""
+        return cls(store.vectors(), mode, block_size)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def memory_bytes(self):
+        """1차 검색에 메모리로 들고 있는 바이트 (코드 + 스케일/평균)"""
+        extra = self.scale.nbytes if self.mode == "int8" else self.mean.nbytes
+        return self.codes.nbytes + extra
+
+    def _pack(self, block):
+        bits = np.packbits(block > self.mean, axis=1)
+        padded = np.zeros((len(block), self.codes.shape[1] * 8), dtype=np.uint8)
+        padded[:, :bits.shape[1]] = bits
+        return padded.view(np.uint64)
+
+    # ------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------
+
+    def _first_pass(self, queries, candidates):
+        """(질문 수, candidates) 후보 행 번호 (양자화 점수 상위)"""
+        n = len(self)
+        if self.mode == "int8":
+            # codes·(q × scale)는 원래 내적의 근사 (질문은 양자화하지 않음: 비대칭 거리)
+            weighted = queries * self.scale
+            best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+            best_rows = np.empty((len(queries), 0), dtype=np.int64)
+            for start in range(0, n, self.block_size):
+                scores = weighted @ self.codes[start:start + self.block_size].astype(np.float32).T
+                best_scores, best_rows = _merge_top(best_scores, best_rows, scores, start, candidates)
+            return best_rows
+
+        query_codes = self._pack(queries)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, n, self.block_size):
+            codes = self.codes[start:start + self.block_size]
+            # 해밍 거리가 작을수록 가까우므로 음수로 바꿔서 상위 k개를 고릅니다
+            distances = _popcount(query_codes[:, None, :] ^ codes[None, :, :]).sum(axis=2, dtype=np.int32)
+            best_scores, best_rows = _merge_top(best_scores, best_rows, -distances.astype(np.float32),
+                                                start, candidates)
+        return best_rows
+
+    def search(self, queries, k=10, oversample=4, rescore=True, query_batch=32):
+        """
+        질문들의 상위 k개
+
+        Args:
+            queries: (q, dim) 배열 또는 벡터 하나
+            oversample: 재채점할 후보 수 = k × oversample
+            rescore: False면 양자화 점수 순위를 그대로 반환 (점수는 재채점 없이 계산 안 함 → 0)
+            query_batch: 이진 모드에서 한 번에 처리할 질문 수 (메모리: query_batch × block_size × 단어 수 × 8바이트)
+
+        Returns:
+            (scores, rows): 둘 다 (q, k), 재채점한 코사인 유사도 내림차순
+        """
+        queries = normalize(queries)
+        candidates = min(len(self), max(k, k * oversample if rescore else k))
+        all_scores, all_rows = [], []
+        for start in range(0, len(queries), query_batch):
+            batch = queries[start:start + query_batch]
+            rows = self._first_pass(batch, candidates)
+            if not rescore:
+                all_scores.append(np.zeros((len(batch), min(k, rows.shape[1])), dtype=np.float32))
+                all_rows.append(rows[:, :k])
+                continue
+            # 후보 행만 메모리 맵에서 읽어 정확한 코사인 유사도로 다시 채점 (정렬된 순서로 읽어야 디스크가 덜 흔들림)
+            unique_rows, inverse = np.unique(rows, return_inverse=True)
+            full = normalize(self.vectors[unique_rows])
+            exact = np.einsum("qd,qcd->qc", batch, full[inverse.reshape(rows.shape)])
+            scores, order = top_k(exact, k)
+            all_scores.append(scores)
+            all_rows.append(np.take_along_axis(rows, order, axis=1))
+        return np.concatenate(all_scores), np.concatenate(all_rows)
+
+
+def _merge_top(best_scores, best_rows, scores, offset, k):
+    """지금까지의 상위 k개와 새 블록 점수를 합쳐 다시 상위 k개"""
+    block_scores, block_rows = top_k(scores, k)
+    merged_scores = np.concatenate([best_scores, block_scores], axis=1)
+    merged_rows = np.concatenate([best_rows, block_rows + offset], axis=1)
+    keep_scores, order = top_k(merged_scores, k)
+    return keep_scores, np.take_along_axis(merged_rows, order, axis=1)
+
+
+# ------------------------------------------------------------
+# 벤치마크
+# ------------------------------------------------------------
+
+def synthetic_embeddings(n, dim, latent_dim=128, noise=0.5, seed=0):
+    """
+    합성 임베딩: 저차원(latent_dim) 의미 공간을 dim차원으로 펼친 뒤 잡음을 더함
+
+    실제 문장 임베딩처럼 고유 차원이 낮아서 가까운 이웃이 의미 있는 분포입니다.
+    같은 차원 설정이면 seed가 달라도 같은 공간을 공유합니다 (질문 생성용).
+    """
+    mix = np.random.default_rng(dim * 1000 + latent_dim).standard_normal((latent_dim, dim), dtype=np.float32)
+    mix /= np.sqrt(latent_dim)
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, latent_dim), dtype=np.float32) @ mix
+    vectors += rng.standard_normal((n, dim), dtype=np.float32) * (noise * np.sqrt(latent_dim / dim) / 8)
+    return normalize(vectors)
+
+
+def recall(found, truth, k):
+    return float(np.mean([len(set(a[:k]) & set(b[:k])) / k for a, b in zip(found, truth)]))
+
+
+def timed_search(search, queries):
+    start = time.perf_counter()
+    result = search(queries)
+    return result, len(queries) / (time.perf_counter() - start)
+
+
+def chroma_benchmark(vectors, queries, k):
+    """현재 경로: embeddings.tolist()로 Chroma에 넣고 collection.query. chromadb가 없으면 None"""
+    try:
+        import chromadb
+    except ImportError:
+        return None
+    client = chromadb.Client()
+    collection = client.create_collection(name="quantized_bench", metadata={"hnsw:space": "cosine"})
+    batch = 5000
+    for start in range(0, len(vectors), batch):
+        block = np.asarray(vectors[start:start + batch])
+        collection.add(ids=[str(i) for i in range(start, start + len(block))], embeddings=block.tolist())
+
+    def search(q):
+        result = collection.query(query_embeddings=q.tolist(), n_results=k)
+        return np.array([[int(i) for i in ids] for ids in result["ids"]])
+
+    rows, qps = timed_search(search, queries)
+    client.delete_collection("quantized_bench")
+    return rows, qps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="양자화 인덱스 벤치마크 (메모리 / QPS / recall@k)")
+    parser.add_argument("--store", default=None, help="EmbeddingStore 디렉토리 (없으면 합성 데이터)")
+    parser.add_argument("--n", type=int, default=100000, help="합성 벡터 개수")
+    parser.add_argument("--dim", type=int, default=1024, help="합성 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, nargs="+", default=[4, 10])
+    parser.add_argument("--no-chroma", action="store_true", help="collection.query 비교 생략")
+    args = parser.parse_args()
+
+    if args.store:
+        from embedding_store import EmbeddingStore
+
+        vectors = EmbeddingStore(args.store).vectors()
+        rng = np.random.default_rng(1)
+        # 저장된 벡터에 잡음을 섞어 질문으로 사용 (자기 자신이 1등인 쉬운 질문을 피함)
+        picked = np.asarray(vectors[np.sort(rng.choice(len(vectors), args.queries, replace=False))])
+        queries = normalize(picked + 0.5 * rng.standard_normal(picked.shape).astype(np.float32)
+                            / np.sqrt(picked.shape[1]))
+    else:
+        vectors = synthetic_embeddings(args.n, args.dim)
+        queries = synthetic_embeddings(args.queries, args.dim, seed=1)
+    n, dim = vectors.shape
+    k = args.k
+    print(f"벡터 {n:,}개 × {dim}차원, 질문 {len(queries)}개, k={k}\n")
+
+    rows = []
+    exact = SimilarityIndex(vectors)
+    (_, truth), qps = timed_search(lambda q: exact.search(q, k), queries)
+    rows.append(("float32 정확 검색", exact.matrix.nbytes, qps, 1.0))
+    del exact
+
+    if not args.no_chroma:
+        result = chroma_benchmark(vectors, queries, k)
+        if result is None:
+            print("chromadb가 없어 collection.query 비교는 건너뜁니다.")
+        else:
+            found, qps = result
+            # Chroma는 float32 벡터와 HNSW 그래프를 메모리에 둡니다 (그래프 크기는 제외한 하한)
+            rows.append(("chroma collection.query", n * dim * 4, qps, recall(found, truth, k)))
+
+    for mode in MODES:
+        start = time.perf_counter()
+        index = QuantizedIndex(vectors, mode)
+        build = time.perf_counter() - start
+        print(f"{mode} 인덱스 생성: {build:.1f}초")
+        (_, found), qps = timed_search(lambda q: index.search(q, k, rescore=False), queries)
+        rows.append((f"{mode} (재채점 없음)", index.memory_bytes, qps, recall(found, truth, k)))
+        for oversample in args.oversample:
+            (_, found), qps = timed_search(lambda q: index.search(q, k, oversample=oversample), queries)
+            rows.append((f"{mode} + 재채점 ×{oversample}", index.memory_bytes, qps, recall(found, truth, k)))
+
+    print(f"\n{'방법':<24} {'메모리(MB)':>10} {'압축':>6} {'QPS':>9} {f'recall@{k}':>10}")
+    for name, memory, qps, value in rows:
+        print(f"{name:<24} {memory / 1e6:>10.1f} {n * dim * 4 / memory:>5.0f}x {qps:>9.1f} {value:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+벡터화된 코사인 유사도 계산
+
+eg_openai_embedding.py의 cosine_similarity()는 호출마다 리스트를 배열로 바꾸고 노름을 다시 계산합니다.
+쌍 몇 개를 비교할 때는 괜찮지만 10만 개 임베딩의 중복 탐지처럼 쌍이 수십억 개가 되면 쓸 수 없습니다.
+
+SimilarityIndex는 벡터를 한 번만 단위 벡터(float32)로 정규화해 두고
+  - pairwise(): 행렬 곱 한 번으로 전체 쌍 유사도 (n × n)
+  - search(): 질의 여러 개를 한꺼번에 말뭉치와 비교해서 상위 k개
+  - top_k_neighbors(): 메모리에 다 못 올리는 n × n 대신 행 블록 단위로 곱하고 argpartition으로 상위 k개만 남김
+  - near_duplicates(): 블록 단위로 임계값 이상인 쌍 (i < j)
+를 제공합니다. 단위 벡터끼리의 내적이 곧 코사인 유사도입니다.
+
+사용 예:
+  index = SimilarityIndex(embeddings)
+  scores, indices = index.search(query_embeddings, k=5)
+  pairs = index.near_duplicates(threshold=0.95)
+
+벤치마크 (cosine_similarity 쌍별 호출과 비교):
+  python 02_embedding/similarity.py --n 2000 --dim 1536
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# 블록 하나의 점수 행렬 목표 크기. argpartition/비교 마스크 임시 배열도 비슷한 크기로 생김
+BLOCK_BYTES = 32 * 1024 * 1024
+MAX_BLOCK_ROWS = 4096
+
+
+def normalize(vectors):
+    """행마다 L2 정규화한 float32 행렬 (노름이 0인 행은 0으로 둠)"""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k(scores, k):
+    """
+    행마다 점수가 큰 k개의 (점수, 열 번호)를 내림차순으로 반환합니다.
+
+    전체 정렬(O(m log m)) 대신 argpartition(O(m))으로 k개를 고른 뒤 그 k개만 정렬합니다.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(scores.dtype), empty.astype(np.int64)
+    if k < scores.shape[1]:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+    picked = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-picked, axis=1, kind="stable")
+    return np.take_along_axis(picked, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+class SimilarityIndex:
+    """
+    정규화된 float32 행렬 기반 코사인 유사도 계산기
+
+    Args:
+        vectors: (n, dim) 배열 또는 벡터 리스트 (np.memmap도 가능, 정규화하면서 메모리로 복사됨)
+        block_size: 블록 단위 연산에서 한 번에 처리할 행 수 (블록 점수 행렬은 block_size × n × 4바이트).
+            None이면 점수 행렬이 BLOCK_BYTES를 넘지 않게 n에서 계산 (n=10만이면 83행, 약 32MB)
+    """
+
+    def __init__(self, vectors, block_size=None):
+        self.matrix = normalize(vectors)
+        if block_size is None:
+            block_size = min(MAX_BLOCK_ROWS, max(1, BLOCK_BYTES // (4 * max(1, len(self.matrix)))))
+        self.block_size = block_size
+
+    def __len__(self):
+        return len(self.matrix)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def pairwise(self):
+        """전체 쌍 코사인 유사도 (n × n). n이 크면 top_k_neighbors/near_duplicates를 사용하세요."""
+        return self.matrix @ self.matrix.T
+
+    def search(self, queries, k=10):
+        """
+        질의들과 말뭉치 전체의 유사도 상위 k개
+
+        Args:
+            queries: (q, dim) 배열 또는 벡터 하나
+
+        Returns:
+            (scores, indices): 둘 다 (q, k), 유사도 내림차순
+        """
+        queries = normalize(queries)
+        all_scores, all_indices = [], []
+        for start in range(0, len(queries), self.block_size):
+            scores = queries[start:start + self.block_size] @ self.matrix.T
+            block_scores, block_indices = top_k(scores, k)
+            all_scores.append(block_scores)
+            all_indices.append(block_indices)
+        return np.concatenate(all_scores), np.concatenate(all_indices)
+
+    def top_k_neighbors(self, k=10, exclude_self=True):
+        """
+        각 벡터와 가장 비슷한 k개 (행 블록 단위로 계산하므로 n × n 행렬을 만들지 않음)
+
+        Returns:
+            (scores, indices): 둘 다 (n, k)
+        """
+        n = len(self)
+        all_scores, all_indices = [], []
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            scores = self.matrix[start:stop] @ self.matrix.T
+            if exclude_self:
+                scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+            block_scores, block_indices = top_k(scores, k)
+            all_scores.append(block_scores)
+            all_indices.append(block_indices)
+        return np.concatenate(all_scores), np.concatenate(all_indices)
+
+    def near_duplicates(self, threshold=0.95):
+        """
+        유사도가 threshold 이상인 쌍 (i < j)
+
+        Returns:
+            (i, j, score) 튜플 리스트, 유사도 내림차순
+        """
+        n = len(self)
+        rows, cols, values = [], [], []
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            # 위쪽 삼각형만 필요하므로 블록 시작 열부터 곱합니다
+            scores = self.matrix[start:stop] @ self.matrix[start:].T
+            block_rows, block_cols = np.nonzero(scores >= threshold)
+            keep = block_cols > block_rows  # 자기 자신과 대각선 아래 제외
+            block_rows, block_cols = block_rows[keep], block_cols[keep]
+            rows.append(block_rows + start)
+            cols.append(block_cols + start)
+            values.append(scores[block_rows, block_cols])
+        rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+        order = np.argsort(-values, kind="stable")
+        return [(int(rows[i]), int(cols[i]), float(values[i])) for i in order]
+
+
+# ------------------------------------------------------------
+# 벤치마크
+# ------------------------------------------------------------
+
+def cosine_similarity(vec1, vec2):
+    """비교 기준: eg_openai_embedding.cosine_similarity와 같은 쌍별 계산"""
+    vec1 = np.array(vec1)
+    vec2 = np.array(vec2)
+    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+
+
+def run_benchmark(n, dim, k, sample_pairs, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vector_lists = vectors.tolist()  # get_embeddings가 반환하는 형태 (리스트의 리스트)
+    total_pairs = n * (n - 1) // 2
+
+    # 쌍별 호출은 너무 느리므로 일부만 재서 전체 쌍으로 환산
+    pairs = rng.integers(0, n, size=(sample_pairs, 2))
+    start = time.perf_counter()
+    for i, j in pairs:
+        cosine_similarity(vector_lists[i], vector_lists[j])
+    per_pair = (time.perf_counter() - start) / sample_pairs
+    print(f"쌍별 cosine_similarity: {per_pair * 1e6:.1f} µs/쌍 "
+          f"→ 전체 {total_pairs:,}쌍 추정 {per_pair * total_pairs:.1f}초")
+
+    start = time.perf_counter()
+    index = SimilarityIndex(vector_lists)
+    build = time.perf_counter() - start
+    print(f"SimilarityIndex 생성(정규화): {build * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    matrix = index.pairwise()
+    elapsed = time.perf_counter() - start
+    print(f"pairwise() {n}×{n}: {elapsed * 1000:.1f} ms "
+          f"({per_pair * total_pairs / elapsed:,.0f}배 빠름)")
+    # 결과가 같은지 확인
+    for i, j in pairs[:100]:
+        assert abs(matrix[i, j] - cosine_similarity(vector_lists[i], vector_lists[j])) < 1e-4
+    del matrix
+
+    start = time.perf_counter()
+    index.top_k_neighbors(k)
+    print(f"top_k_neighbors(k={k}) 블록 단위: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    queries = rng.standard_normal((100, dim)).astype(np.float32)
+    start = time.perf_counter()
+    index.search(queries, k)
+    elapsed = time.perf_counter() - start
+    print(f"search() 질의 100개 배치: {elapsed * 1000:.1f} ms ({100 / elapsed:,.0f} 질의/초)")
+
+    start = time.perf_counter()
+    duplicates = index.near_duplicates(0.95)
+    print(f"near_duplicates(0.95): {(time.perf_counter() - start) * 1000:.1f} ms, {len(duplicates)}쌍")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="코사인 유사도 벤치마크 (쌍별 호출 vs 행렬 연산)")
+    parser.add_argument("--n", type=int, default=2000, help="벡터 개수")
+    parser.add_argument("--dim", type=int, default=1536, help="벡터 차원")
+    parser.add_argument("--k", type=int, default=10, help="상위 k개")
+    parser.add_argument("--sample-pairs", type=int, default=2000, help="쌍별 호출 측정에 쓸 쌍 개수")
+    args = parser.parse_args()
+    run_benchmark(args.n, args.dim, args.k, args.sample_pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,21 @@ Chroma에 데이터를 추가하는 세 가지 방법을 보여줍니다:
 2. embeddings + documents - 수동으로 생성한 임베딩 제공
 3. embeddings + metadata만 - documents는 외부에 저장
 
+모델 서버(02_embedding/model_server.py)가 떠 있으면 서버에 요청하고, 없으면 프로세스 안에서 모델을 로드합니다.
+BGE_M3_BACKEND=onnx-int8로 실행하면 ONNX Runtime int8 백엔드를 사용합니다. (02_embedding/bge_encoder.py)
+
 필요한 패키지:
   uv add chromadb sentence-transformers
 """
 
+import sys
+from pathlib import Path
+
+# 02_embedding의 모델 서버 클라이언트 / BGE-M3 로더 사용
+sys.path.append(str(Path(__file__).resolve().parent.parent / "02_embedding"))
+from model_client import load_encoder
+
 import chromadb
-from sentence_transformers import SentenceTransformer
 
 print("=" * 60)
 print("방법 1: documents만 제공 (Chroma가 자동 임베딩)")
@@ -44,7 +53,7 @@ collection1.add(
 print(f"추가된 문서 수: {collection1.count()}")
 print("\n저장된 문서 확인:")
 results1 = collection1.get(ids=["id1", "id2"])
-for i, (doc_id, doc) in enumerate[_T_co](zip(results1['ids'], results1['documents']), 1):
+for i, (doc_id, doc) in enumerate(zip(results1['ids'], results1['documents']), 1):
     print(f"{i}. ID: {doc_id}")
     print(f"   문서: {doc}")
 
@@ -55,7 +64,7 @@ print("=" * 60)
 
 # BGE-M3 모델 로드
 print("\nBGE-M3 모델 로드 중...")
-model = SentenceTransformer('BAAI/bge-m3')
+model = load_encoder()
 print("모델 로드 완료!")
 
 # 새 컬렉션 생성
@@ -1,29 +1,29 @@
 """
 Chroma DB와 BGE-M3 모델을 사용한 한국어 벡터 데이터베이스 예제
 
+dense 벡터는 Chroma에, BGE-M3 어휘 가중치(sparse)는 역색인(02_embedding/hybrid_search.py)에 저장해서
+두 검색 결과를 RRF로 합치는 하이브리드 검색도 보여줍니다.
+
+모델 서버(02_embedding/model_server.py)가 떠 있으면 서버에 요청하고, 없으면 프로세스 안에서 모델을 로드합니다.
+BGE_M3_BACKEND=onnx-int8로 실행하면 ONNX Runtime int8 백엔드를 사용합니다. (02_embedding/bge_encoder.py)
+
 필요한 패키지:
   uv add chromadb sentence-transformers
 """
 
-from chromadb.api.types import Document
-
-
-from chromadb.base_types import Metadata
-
-
-from chromadb.api.types import Document
-
-
-from chromadb.base_types import Metadata
+import sys
+from pathlib import Path
 
+# 02_embedding의 모델 서버 클라이언트 / BGE-M3 로더 / 하이브리드 검색 사용
+sys.path.append(str(Path(__file__).resolve().parent.parent / "02_embedding"))
+from hybrid_search import SparseEncoder, SparseIndex, reciprocal_rank_fusion
+from model_client import load_encoder
 
 import chromadb
-from sentence_transformers import SentenceTransformer
-import json
 
 # BGE-M3 모델 로드 (한국어 임베딩에 강력한 다국어 모델)
 print("BGE-M3 모델을 로드하는 중...")
-model = SentenceTransformer('BAAI/bge-m3')
+model = load_encoder()
 print("모델 로드 완료!")
 
 # Chroma DB 클라이언트 생성 (메모리 모드)
@@ -81,6 +81,12 @@ collection.add(
 )
 print(f"총 {len(documents)}개의 문서가 저장되었습니다.")
 
+# BGE-M3 어휘 가중치(토큰별 가중치)를 계산해서 역색인에 저장 (하이브리드 검색용)
+print("\n어휘 가중치(sparse)를 계산하는 중...")
+sparse_encoder = SparseEncoder(model)
+sparse_index = SparseIndex.build(sparse_encoder.encode(documents))
+print(f"역색인 생성 완료! 토큰 {len(sparse_index.tokens)}개, {sparse_index.memory_bytes}바이트")
+
 # 저장된 문서 수 확인
 print(f"\n컬렉션에 저장된 문서 수: {collection.count()}")
 
@@ -105,7 +111,7 @@ results1 = collection.query(
 )
 
 print("\n가장 유사한 문서들:")
-for i, (doc, metadata, distance) in enumerate[tuple[Document, Metadata, float]](zip[tuple[Document, Metadata, float]](
+for i, (doc, metadata, distance) in enumerate(zip(
     results1['documents'][0],
     results1['metadatas'][0],
     results1['distances'][0]
@@ -166,6 +172,35 @@ for i, (doc, metadata, distance) in enumerate(zip(
     print(f"   카테고리: {metadata['category']}, 주제: {metadata['topic']}")
     print(f"   거리: {distance:.4f}")
 
+# ============================================================
+print("\n" + "="*60)
+print("검색 예제 4: 하이브리드 검색 (dense + sparse, RRF)")
+print("="*60)
+
+# 연도 같은 정확한 단어는 어휘 가중치가 잘 잡아냅니다
+query4 = "1443년에 만들어진 것"
+print(f"질문: {query4}")
+
+query_embedding4 = model.encode([query4], normalize_embeddings=True)
+dense_results = collection.query(
+    query_embeddings=query_embedding4.tolist(),
+    n_results=5
+)
+dense_ranking = [ids.index(doc_id) for doc_id in dense_results['ids'][0]]
+
+sparse_scores, sparse_ranking = sparse_index.search(sparse_encoder.encode(query4), k=5)
+sparse_ranking = sparse_ranking[0][sparse_scores[0] > 0]  # 겹치는 토큰이 없는 문서는 제외
+
+# 두 순위를 RRF(Σ 1 / (60 + 순위))로 합침
+fused_scores, fused_ranking = reciprocal_rank_fusion([dense_ranking, sparse_ranking])
+
+print("\n하이브리드 검색 결과:")
+for i, (doc_index, score) in enumerate(zip(fused_ranking[:3], fused_scores[:3]), 1):
+    dense_rank = dense_ranking.index(doc_index) + 1 if doc_index in dense_ranking else "-"
+    sparse_rank = sparse_ranking.tolist().index(doc_index) + 1 if doc_index in sparse_ranking else "-"
+    print(f"\n{i}. 문서: {documents[doc_index]}")
+    print(f"   RRF 점수: {score:.4f} (dense 순위: {dense_rank}, sparse 순위: {sparse_rank})")
+
 # ============================================================
 print("\n" + "="*60)
 print("특정 ID로 문서 조회")
@@ -196,5 +231,6 @@ print(f"✓ BGE-M3 모델을 사용한 한국어 임베딩")
 print(f"✓ Chroma DB에 {collection.count()}개 문서 저장")
 print(f"✓ 임베딩 차원: {embeddings.shape[1]}차원")
 print(f"✓ 유사도 검색 및 메타데이터 필터링 기능 시연")
+print(f"✓ dense + sparse 하이브리드 검색 (RRF)")
 print("\n완료!")
 
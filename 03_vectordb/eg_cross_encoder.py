@@ -2,21 +2,33 @@
 BGE Reranker를 사용한 검색 결과 재순위화 예제
 
 Cross Encoder는 검색 결과의 순위를 재조정하여 정확도를 높입니다.
+Cross Encoder는 후보마다 모델을 한 번씩 실행하므로 후보 수가 곧 비용입니다.
+1차 검색을 dense + sparse 하이브리드(RRF)로 해서 정답이 상위에 오게 하고, 상위 RERANK_TOP_N개만 재순위화합니다.
+
+모델 서버(02_embedding/model_server.py)가 떠 있으면 서버에 요청하고, 없으면 프로세스 안에서 모델을 로드합니다.
+BGE_M3_BACKEND=onnx-int8로 실행하면 ONNX Runtime int8 백엔드를 사용합니다. (02_embedding/bge_encoder.py)
 
 필요한 패키지:
   uv add chromadb sentence-transformers
 """
 
-from chromadb.api.types import ID, Document
+import sys
+from pathlib import Path
 
+# 02_embedding의 모델 서버 클라이언트 / BGE-M3 로더 / 하이브리드 검색 사용
+sys.path.append(str(Path(__file__).resolve().parent.parent / "02_embedding"))
+from hybrid_search import SparseEncoder, SparseIndex, reciprocal_rank_fusion
+from model_client import load_encoder, load_reranker
 
 import chromadb
-from sentence_transformers import SentenceTransformer, CrossEncoder
+
+# Reranker에 보낼 후보 수 (하이브리드 1차 검색 상위 N개)
+RERANK_TOP_N = 3
 
 # 1. 임베딩 모델 및 Reranker 로드
 print("모델 로드 중...")
-embedding_model = SentenceTransformer('BAAI/bge-m3')
-reranker = CrossEncoder('BAAI/bge-reranker-v2-m3')
+embedding_model = load_encoder()
+reranker = load_reranker()
 print("모델 로드 완료!\n")
 
 # 2. Chroma DB 설정 및 문서 추가
@@ -32,6 +44,8 @@ documents = [
 ]
 
 embeddings = embedding_model.encode(documents, normalize_embeddings=True)
+sparse_encoder = SparseEncoder(embedding_model)
+sparse_index = SparseIndex.build(sparse_encoder.encode(documents))
 
 collection.add(
     ids=[f"doc{i}" for i in range(len(documents))],
@@ -55,7 +69,7 @@ search_results = collection.query(
 print("=" * 60)
 print("1차 검색 결과 (벡터 유사도)")
 print("=" * 60)
-for i, (doc_id, doc, distance) in enumerate(zip[tuple[ID, Document, float]](
+for i, (doc_id, doc, distance) in enumerate(zip(
     search_results['ids'][0],
     search_results['documents'][0],
     search_results['distances'][0]
@@ -63,18 +77,34 @@ for i, (doc_id, doc, distance) in enumerate(zip[tuple[ID, Document, float]](
     print(f"{i}. [{doc_id}] {doc}")
     print(f"   거리: {distance:.4f}\n")
 
-# 5. Reranker로 재순위화
+# 5. 하이브리드 1차 검색 (벡터 순위 + 어휘 가중치 순위를 RRF로 합침)
+dense_ranking = [int(doc_id[len("doc"):]) for doc_id in search_results['ids'][0]]
+sparse_scores, sparse_ranking = sparse_index.search(sparse_encoder.encode(query), k=5)
+sparse_ranking = sparse_ranking[0][sparse_scores[0] > 0]
+fused_scores, fused_ranking = reciprocal_rank_fusion([dense_ranking, sparse_ranking])
+candidates = fused_ranking[:RERANK_TOP_N]
+
+print("=" * 60)
+print(f"하이브리드 1차 검색 결과 (dense + sparse, 상위 {RERANK_TOP_N}개만 Reranker로)")
+print("=" * 60)
+for i, (doc_index, score) in enumerate(zip(fused_ranking, fused_scores), 1):
+    mark = "→" if i <= RERANK_TOP_N else " "
+    print(f"{mark} {i}. [doc{doc_index}] {documents[doc_index]}")
+    print(f"     RRF 점수: {score:.4f}\n")
+
+# 6. Reranker로 재순위화
 print("=" * 60)
 print("2차 검색 결과 (Reranker 적용)")
 print("=" * 60)
 
-# query와 각 문서 쌍의 relevance score 계산
-pairs = [[query, doc] for doc in search_results['documents'][0]]
+# query와 후보 문서 쌍의 relevance score 계산 (RERANK_TOP_N쌍만)
+pairs = [[query, documents[doc_index]] for doc_index in candidates]
 rerank_scores = reranker.predict(pairs)
 
 # 점수로 재정렬
 reranked_results = sorted(
-    zip(search_results['ids'][0], search_results['documents'][0], rerank_scores),
+    zip([f"doc{doc_index}" for doc_index in candidates], [documents[doc_index] for doc_index in candidates],
+        rerank_scores),
     key=lambda x: x[2],
     reverse=True
 )
@@ -87,7 +117,8 @@ print("=" * 60)
 print("요약")
 print("=" * 60)
 print("✓ 1차 검색: 임베딩 벡터 유사도 기반 (빠름)")
-print("✓ 2차 검색: Cross Encoder로 재순위화 (정확함)")
+print("✓ 하이브리드: 벡터 순위와 어휘 가중치 순위를 RRF로 합쳐 정답을 상위로")
+print(f"✓ 2차 검색: 상위 {RERANK_TOP_N}개만 Cross Encoder로 재순위화 (정확함, 후보 수만큼 비용)")
 print("✓ Reranker는 query와 document의 관계를 더 정밀하게 평가")
 print("\n완료!")
 
@@ -0,0 +1,152 @@
+"""
+예제 진입점(entry point) import 시간 측정 + 예산 검사
+
+스크립트마다 `python -X importtime`으로 최상위 import 구문만 실행해서
+(스크립트 본문은 API 호출이나 모델 로드를 하므로 실행하지 않음)
+import에 걸린 시간과 가장 오래 걸린 패키지를 기록하고, 예산(ms)을 넘으면 실패(종료 코드 1)합니다.
+
+  - 스크립트의 최상위 import 구문과 sys.path 조작을 순서대로 뽑아 스크립트 디렉토리에서 실행
+  - 인터프리터 자체 시작 시간은 빼고 import 시간(각 모듈 self 시간의 합)만 비교
+  - 여러 번 실행한 중앙값 사용 (--repeat)
+  - 예산은 tools/importtime_budget.json (진입점별 값, 없으면 default_ms)
+
+실행:
+  python tools/bench_importtime.py                       # 모든 eg_*.py + 예산 파일의 진입점
+  python tools/bench_importtime.py 03_vectordb/eg_cross_encoder.py --repeat 5
+  python tools/bench_importtime.py --skip-missing        # 설치되지 않은 패키지를 쓰는 진입점은 건너뜀
+  python tools/bench_importtime.py --json output/importtime.json
+"""
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "importtime_budget.json"
+
+
+def import_prelude(script):
+    """스크립트의 최상위 import 구문과 sys.path 조작만 모은 코드"""
+    source = script.read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(script))
+    statements = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statements.append(node)
+        elif isinstance(node, ast.Expr) and "sys.path" in ast.get_source_segment(source, node):
+            statements.append(node)
+    module = ast.Module(body=statements, type_ignores=[])
+    return f"__file__ = {str(script)!r}\n" + ast.unparse(module)
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime 출력에서 (전체 import 시간 µs, 최상위 모듈별 누적 시간 µs) 계산
+
+    출력 형식: "import time: self [us] | cumulative | imported package"
+    들여쓰기가 없는 줄이 최상위 import입니다.
+    """
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total += int(self_us)
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total, top_level
+
+
+def measure(code, cwd):
+    """import 구문을 -X importtime으로 한 번 실행. 실패하면 (None, None, 오류 메시지)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "알 수 없는 오류"
+        return None, None, error
+    total, top_level = parse_importtime(result.stderr)
+    return total, top_level, None
+
+
+def baseline(repeat):
+    """아무것도 import하지 않을 때의 (시작 import 시간 µs, 시작 시 import되는 최상위 모듈 이름들)"""
+    runs = [measure("pass", ROOT) for _ in range(repeat)]
+    return statistics.median(total for total, _, _ in runs), set(runs[0][1])
+
+
+def default_entry_points(budgets):
+    scripts = sorted(ROOT.glob("*/eg_*.py"))
+    scripts += [ROOT / name for name in budgets if (ROOT / name) not in scripts]
+    return scripts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="진입점 import 시간 측정 + 예산 검사")
+    parser.add_argument("scripts", nargs="*", help="측정할 스크립트 (기본: 모든 eg_*.py + 예산 파일의 진입점)")
+    parser.add_argument("--repeat", type=int, default=3, help="진입점별 실행 횟수 (중앙값 사용)")
+    parser.add_argument("--budget-file", default=str(BUDGET_FILE))
+    parser.add_argument("--top", type=int, default=3, help="가장 오래 걸린 최상위 모듈 몇 개를 보여줄지")
+    parser.add_argument("--skip-missing", action="store_true",
+                        help="설치되지 않은 패키지 때문에 import가 실패한 진입점은 실패로 치지 않음")
+    parser.add_argument("--json", default=None, help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    with open(args.budget_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    budgets = config.get("entry_points", {})
+    default_budget = config.get("default_ms")
+
+    scripts = [Path(s).resolve() for s in args.scripts] or default_entry_points(budgets)
+    base, startup_modules = baseline(args.repeat)
+    print(f"인터프리터 기본 import: {base / 1000:.1f} ms (아래 값에서 뺌)\n")
+
+    results = []
+    failed = False
+    for script in scripts:
+        name = script.relative_to(ROOT).as_posix() if script.is_relative_to(ROOT) else str(script)
+        budget = budgets.get(name, default_budget)
+        code = import_prelude(script)
+        totals, top_level, error = [], {}, None
+        for _ in range(args.repeat):
+            total, top_level, error = measure(code, script.parent)
+            if error:
+                break
+            totals.append(total)
+
+        if error:
+            missing = "ModuleNotFoundError" in error
+            status = "건너뜀" if missing and args.skip_missing else "오류"
+            failed = failed or status == "오류"
+            print(f"[{status}] {name}: {error}")
+            results.append({"entry_point": name, "status": status, "error": error})
+            continue
+
+        import_ms = max(statistics.median(totals) - base, 0) / 1000
+        over = budget is not None and import_ms > budget
+        failed = failed or over
+        heaviest = sorted(((module, us) for module, us in top_level.items() if module not in startup_modules),
+                          key=lambda item: -item[1])[:args.top]
+        status = "초과" if over else "통과"
+        budget_text = f" / 예산 {budget} ms" if budget is not None else ""
+        print(f"[{status}] {name}: {import_ms:.0f} ms{budget_text}")
+        print("         " + ", ".join(f"{module} {us / 1000:.0f} ms" for module, us in heaviest))
+        results.append({"entry_point": name, "status": status, "import_ms": round(import_ms, 1),
+                        "budget_ms": budget, "heaviest": {m: round(us / 1000, 1) for m, us in heaviest}})
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"baseline_ms": round(base / 1000, 1), "results": results}, f,
+                      ensure_ascii=False, indent=2)
+
+    print("\n예산 초과 또는 오류가 있습니다." if failed else "\n모든 진입점이 예산 안에 있습니다.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()